@@ -0,0 +1,232 @@
+"""Офлайн-бенчмарк парсингу на записаних сторінках catapult.trade
+
+Корпус:
+    fixtures/listing/*.html   — головна (/turbo/home), напр. debug_page.html
+    fixtures/tokens/*.html    — сторінки /turbo/tokens/<id> (ім'я файлу = id)
+або кеш сторінок (PAGE_CACHE_MODE=record): --page-cache page_cache.
+Без записаних сторінок — синтетичний корпус: --generate 200 (детермінований, seed).
+
+Запуск:
+    python benchmark.py --generate 200 --corpus fixtures
+    python benchmark.py --corpus fixtures --output bench.json --baseline bench_prev.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from catapult_analyzer import CatapultAnalyzer
+from page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+# Регресія: p50/p95 виросли або пропускна здатність впала більше ніж на стільки
+DEFAULT_THRESHOLD = 0.10
+
+
+def load_corpus(corpus):
+    """[(ім'я, html)] для лістингів і токенів"""
+    corpus = Path(corpus)
+    listing = [(p.name, p.read_text(encoding='utf-8')) for p in sorted((corpus / 'listing').glob('*.html'))]
+    tokens = [(p.stem, p.read_text(encoding='utf-8')) for p in sorted((corpus / 'tokens').glob('*.html'))]
+    return listing, tokens
+
+
+def load_corpus_from_cache(root):
+    """Той самий корпус з кешу сторінок: остання версія кожної адреси"""
+    cache = PageCache(root, mode='replay')
+    listing = [(key, cache.read_blob(sha)) for key, _, sha in cache.entries('/turbo/home')]
+    tokens = [(key.rsplit('/', 1)[-1], cache.read_blob(sha)) for key, _, sha in cache.entries('/turbo/tokens/')]
+    return listing, tokens
+
+
+# Фрагменти тексту синтетичних сторінок — щоб спрацьовували всі правила паттернів
+SNIPPETS = (
+    "+{n}% in 24h", "{n},{m:03d} holders", "Market Cap: ${n}.{m}K", "Price ${n}.{m:02d}",
+    "liquidity locked", "new launch", "Join our telegram", "trading volume", "honeypot risk", "-{n}% dip",
+)
+
+
+def generate_corpus(corpus, tokens=200, seed=1):
+    """Синтетичний корпус у форматі load_corpus: лістинг з __NEXT_DATA__ і сторінки токенів"""
+    rng = random.Random(seed)
+    corpus = Path(corpus)
+    (corpus / 'listing').mkdir(parents=True, exist_ok=True)
+    (corpus / 'tokens').mkdir(parents=True, exist_ok=True)
+
+    ids = list(range(100000, 100000 + tokens))
+    data = {'props': {'pageProps': {'tokens': [{'id': i, 'name': f'TKN{i}'} for i in ids]}}}
+    cards = ''.join(f'<div class="card"><a href="/turbo/tokens/{i}"><img src="/i/{i}.png"></a>'
+                    f'<a href="/turbo/tokens/{i}">TKN{i}</a></div>' for i in ids)
+    (corpus / 'listing' / 'home.html').write_text(
+        f'<html><head><script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+        f'</head><body>{cards}</body></html>', encoding='utf-8')
+
+    for i in ids:
+        facts = ' · '.join(snippet.format(n=rng.randint(1, 99), m=rng.randint(0, 999))
+                           for snippet in rng.sample(SNIPPETS, rng.randint(2, 6)))
+        filler = ''.join(f'<div class="row"><span>Row {k}</span><span>{rng.random():.6f}</span></div>'
+                         for k in range(rng.randint(20, 80)))
+        (corpus / 'tokens' / f'{i}.html').write_text(
+            f'<html><head><title>TKN{i}</title><style>.row{{color:red}}</style></head>'
+            f'<body><h1>TKN{i}</h1><p>{facts}</p>{filler}<script>window.x={i}</script></body></html>',
+            encoding='utf-8')
+
+    return len(ids)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[k]
+
+
+def run_stage(name, pages, func, repeat, counts_tokens=True):
+    """Час кожного виклику + пікова пам'ять окремим проходом (tracemalloc гальмує)
+
+    func(page) повертає кількість розібраних токенів; етап без токенів — counts_tokens=False.
+    """
+    latencies = []
+    items = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            t0 = time.perf_counter()
+            items += func(page)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for page in pages:
+        func(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = len(latencies)
+    return {
+        'stage': name,
+        'pages': len(pages),
+        'calls': calls,
+        'pages_per_sec': calls / elapsed if elapsed else 0.0,
+        'tokens_per_sec': (items / elapsed if elapsed else 0.0) if counts_tokens else None,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'peak_mem_kb': peak / 1024,
+    }
+
+
+def run_benchmark(corpus, repeat=5, page_cache=None):
+    listing, tokens = load_corpus_from_cache(page_cache) if page_cache else load_corpus(corpus)
+    if not listing and not tokens:
+        raise SystemExit(f"❌ Корпус порожній: {corpus}/listing/*.html, {corpus}/tokens/*.html "
+                         f"(синтетичний: --generate N)")
+
+    analyzer = CatapultAnalyzer()
+    engine = analyzer.pattern_engine
+    stages = []
+
+    if listing:
+        stages.append(run_stage(
+            'extract_tokens', listing,
+            lambda page: len(analyzer.extract_tokens(page[1])), repeat
+        ))
+
+    if tokens:
+        stages.append(run_stage(
+            'parse_token', tokens,
+            lambda page: parsed(analyzer.parse_token(f"/turbo/tokens/{page[0]}", page[0], page[1])), repeat
+        ))
+        stages.append(run_stage(
+            'patterns', tokens,
+            lambda page: len(engine.match(page[1])), repeat, counts_tokens=False
+        ))
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'corpus': {'path': str(page_cache or corpus), 'listing': len(listing), 'tokens': len(tokens)},
+        'repeat': repeat,
+        'stages': stages,
+    }
+
+
+def parsed(token_data):
+    """1 якщо зі сторінки справді розібрано токен (є назва), інакше 0"""
+    return 1 if token_data and token_data['name'] else 0
+
+
+def compare(result, baseline, threshold=DEFAULT_THRESHOLD):
+    """Список регресій відносно попереднього прогону"""
+    previous = {s['stage']: s for s in baseline.get('stages', [])}
+    regressions = []
+
+    for stage in result['stages']:
+        before = previous.get(stage['stage'])
+        if not before:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'peak_mem_kb'):
+            if before[key] and stage[key] > before[key] * (1 + threshold):
+                regressions.append(f"{stage['stage']}.{key}: {before[key]:.2f} → {stage[key]:.2f}")
+        if before['pages_per_sec'] and stage['pages_per_sec'] < before['pages_per_sec'] * (1 - threshold):
+            regressions.append(
+                f"{stage['stage']}.pages_per_sec: {before['pages_per_sec']:.1f} → {stage['pages_per_sec']:.1f}"
+            )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк парсингу catapult.trade")
+    parser.add_argument('--corpus', default='fixtures')
+    parser.add_argument('--page-cache', help="брати сторінки з кешу сторінок замість --corpus")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--baseline', help="JSON попереднього прогону для порівняння")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--generate', type=int, metavar='N',
+                        help="записати синтетичний корпус з N токенів у --corpus і вийти")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        count = generate_corpus(args.corpus, args.generate)
+        print(f"🧪 Синтетичний корпус: {count} токенів → {args.corpus}")
+        return 0
+
+    # Логи аналізатора на кожній сторінці спотворюють час
+    logging.getLogger('catapult_analyzer').setLevel(logging.WARNING)
+
+    result = run_benchmark(args.corpus, args.repeat, args.page_cache)
+
+    for stage in result['stages']:
+        tokens = f"{stage['tokens_per_sec']:8.1f}" if stage['tokens_per_sec'] is not None else f"{'—':>8}"
+        print(f"{stage['stage']:>15}: {stage['pages_per_sec']:8.1f} стор/с  {tokens} ток/с  "
+              f"p50 {stage['p50_ms']:7.2f} мс  p95 {stage['p95_ms']:7.2f} мс  пік {stage['peak_mem_kb']:8.0f} KB")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 {args.output}")
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print("⚠️ РЕГРЕСІЇ:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ Регресій немає")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
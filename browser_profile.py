@@ -0,0 +1,57 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# full — як раніше: повний Chrome з вікном
+# lean — headless, без картинок/медіа/шрифтів/трекерів, мале вікно і кеш
+PROFILES = ('full', 'lean')
+
+# Network.setBlockedURLs: маски з * ; Cloudflare і власні скрипти сайту не чіпаємо
+BLOCKED_URLS = [
+    # картинки
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # медіа
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8", "*.wav",
+    # шрифти
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # аналітика і трекери
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*mixpanel.com*",
+    "*segment.io*", "*segment.com*", "*amplitude.com*", "*intercom.io*",
+    "*clarity.ms*", "*sentry.io*", "*posthog.com*",
+]
+
+LEAN_WINDOW = "1280,900"
+LEAN_DISK_CACHE_MB = 32
+
+
+def apply_options(options, profile):
+    """Прапорці запуску Chrome для профілю"""
+    if profile not in PROFILES:
+        raise ValueError(f"Невідомий профіль браузера: {profile}")
+
+    if profile == 'full':
+        options.add_argument('--start-maximized')
+        return
+
+    options.add_argument(f'--window-size={LEAN_WINDOW}')
+    options.add_argument(f'--disk-cache-size={LEAN_DISK_CACHE_MB * 1024 * 1024}')
+    options.add_argument('--media-cache-size=1')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_argument('--mute-audio')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-background-networking')
+    options.add_argument('--disable-renderer-backgrounding')
+    options.add_argument('--renderer-process-limit=2')
+
+
+def block_resources(driver, urls=BLOCKED_URLS):
+    """CDP: браузер не завантажує ресурси за масками (діє на всі наступні переходи)"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(urls)})
+    except Exception as e:
+        # Без блокування сторінка все одно вантажиться — просто повільніше
+        logger.warning(f"⚠️ CDP блокування ресурсів: {str(e)[:80]}")
+        return False
+    return True
@@ -1,37 +1,137 @@
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import asyncio
 import json
 import logging
-import re
 from datetime import datetime
 from collections import defaultdict
 import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from driver_pool import DriverPool
+from browser_profile import apply_options, block_resources
+from crawl import analyze_sharded
+from http_fetcher import HttpFetcher, CloudflareChallenge, tokens_from_json
+from patterns import PatternEngine
+from html_parse import parse_listing, first_links
+from parse_pool import analyze_html
+from metrics import HTTP_ERRORS, SCANS, timed
+from page_ready import (
+    STAGE_TIMEOUTS, TOKEN_LINK_XPATH, Deadline, open_page, passed_challenge, is_dead_session,
+    wait_for_elements, wait_dom_quiet, wait_network_idle, scroll_until_stable,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Запобіжник глибокого обходу по HTTP, якщо сайт віддає нескінченні сторінки
+MAX_LISTING_PAGES = 50
+
+# Скільки разів перезапускати браузер заради однієї сторінки
+BROWSER_RETRIES = 1
+
+# Найменший бюджет, що передається шарду: 0.0 у дочірньому процесі читався б як «без бюджету»
+MIN_SHARD_BUDGET = 0.001
+
+
+def create_driver(profile='full', page_load_timeout=STAGE_TIMEOUTS['page_load'], driver_cache=None):
+    """Створює новий екземпляр Chrome ('full' або 'lean' — див. browser_profile)
+
+    driver_cache — ChromedriverCache: готовий пропатчений драйвер замість завантаження при кожному запуску.
+    """
+    import undetected_chromedriver as uc  # важкий імпорт — лише коли справді запускаємо браузер
+
+    options = uc.ChromeOptions()
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    apply_options(options, profile)
+
+    lean = profile == 'lean'
+    version_main, driver_path = driver_cache.resolve() if driver_cache else (None, None)
+    driver = uc.Chrome(options=options, version_main=version_main, driver_executable_path=driver_path,
+                       headless=lean)
+    # Без цього один завислий driver.get тримає скан безкінечно
+    driver.set_page_load_timeout(page_load_timeout)
+    if lean:
+        block_resources(driver)
+    return driver
+
+
+def empty_report(failed=False):
+    """Порожній звіт; failed — сторінку не завантажено (на відміну від порожнього лістингу)"""
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'total_tokens': 0,
+        'total_patterns_found': 0,
+        'top_patterns': [],
+        'tokens': []
+    }
+    if failed:
+        report['failed'] = True
+    return report
+
 
 class CatapultAnalyzer:
-    def __init__(self):
+    def __init__(self, driver_pool=None, concurrency=1, timeouts=None, readiness='dom',
+                 fetch_backend='browser', http_fetcher=None, base_url=None,
+                 pattern_engine=None, pattern_scope='html', token_cache=None, parse_workers=2,
+                 page_cache=None, browser_profile='full', listing_limit=30, analyze_limit=15,
+                 horizon=None, shards=1, parse_pool=None, scan_budget=None, driver_cache=None,
+                 shard_pool=None):
         self.driver = None
+        self.browser_profile = browser_profile
+        self.driver_cache = driver_cache
+        self.driver_pool = driver_pool
+        self.concurrency = max(1, concurrency)
+        self.parse_workers = max(1, parse_workers)
+        self.timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+        self.readiness = readiness  # 'dom' або 'network'
+
+        self._pooled = None
         self.all_tokens = []
         self.pattern_frequency = defaultdict(int)
-        self.base_url = "https://catapult.trade"
+        self.base_url = base_url or "https://catapult.trade"
+        self.listing_url = f"{self.base_url}/turbo/home?sort=deployed_at_desc"
+
+        # Глибина обходу: скільки токенів брати з лістингу і скільки з них аналізувати,
+        # horizon — лише токени, запущені за останні N секунд (якщо сайт віддає час запуску)
+        self.listing_limit = listing_limit
+        self.analyze_limit = analyze_limit
+        self.horizon = horizon
+
+        # Шарди — процеси ShardPool, створеного на старті; без пулу вся партія йде в цьому процесі
+        self.shards = max(1, shards)
+        self.shard_pool = shard_pool
+
+        # Процеси для CPU-частини аналізу (ParsePool); без нього — потоки parse_workers
+        self.parse_pool = parse_pool
+
+        # Бюджет часу на весь скан (None/0 — без бюджету): після нього нові токени не беремо, звіт — частковий
+        self.scan_budget = scan_budget or None
+        self.deadline = None
+
+        # 'http' — спершу без браузера, Selenium лише після Cloudflare
+        self.http = None
+        if fetch_backend == 'http':
+            self.http = http_fetcher or HttpFetcher(pool_size=max(10, self.concurrency))
+        self.http_blocked = False
+
+        self.pattern_engine = pattern_engine or PatternEngine()
+        self.pattern_scope = pattern_scope  # 'html' або 'visible'
+        self.token_cache = token_cache
+        self.page_cache = page_cache
+        self.outcome = 'ok'  # для метрик: ok / partial / empty / failed
 
     def init_driver(self):
-        """Ініціалізує браузер"""
+        """Ініціалізує браузер (з пулу, якщо він є)"""
+        if self.driver_pool:
+            self._pooled = self.driver_pool.acquire()
+            self.driver = self._pooled.driver if self._pooled else None
+            return self.driver is not None
+
         try:
             logger.info("🌐 Запускаю браузер...")
-
-            options = uc.ChromeOptions()
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--start-maximized')
-
-            self.driver = uc.Chrome(options=options, version_main=None)
+            with timed('driver_start'):
+                self.driver = self.new_driver()
             logger.info("✅ Браузер запущений")
 
         except Exception as e:
@@ -40,262 +140,508 @@ class CatapultAnalyzer:
 
         return True
 
-    def fetch_page(self):
-        """Завантажує сторінку та чекає на елементи"""
-        try:
-            logger.info("📍 Завантажаю catapult.trade/turbo/home...")
+    def new_driver(self):
+        return create_driver(self.browser_profile, self.timeouts['page_load'], self.driver_cache)
+
+    def release_driver(self, broken=False):
+        """Повертає браузер у пул або закриває його"""
+        if not self.driver:
+            return
+
+        if self._pooled:
+            self.driver_pool.release(self._pooled, broken=broken)
+            self._pooled = None
+        else:
+            self.driver.quit()
+            logger.info("🔌 Браузер закритий")
+
+        self.driver = None
+
+    def close(self):
+        """Звільняє браузер і HTTP-клієнт (для аналізаторів у процесах-воркерах)"""
+        self.release_driver()
+        if self.http:
+            self.http.close()
+
+    def shard_options(self):
+        """Налаштування аналізатора для процесу-воркера (лише те, що пікелиться)"""
+        cache = self.page_cache
+        return {
+            'concurrency': self.concurrency,
+            'timeouts': self.timeouts,
+            'readiness': self.readiness,
+            'fetch_backend': 'http' if self.http and not self.http_blocked else 'browser',
+            'base_url': self.base_url,
+            'patterns': (self.pattern_engine.rules_path, self.pattern_engine.rules),
+            'pattern_scope': self.pattern_scope,
+            'parse_workers': self.parse_workers,
+            'page_cache': (cache.root, cache.mode, cache.ttl) if cache else None,
+            'browser_profile': self.browser_profile,
+            'driver_cache': (self.driver_cache.root, self.driver_cache.version) if self.driver_cache else None,
+            'driver_pool': ({'max_uses': self.driver_pool.max_uses, 'max_rss_mb': self.driver_pool.max_rss_mb}
+                            if self.driver_pool else {}),
+            'scan_budget': (max(self.deadline.remaining(), MIN_SHARD_BUDGET)
+                            if self.deadline is not None else self.scan_budget),
+        }
 
-            self.driver.get(f"{self.base_url}/turbo/home?sort=deployed_at_desc")
+    def ensure_driver(self):
+        """Браузер для fallback-шляху — запускається лише коли знадобився"""
+        if self.driver is None:
+            self.init_driver()
+        return self.driver
 
-            logger.info("⏳ Чекаю завантаження контенту...")
+    def with_browser(self, action, pool=None):
+        """action(driver) на своєму браузері або з пулу; None якщо не вдалося
 
-            # КЛЮЧОВО: Чекаємо поки елементи з'являться на сторінці
-            wait = WebDriverWait(self.driver, 15)
+        Мертва сесія (Chrome впав) або Cloudflare, що не пройшов, — браузер
+        перезапускається і сторінка пробується ще раз. Інші помилки — None одразу.
+        """
+        for attempt in range(BROWSER_RETRIES + 1):
             try:
-                # Чекаємо поки з'явиться хоча б один токен (посилання)
-                wait.until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//a[contains(@href, '/turbo/tokens/')]")
-                    )
-                )
-                logger.info("✅ Контент завантажився")
-            except:
-                logger.warning("⚠️ Елементи не завантажились, користуюсь JavaScript...")
+                if pool is None:
+                    driver = self.ensure_driver()
+                    return action(driver) if driver else None
+
+                # Браузер з пулу береться лише якщо HTTP не впорався; помилка — і пул його списує
+                with pool.driver() as driver:
+                    return action(driver) if driver else None
+
+            except Exception as e:
+                recoverable = isinstance(e, CloudflareChallenge) or is_dead_session(e)
+                if pool is None and recoverable:
+                    self.release_driver(broken=True)
+                if not recoverable or attempt == BROWSER_RETRIES:
+                    logger.debug(f"      ⚠️ {str(e)[:50]}")
+                    return None
+                logger.warning(f"♻️ Браузер: {type(e).__name__} — перезапускаю і повторюю")
+
+    def open_in_browser(self, driver, url):
+        """Перехід з page-load дедлайном і перевіркою Cloudflare"""
+        open_page(driver, url)
+        if not passed_challenge(driver, self.timeouts['challenge']):
+            raise CloudflareChallenge(url)
+
+    def fetch_http(self, url):
+        """HTML через HTTP-бекенд; None якщо бекенду нема, Cloudflare або помилка HTTP"""
+        if not self.http or self.http_blocked:
+            return None
 
-            # Скроллимо вниз щоб загрузилося більше токенів
-            logger.info("📜 Скроллю для завантаження додаткових токенів...")
-            for i in range(5):
-                self.driver.execute_script("window.scrollBy(0, 500)")
-                time.sleep(1.5)
+        try:
+            return self.http.get(url)
+        except CloudflareChallenge:
+            logger.warning("🛡️ Cloudflare — далі через браузер")
+            self.http_blocked = True
+        except requests.RequestException as e:
+            response = getattr(e, 'response', None)
+            HTTP_ERRORS.inc(kind=response.status_code if response is not None else type(e).__name__)
+            logger.warning(f"⚠️ HTTP: {str(e)[:80]}")
+
+        return None
+
+    def fetch_live(self, url, browser_action, pool=None):
+        """HTTP; браузер — лише якщо HTTP-бекенду нема або його зупинив Cloudflare
+
+        Звичайна HTTP-помилка (404, таймаут) браузер не запускає: сторінка просто пропускається.
+        """
+        if self.http and not self.http_blocked:
+            html = self.fetch_http(url)
+            if html is not None or not self.http_blocked:
+                return html
+        return self.with_browser(browser_action, pool)
+
+    def cached_fetch(self, url, live):
+        """Будь-яке завантаження сторінки йде сюди — через кеш сторінок, якщо він є"""
+        if self.page_cache is None:
+            return live()
+        return self.page_cache.fetch(url, live)
+
+    def fetch_page(self):
+        """Завантажує головну (через кеш сторінок)"""
+        try:
+            logger.info("📍 Завантажаю catapult.trade/turbo/home...")
 
-            logger.info("✅ Сторінка завантажена")
-            return self.driver.page_source
+            with timed('listing_load'):
+                return self.cached_fetch(self.listing_url, lambda: self.load_listing_page(self.listing_url))
 
         except Exception as e:
             logger.error(f"❌ Помилка завантаження: {e}")
             return None
 
+    def load_listing_page(self, listing_url):
+        """Живе завантаження головної: HTTP, або браузер зі скролом"""
+        return self.fetch_live(listing_url, lambda driver: self.load_listing_browser(listing_url, driver))
+
+    def load_listing_browser(self, listing_url, driver):
+        """Головна в браузері: чекаємо перший токен і скролимо"""
+        self.open_in_browser(driver, listing_url)
+
+        logger.info("⏳ Чекаю завантаження контенту...")
+
+        # КЛЮЧОВО: Чекаємо поки з'явиться хоча б один токен (посилання)
+        if wait_for_elements(driver, TOKEN_LINK_XPATH, self.timeouts['listing']):
+            logger.info("✅ Контент завантажився")
+        else:
+            logger.warning("⚠️ Елементи не завантажились, користуюсь JavaScript...")
+
+        # Скроллимо поки підвантажуються нові токени
+        logger.info("📜 Скроллю для завантаження додаткових токенів...")
+        with timed('scroll'):
+            count = scroll_until_stable(driver, timeout=self.timeouts['scroll'], target=self.listing_limit)
+        logger.info(f"📜 Посилань на токени: {count}")
+
+        logger.info("✅ Сторінка завантажена")
+        return driver.page_source
+
     def extract_tokens(self, html: str):
         """Витягує **ТІЛЬКИ реальні токени** з ID"""
-        try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'lxml')
+        with timed('parse'):
+            try:
+                # Вбудовані JSON-дані (SSR) — точніші за посилання
+                if self.http:
+                    tokens_found = tokens_from_json(html, self.base_url)
+                    if tokens_found:
+                        logger.info(f"✅ Витягнуто {len(tokens_found)} токенів з JSON")
+                        return tokens_found[:self.listing_limit]
+
+                # КЛЮЧОВО: Шукаємо посилання на реальні токени
+                # Формат: /turbo/tokens/ЧИСЛО (ID) — id, назва і URL за один прохід lxml
+                tokens_found = parse_listing(html, self.base_url)
+
+                if tokens_found:
+                    logger.info(f"✅ Витягнуто {len(tokens_found)} реальних токенів")
+                else:
+                    logger.warning("⚠️ Реальних токенів не знайдено")
+                    # Дебаг: показуємо що нашли
+                    logger.info(f"   HTML має {len(html)} символів")
+                    logger.info(f"   Перші 10 посилань: {first_links(html)}")
 
-            tokens_found = []
+                return tokens_found[:self.listing_limit]  # Перші listing_limit реальних токенів
 
-            # КЛЮЧОВО: Шукаємо посилання на реальні токени
-            # Формат: /turbo/tokens/ЧИСЛО (ID)
-            links = soup.find_all('a', href=re.compile(r'/turbo/tokens/\d+'))
+            except Exception as e:
+                logger.error(f"Помилка парсингу: {e}")
+                return []
 
-            logger.info(f"📊 Знайдено {len(links)} реальних токенів")
+    def past_horizon(self, tokens):
+        """Останній (найстаріший) токен вже за межею horizon"""
+        if not self.horizon or not tokens or 'deployed_at' not in tokens[-1]:
+            return False
+        return tokens[-1]['deployed_at'] < time.time() - self.horizon
+
+    def extend_listing(self, tokens):
+        """Глибокий обхід по HTTP: наступні сторінки лістингу, поки не набрано listing_limit
+
+        Зупиняється на horizon, на порожній сторінці або коли сторінка не дала нових
+        токенів (сайт ігнорує page). Браузерний шлях добирає токени скролом.
+        """
+        seen = {token['token_id'] for token in tokens}
+        page = 1
+
+        while (self.http and len(tokens) < self.listing_limit and page < MAX_LISTING_PAGES
+               and not self.past_horizon(tokens) and not self.out_of_time()):
+            page += 1
+            url = f"{self.listing_url}&page={page}"
+            html = self.cached_fetch(url, lambda: self.fetch_http(url))
+            if not html:
+                break
 
-            seen_urls = set()
+            fresh = [token for token in self.extract_tokens(html) if token['token_id'] not in seen]
+            if not fresh:
+                break
 
-            for link in links:
-                href = link.get('href', '')
-                text = link.get_text(strip=True)
+            seen.update(token['token_id'] for token in fresh)
+            tokens += fresh
+            logger.info(f"📄 Сторінка {page}: +{len(fresh)} токенів (всього {len(tokens)})")
 
-                if href and href not in seen_urls:
-                    # Перевіряємо що це дійсно токен ID
-                    if re.search(r'/turbo/tokens/\d+', href):
-                        seen_urls.add(href)
+        return tokens[:self.listing_limit]
 
-                        full_url = href if href.startswith('http') else f"{self.base_url}{href}"
+    def out_of_time(self):
+        return self.deadline is not None and self.deadline.expired()
 
-                        # ВИПРАВЛЕНО: Уникаємо backslash в f-string
-                        token_id_match = re.search(r'/tokens/(\d+)', href)
-                        token_id = token_id_match.group(1) if token_id_match else 'unknown'
-                        token_name = text if text else f"Token {token_id}"
+    def select_batch(self, tokens):
+        """Токени для аналізу: в межах horizon (якщо відомий час запуску), не більше analyze_limit"""
+        if self.horizon:
+            cutoff = time.time() - self.horizon
+            tokens = [token for token in tokens if token.get('deployed_at', cutoff) >= cutoff]
+        return tokens[:self.analyze_limit]
 
-                        tokens_found.append({
-                            'url': full_url,
-                            'name': token_name,
-                            'token_id': token_id
-                        })
+    def load_token_page(self, token_url, driver):
+        """Відкриває сторінку токена в браузері та чекає її готовності"""
+        self.open_in_browser(driver, token_url)
 
-            if tokens_found:
-                logger.info(f"✅ Вит��гнуто {len(tokens_found)} реальних токенів")
-            else:
-                logger.warning("⚠️ Реальних токенів не знайдено")
-                # Дебаг: показуємо що нашли
-                logger.info(f"   HTML має {len(html)} символів")
-                all_links = soup.find_all('a', limit=10)
-                logger.info(f"   Перші 10 посилань: {[l.get('href') for l in all_links]}")
+        # Чекаємо заголовок, потім «тишу» DOM/мережі — в межах бюджету етапу
+        deadline = Deadline(self.timeouts['token'])
+        wait_for_elements(driver, "//h1", deadline.remaining())
+        if self.readiness == 'network':
+            wait_network_idle(driver, timeout=deadline.remaining())
+        else:
+            wait_dom_quiet(driver, timeout=deadline.remaining())
 
-            return tokens_found[:30]  # Перші 30 реальних токенів
+        return driver.page_source
 
-        except Exception as e:
-            logger.error(f"Помилка парсингу: {e}")
-            return []
+    def fetch_token_html(self, token_url, pool=None):
+        """HTML сторінки токена (через кеш сторінок)"""
+        with timed('token_load'):
+            return self.cached_fetch(token_url, lambda: self.fetch_token_live(token_url, pool))
+
+    def fetch_token_live(self, token_url, pool=None):
+        """Живе завантаження: HTTP, а після Cloudflare — браузер (свій або з пулу)"""
+        return self.fetch_live(token_url, lambda driver: self.load_token_page(token_url, driver), pool)
 
     def analyze_token(self, token_url: str, token_id: str):
-        """Аналізує окремий токен"""
+        """Аналізує окремий токен синхронно (частоти паттернів рахує scan)"""
+        logger.info(f"   🔗 Token #{token_id}")
+        return self.parse_token(token_url, token_id, self.fetch_token_html(token_url))
+
+    def parse_token(self, token_url, token_id, html, deployed_at=None):
+        """Шукає паттерни на завантаженій сторінці токена"""
+        if not html:
+            return self.token_result(token_url, token_id, None)
+
+        with timed('token_analysis'):
+            try:
+                compact = analyze_html(html, self.pattern_engine, self.pattern_scope == 'visible')
+            except Exception as e:
+                logger.debug(f"      ⚠️ {str(e)[:50]}")
+                compact = ('', (), {})
+
+        return self.token_result(token_url, token_id, compact, deployed_at)
+
+    def token_result(self, token_url, token_id, compact, deployed_at=None):
+        """token_data з компактного (name, labels, values); None — сторінку не завантажено"""
         token_data = {
             'url': token_url,
             'token_id': token_id,
             'name': '',
-            'patterns': []
+            'patterns': [],
+            'values': {}
         }
 
-        try:
-            logger.info(f"   🔗 Token #{token_id}")
-
-            self.driver.get(token_url)
-            time.sleep(3)  # Більше часу на завантаження сторінки токена
-
-            html = self.driver.page_source
-
-            # Витягуємо назву токена
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, 'lxml')
-            title = soup.find('h1') or soup.find('title')
-            if title:
-                token_data['name'] = title.get_text(strip=True)[:50]
-
-            # Паттерн 1: Новий (у заголовку чи описі)
-            if re.search(r'\bnew\b|\brecent\b|\blaunch\b', html, re.I):
-                token_data['patterns'].append('⏰NEW')
-                self.pattern_frequency['⏰NEW'] += 1
-
-            # Паттерн 2: Pump (позитивна % зміна)
-            pump_match = re.search(r'\+(\d+(?:\.\d+)?)\s*%', html)
-            if pump_match:
-                change = float(pump_match.group(1))
-                if change >= 50:
-                    token_data['patterns'].append('🚀MEGA_PUMP')
-                    self.pattern_frequency['����MEGA_PUMP'] += 1
-                elif change >= 20:
-                    token_data['patterns'].append('🚀PUMP')
-                    self.pattern_frequency['🚀PUMP'] += 1
-                else:
-                    token_data['patterns'].append('⬆️UP')
-                    self.pattern_frequency['⬆️UP'] += 1
-
-            # Паттерн 3: Volume (24h trading)
-            if re.search(r'24h|volume|trading', html, re.I):
-                token_data['patterns'].append('📈VOLUME')
-                self.pattern_frequency['📈VOLUME'] += 1
-
-            # Паттерн 4: Liquidity Lock
-            if re.search(r'lock|locked|freeze|frozen', html, re.I):
-                token_data['patterns'].append('🔒LOCK')
-                self.pattern_frequency['🔒LOCK'] += 1
-
-            # Паттерн 5: Social Media (посилання)
-            if re.search(r'telegram|twitter|discord|instagram', html, re.I):
-                token_data['patterns'].append('📱SOCIAL')
-                self.pattern_frequency['📱SOCIAL'] += 1
-
-            # Паттерн 6: Holders (кількість)
-            holders_match = re.search(r'(\d+(?:,\d+)*)\s+holders?', html, re.I)
-            if holders_match:
-                token_data['patterns'].append('👥HOLDERS')
-                self.pattern_frequency['👥HOLDERS'] += 1
-
-            # Паттерн 7: Rug/Scam Risk
-            if re.search(r'\brug\b|\bscam\b|\bhoneypot\b|\bdanger\b|\brisk\b', html, re.I):
-                token_data['patterns'].append('🚨RUG')
-                self.pattern_frequency['🚨RUG'] += 1
-
-            # Паттерн 8: Price Dip
-            if re.search(r'\bdown\b|\bdip\b|\bcrash\b|\b-\d+%', html, re.I):
-                token_data['patterns'].append('📉DIP')
-                self.pattern_frequency['📉DIP'] += 1
-
-            # Паттерн 9: Market Cap
-            if re.search(r'market\s+cap|mcap|market cap', html, re.I):
-                token_data['patterns'].append('💰MCAP')
-                self.pattern_frequency['💰MCAP'] += 1
-
-            # Паттерн 10: High Price
-            if re.search(r'\$\d+\.\d+|\$\d+,\d+', html):
-                price_match = re.search(r'\$(\d+(?:,\d+)*(?:\.\d+)?)', html)
-                if price_match:
-                    price_str = price_match.group(1).replace(',', '')
-                    try:
-                        price = float(price_str)
-                        if price > 1:
-                            token_data['patterns'].append('💎HIGH_PRICE')
-                            self.pattern_frequency['💎HIGH_PRICE'] += 1
-                    except:
-                        pass
-
-            if token_data['patterns']:
-                logger.info(f"      ✅ {', '.join(token_data['patterns'][:4])}")
-            else:
-                logger.info(f"      ℹ️ Паттернів не знайдено")
+        if compact is None:
+            return token_data
 
-        except Exception as e:
-            logger.debug(f"      ⚠️ {str(e)[:50]}")
+        name, labels, values = compact
+        token_data['analyzed_at'] = time.time()
+        token_data['name'] = name
+        token_data['patterns'] = list(labels)
+        token_data['values'] = dict(values)
+        if deployed_at is not None:
+            # Вік на момент аналізу (с) — числова ознака поруч зі значеннями правил
+            token_data['values']['AGE'] = max(0.0, token_data['analyzed_at'] - deployed_at)
+
+        if token_data['patterns']:
+            logger.info(f"      ✅ {', '.join(token_data['patterns'][:4])}")
+        else:
+            logger.info(f"      ℹ️ Паттернів не знайдено")
 
         return token_data
 
-    async def scan(self):
-        """Основне сканування"""
+    async def analyze_stream(self, tokens, on_token=None):
+        """Конвеєр: токени → fetch-воркери → сторінки → parse-воркери → агрегатор
+
+        Черги обмежені, тож повільний парсинг пригальмовує завантаження.
+        Кожен готовий токен одразу потрапляє у звіт (і в on_token).
+        Повертає {token_id: token_data}.
+        """
+        loop = asyncio.get_running_loop()
+        fetchers = self.concurrency
+        if self.deadline is None and self.scan_budget is not None:
+            self.deadline = Deadline(self.scan_budget)  # воркер шарду: бюджет від головного процесу
+
+        pool = None
+        if fetchers > 1:
+            # Браузер зі списком більше не потрібен — віддаємо його воркерам
+            await loop.run_in_executor(None, self.release_driver)
+            pool = self.driver_pool or DriverPool(self.new_driver, size=fetchers)
+
+        token_queue = asyncio.Queue(maxsize=fetchers * 2)
+        # Скільки сторінок розбирається одночасно: потоки або всі процеси пулу
+        parsers = max(self.parse_workers, self.parse_pool.workers if self.parse_pool else 0)
+
+        page_queue = asyncio.Queue(maxsize=parsers * 2)
+        fetch_executor = ThreadPoolExecutor(max_workers=fetchers, thread_name_prefix='fetch')
+        parse_executor = ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix='parse')
+        results = {}
+
+        async def produce():
+            for index, token in enumerate(tokens):
+                if self.out_of_time():
+                    logger.warning(f"⌛ Бюджет скану вичерпано — {len(tokens) - index} токенів пропущено")
+                    break
+                await token_queue.put(token)
+            for _ in range(fetchers):
+                await token_queue.put(None)
+
+        async def fetch():
+            while (token := await token_queue.get()) is not None:
+                if self.out_of_time():
+                    continue  # вже в черзі, але часу на нього нема
+                logger.info(f"   🔗 Token #{token['token_id']}")
+                html = await loop.run_in_executor(fetch_executor, self.fetch_token_html, token['url'], pool)
+                await page_queue.put((token, html))
+
+        async def fetch_stage():
+            await asyncio.gather(*(fetch() for _ in range(fetchers)))
+            for _ in range(parsers):
+                await page_queue.put(None)
+
+        async def parse():
+            while (item := await page_queue.get()) is not None:
+                token, html = item
+                token_data = None
+                if html and self.parse_pool:
+                    # Через межу процесу: туди HTML, назад (name, labels, values)
+                    try:
+                        with timed('token_analysis'):
+                            compact = await asyncio.wrap_future(self.parse_pool.submit(html))
+                        token_data = self.token_result(token['url'], token['token_id'], compact,
+                                                       token.get('deployed_at'))
+                    except Exception as e:
+                        logger.warning(f"⚠️ Пул парсингу: {str(e)[:80]} — парсю в потоці")
+                if token_data is None:
+                    token_data = await loop.run_in_executor(
+                        parse_executor, self.parse_token, token['url'], token['token_id'], html,
+                        token.get('deployed_at')
+                    )
+                await self.collect(results, token_data, on_token)
+
+        tasks = [asyncio.ensure_future(produce()), asyncio.ensure_future(fetch_stage())]
+        tasks += [asyncio.ensure_future(parse()) for _ in range(parsers)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            fetch_executor.shutdown(wait=False)
+            parse_executor.shutdown(wait=False)
+            if pool is not None and pool is not self.driver_pool:
+                await loop.run_in_executor(None, pool.close)
+
+        return results
+
+    async def analyze(self, tokens, on_token=None):
+        """Партія токенів: у цьому процесі або шардами по процесах (shards > 1)"""
+        if self.shard_pool and self.shards > 1 and len(tokens) > self.shards:
+            return await analyze_sharded(self, tokens, on_token)
+        return await self.analyze_stream(tokens, on_token)
+
+    async def collect(self, results, token_data, on_token=None):
+        """Агрегатор: готовий токен — в результати, кеш, звіт і on_token"""
+        results[token_data['token_id']] = token_data
+        if self.token_cache:
+            self.token_cache.put(token_data)
+        self.add_token(token_data)
+        if on_token:
+            outcome = on_token(token_data)
+            if asyncio.iscoroutine(outcome):
+                await outcome
+
+    def add_token(self, token_data):
+        """Додає результат токена у звіт"""
+        for pattern in token_data['patterns']:
+            self.pattern_frequency[pattern] += 1
+        if token_data['patterns']:
+            self.all_tokens.append(token_data)
+
+    def build_report(self):
+        """Звіт з поточного стану (можна викликати і посеред сканування)"""
+        top_patterns = sorted(
+            self.pattern_frequency.items(),
+            key=lambda x: x[1],
+            reverse=True
+        )
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'total_tokens': len(self.all_tokens),
+            'total_patterns_found': sum(self.pattern_frequency.values()),
+            'top_patterns': top_patterns,
+            'tokens': list(self.all_tokens)
+        }
+
+    async def scan(self, on_token=None):
+        """Основне сканування + метрики: тривалість і результат (ok / partial / empty / failed / error)"""
+        try:
+            with timed('scan'):
+                report = await self._scan(on_token)
+        except BaseException:
+            SCANS.inc(result='error')
+            raise
+
+        SCANS.inc(result=self.outcome)
+        return report
+
+    async def _scan(self, on_token=None):
+        """Основне сканування (блокуючі кроки — в executor, цикл подій вільний)"""
         logger.info("\n" + "=" * 60)
         logger.info(f"🔄 СКАНУВАННЯ CATAPULT - {datetime.now().strftime('%H:%M:%S')}")
         logger.info("=" * 60)
 
-        # Ініціалізуємо браузер
-        if not self.init_driver():
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'total_tokens': 0,
-                'total_patterns_found': 0,
-                'top_patterns': [],
-                'tokens': []
-            }
+        loop = asyncio.get_running_loop()
+        self.deadline = Deadline(self.scan_budget) if self.scan_budget is not None else None
 
+        # Ініціалізуємо браузер (HTTP-бекенд і кеш сторінок запустять його лише при потребі)
+        lazy_browser = self.http or (self.page_cache and self.page_cache.mode in ('replay', 'cache'))
+        if not lazy_browser and not await loop.run_in_executor(None, self.init_driver):
+            self.outcome = 'failed'
+            return empty_report(failed=True)
+
+        broken = False
         try:
             # Завантажуємо сторінку
-            html = self.fetch_page()
+            html = await loop.run_in_executor(None, self.fetch_page)
 
             if not html:
                 logger.error("❌ Не вдалося завантажити")
-                return {
-                    'timestamp': datetime.now().isoformat(),
-                    'total_tokens': 0,
-                    'total_patterns_found': 0,
-                    'top_patterns': [],
-                    'tokens': []
-                }
+                self.outcome = 'failed'
+                return empty_report(failed=True)
 
             # Витягуємо **ТІЛЬКИ реальні токени**
-            tokens = self.extract_tokens(html)
+            tokens = await loop.run_in_executor(None, self.extract_tokens, html)
 
             if not tokens:
                 logger.warning("⚠️ Реальних токенів не знайдено")
-                return {
-                    'timestamp': datetime.now().isoformat(),
-                    'total_tokens': 0,
-                    'total_patterns_found': 0,
-                    'top_patterns': [],
-                    'tokens': []
-                }
-
-            logger.info(f"📊 Аналізую {len(tokens[:15])} токенів...")
-
-            # Аналізуємо (перші 15)
-            for token in tokens[:15]:
-                token_data = self.analyze_token(token['url'], token['token_id'])
-                if token_data['patterns']:
-                    self.all_tokens.append(token_data)
-                time.sleep(1)
-
-            # Звіт
-            top_patterns = sorted(
-                self.pattern_frequency.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )
-
-            report = {
-                'timestamp': datetime.now().isoformat(),
-                'total_tokens': len(self.all_tokens),
-                'total_patterns_found': sum(self.pattern_frequency.values()),
-                'top_patterns': top_patterns,
-                'tokens': self.all_tokens
-            }
+                self.outcome = 'empty'
+                report = empty_report()
+                report['listed'] = []
+                return report
+
+            tokens = await loop.run_in_executor(None, self.extend_listing, tokens)
+            batch = self.select_batch(tokens)
+
+            # Вже проаналізовані й не прострочені токени беремо з кешу
+            cached = {}
+            if self.token_cache:
+                to_analyze, cached = self.token_cache.split(batch)
+            else:
+                to_analyze = batch
+
+            for token_data in cached.values():
+                self.add_token(token_data)
+
+            logger.info(f"📊 Аналізую {len(to_analyze)} токенів...")
+
+            analyzed = await self.analyze(to_analyze, on_token)
+
+            # Фінальний звіт — у порядку лістингу, а не в порядку завершення
+            self.all_tokens = []
+            self.pattern_frequency = defaultdict(int)
+            for token in batch:
+                token_data = analyzed.get(token['token_id']) or cached.get(token['token_id'])
+                if token_data:  # токени впалого шарду пропускаємо
+                    self.add_token(token_data)
+
+            report = self.build_report()
+            # Усі token_id лістингу, а не лише з паттернами — для темпу нових токенів (SchedulePolicy)
+            report['listed'] = [token['token_id'] for token in tokens]
+
+            # Бюджет вичерпано або шард впав — віддаємо що встигли, позначивши звіт частковим
+            skipped = len(to_analyze) - len(analyzed)
+            if skipped > 0:
+                report['partial'] = True
+                report['skipped'] = skipped
+                self.outcome = 'partial'
 
             logger.info("\n" + "=" * 60)
             logger.info(f"✅ Знайдено паттернів: {report['total_patterns_found']}")
@@ -304,14 +650,25 @@ class CatapultAnalyzer:
 
             return report
 
-        finally:
-            # Закриваємо браузер
-            if self.driver:
-                self.driver.quit()
-                logger.info("🔌 Браузер закритий")
-
+        except BaseException:
+            broken = True
+            raise
 
-async def scan_catapult():
-    """Публічна функція"""
-    analyzer = CatapultAnalyzer()
-    return await analyzer.scan()
+        finally:
+            # Повертаємо браузер у пул (або закриваємо)
+            await loop.run_in_executor(None, self.release_driver, broken)
+
+
+async def scan_catapult(driver_pool=None, concurrency=1, fetch_backend='browser', http_fetcher=None,
+                       pattern_engine=None, token_cache=None, on_token=None, page_cache=None,
+                       browser_profile='full', parse_pool=None, **crawl):
+    """Публічна функція; on_token(token_data) викликається для кожного готового токена
+
+    crawl — глибина обходу (listing_limit, analyze_limit, horizon, shards) та інші
+    налаштування аналізатора: timeouts, scan_budget, driver_cache, shard_pool, pattern_scope.
+    """
+    analyzer = CatapultAnalyzer(driver_pool, concurrency, fetch_backend=fetch_backend,
+                                http_fetcher=http_fetcher, pattern_engine=pattern_engine,
+                                token_cache=token_cache, page_cache=page_cache,
+                                browser_profile=browser_profile, parse_pool=parse_pool, **crawl)
+    return await analyzer.scan(on_token)
@@ -1,49 +1,168 @@
 import os
+import html
 import logging
 import telebot
-import asyncio
-import json
 from datetime import datetime
 from dotenv import load_dotenv
-from catapult_analyzer import scan_catapult
-from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+from history_store import HistoryStore
+from scan_coordinator import ScanCoordinator, ScanProgress
+from outbound import OutboundQueue
+from patterns import PatternEngine
+from report_views import ViewCache, scan_reply, tokens_page, top_text
+from metrics import start_http_server, stats_text
+from subscriptions import Subscriptions, FilterError
+from scheduler import ScanScheduler
+from scanner_worker import HEARTBEAT_SECONDS, Scanner, schedule_policy
+from report_feed import ReportFeed
+from webhook import WebhookServer
+from scoring import TokenScorer
 import threading
 import time
+import atexit
+import signal
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 🛰 thread — сканер у фоновому потоці бота; worker — скани роблять окремі процеси
+# scanner_worker.py, бот лише читає їхні звіти зі спільної історії (HISTORY_DB).
+# Сканер створюється до TeleBot: його пули процесів форкаються, поки в процесі один потік
+SCANNER_MODE = os.getenv("SCANNER_MODE", "thread")
+scanner = None
+if SCANNER_MODE == "thread":
+    scanner = Scanner()
+    atexit.register(scanner.close)
+
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 bot = telebot.TeleBot(TOKEN, parse_mode='HTML', threaded=True)  # 🔧 Змінив на HTML замість Markdown
 
-latest_report = None
-scanning = False
+# 💾 Історія сканувань (SQLite WAL) — звіти переживають перезапуск
+history = HistoryStore(os.getenv("HISTORY_DB", "catapult_history.db"))
+
+# 🖼 Відрендерені представлення останнього звіту — обробники лише віддають рядки
+view_cache = ViewCache()
+
+# 🏆 Рейтинг токенів (NumPy) відносно скану та історії за SCORE_HISTORY_DAYS
+scorer = TokenScorer(history, history_days=int(os.getenv("SCORE_HISTORY_DAYS", "7")))
+
+
+# ⏱ Інтервал фонового сканування підлаштовується під темп нових токенів
+scan_policy = schedule_policy()
+
+
+def publish_report(report):
+    """Новий звіт (свій чи від scanner_worker) → представлення, рейтинг, підписники"""
+    view_cache.publish(report)
+
+    # Рейтинг рахується одразу — /top лише віддає кеш
+    try:
+        scorer.rank(report)
+    except Exception as e:
+        logger.error(f"❌ Помилка рейтингу: {e}")
+
+    # Один фоновий скан обслуговує всіх: підписникам — лише зміни, що підходять під їхній фільтр
+    try:
+        subscriptions.publish(report)
+    except Exception as e:
+        logger.error(f"❌ Помилка розсилки підписникам: {e}")
+
+
+def run_scan():
+    """Одне сканування в процесі бота + запис в історію"""
+    scan_progress.start()
+    try:
+        report = scanner.scan(on_token=scan_progress.on_token)
+    except Exception:
+        scan_policy.record_failure()
+        raise
+
+    # Будь-який скан (фоновий чи /scan) враховується в темпі нових токенів
+    scan_policy.record(report)
+
+    try:
+        history.save_report(report)
+    except Exception as e:
+        logger.error(f"❌ Помилка запису історії: {e}")
+
+    publish_report(report)
+    return report
+
 
+def worker_report(report):
+    """Плановий звіт від scanner_worker — такий самий «останній», як і свій"""
+    publish_report(report)
+    scan_coordinator.record(report)
 
-def update_report():
-    """Оновлює звіт кожні 10 хвилин"""
-    global latest_report, scanning
 
-    while True:
-        try:
-            scanning = True
-            logger.info("🔄 Запускаю сканування...")
-            report = asyncio.run(scan_catapult())
-            latest_report = report
-            scanning = False
-            logger.info("✅ Сканування завершено")
-        except Exception as e:
-            logger.error(f"❌ Помилка сканування: {e}")
-            scanning = False
+# Режим worker: звіти й відповіді на /scan приходять через спільну історію
+report_feed = None
+if not scanner:
+    report_feed = ReportFeed(history, worker_report, poll=float(os.getenv("REPORT_POLL_SECONDS", "1")),
+                             timeout=int(os.getenv("SCANNER_TIMEOUT", "600")))
 
-        time.sleep(600)  # 10 хвилин
+
+def _seed_coordinator():
+    """Координатор стартує з останнього звіту з історії"""
+    scan_func = run_scan if scanner else report_feed.request_scan
+    report = history.latest_report()
+    if not report:
+        return ScanCoordinator(scan_func)
+    view_cache.publish(report)
+    finished = datetime.fromisoformat(report['timestamp']).timestamp()
+    return ScanCoordinator(scan_func, last_result=report, last_finished=finished)
+
+
+# Одне сканування в польоті на весь бот — /scan і фоновий сканер ділять його
+scan_coordinator = _seed_coordinator()
+
+# 📤 Усі масові відправки — через чергу з лімітами Telegram
+outbound = OutboundQueue(bot)
+
+
+def show_scan_progress(watcher, analyzed):
+    """Повідомлення «Сканую...» показує, скільки токенів уже готово (черга тримає порядок у чаті)"""
+    chat_id, message_id = watcher
+    outbound.edit_message_text(f"🔄 Сканую... готово токенів: <code>{analyzed}</code>", chat_id, message_id,
+                               parse_mode='HTML')
+
+
+# ⏳ Хід скану в потоці бота; у режимі worker хід видно в /stats з heartbeat воркера
+scan_progress = ScanProgress(show_scan_progress, interval=float(os.getenv("SCAN_PROGRESS_SECONDS", "3")))
+
+# 🔔 Підписки: перший диф — відносно останнього звіту з історії; імена у виразах — з тих самих правил, що й скан
+pattern_rules = (scanner.pattern_engine if scanner else PatternEngine(os.getenv("PATTERN_RULES_FILE"))).rules
+subscriptions = Subscriptions(history, outbound, pattern_rules)
+_seed_views = view_cache.current()
+subscriptions.seed(_seed_views.report if _seed_views else None)
+
+# Фоновий сканер: пропускає скани, коли нема ні підписників, ні недавніх користувачів
+scheduler = ScanScheduler(scan_coordinator, scan_policy,
+                          has_subscribers=lambda: bool(history.subscriptions()),
+                          idle_after=int(os.getenv("SCAN_IDLE_AFTER", "3600")))
+
+# 'paged' — один список з ◀️ ▶️; 'messages' — кожен токен окремим повідомленням
+TOKENS_VIEW = os.getenv("TOKENS_VIEW", "paged")
+
+# Звіт не старший за стільки секунд віддаємо без нового сканування
+SCAN_FRESH_SECONDS = int(os.getenv("SCAN_FRESH_SECONDS", "60"))
+
+# 📊 Prometheus-метрики на localhost, напр. METRICS_PORT=9108 (за замовчуванням вимкнено); /stats — лише для ADMIN_IDS
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if x}
+
+# 🪝 Вебхук замість long polling (WEBHOOK_PORT=0 — polling як раніше).
+# WEBHOOK_URL — публічна адреса за реверс-проксі; без неї сервер лише слухає (локальні тести)
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "0"))
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 
 
 @bot.message_handler(commands=['start'])
 def start(message):
     logger.info(f"📩 Отримав /start від {message.chat.id}")
+    scheduler.touch()
     text = """🤖 <b>Привіт! Я Catapult Analyzer</b>
 
 Я сканую токени на catapult.trade
@@ -52,6 +171,8 @@ def start(message):
 /scan - Сканувати зараз
 /report - Останній звіт
 /patterns - Паттерни
+/top - Найкращі токени за балом
+/subscribe - Сповіщення про нові токени
 /help - Допомога"""
     try:
         bot.reply_to(message, text)
@@ -60,167 +181,232 @@ def start(message):
         logger.error(f"❌ Помилка при відправці: {e}")
 
 
+def deliver_scan(job, chat_id, message_id):
+    """Колбек Future: редагує повідомлення «Сканую...» кожного чату, що чекав"""
+    scan_progress.unwatch((chat_id, message_id))
+    try:
+        report = job.result()
+    except Exception as e:
+        logger.error(f"❌ Помилка сканування: {e}")
+        outbound.edit_message_text(f"❌ Помилка: {str(e)[:100]}", chat_id, message_id, parse_mode='HTML')
+        return
+
+    # Відповідь — саме з цього звіту: поточні представлення можуть бути вже від іншого скану (або ще не готові)
+    views = view_cache.get(report.get('scan_id'))
+    text, markup = views.scan if views else scan_reply(report)
+
+    # Через чергу: один скан може будити десятки чатів одночасно
+    outbound.edit_message_text(text, chat_id, message_id, reply_markup=markup, parse_mode='HTML')
+    logger.info(f"✅ Звіт поставлено в чергу для {chat_id}")
+
+
 @bot.message_handler(commands=['scan'])
 def scan_now(message):
-    global latest_report, scanning
-
     logger.info(f"📩 Отримав /scan від {message.chat.id}")
-
-    if scanning:
-        bot.reply_to(message, "⏳ Сканування вже йде...", parse_mode='HTML')
+    scheduler.touch()
+
+    # Свіжий звіт — відповідаємо одразу, без браузера
+    views = view_cache.current()
+    if views and scan_coordinator.fresh_result(SCAN_FRESH_SECONDS):
+        text, markup = views.scan
+        age = int(scan_coordinator.last_result_age())
+        bot.reply_to(message, f"{text}\n<i>Звіт {age} с тому</i>", reply_markup=markup, parse_mode='HTML')
         return
 
-    msg = bot.reply_to(message, "🔄 Сканую...", parse_mode='HTML')
+    busy = scan_coordinator.busy
+    msg = bot.reply_to(message, "⏳ Сканування вже йде, чекаю результат..." if busy else "🔄 Сканую...",
+                       parse_mode='HTML')
 
-    try:
-        scanning = True
-        report = asyncio.run(scan_catapult())
-        latest_report = report
-        scanning = False
-
-        # 🔧 Формуємо звіт БЕЗ емодзи в Markdown
-        if report['total_tokens'] == 0:
-            text = "<b>СКАНУВАННЯ</b>\n\n❌ Токенів не знайдено"
-        else:
-            text = (f"<b>СКАНУВАННЯ</b>\n\n"
-                    f"Токенів: <code>{report['total_tokens']}</code>\n"
-                    f"Паттернів: <code>{report['total_patterns_found']}</code>\n\n"
-                    f"<b>ТОП ПАТТЕРНИ:</b>\n")
-
-            for pattern, count in report['top_patterns'][:5]:
-                # 🔧 Очищуємо емодзи з назви паттерну для безпеки
-                clean_pattern = str(pattern).strip()
-                text += f"{clean_pattern}: <code>{count}</code>\n"
-
-        # Додаємо кнопку для показу всіх токенів
-        markup = InlineKeyboardMarkup()
-        if report['total_tokens'] > 0:
-            markup.add(InlineKeyboardButton(
-                f"📋 Показати {report['total_tokens']} токенів",
-                callback_data="show_all_tokens"
-            ))
-
-        bot.edit_message_text(
-            text,
-            message.chat.id,
-            msg.message_id,
-            reply_markup=markup if report['total_tokens'] > 0 else None,
-            parse_mode='HTML'
-        )
-        logger.info("✅ Звіт відправлено")
+    # Обробник звільняється одразу; відповідь прийде коли скан завершиться.
+    # Позачерговий скан зсуває і наступний плановий
+    job, _ = scheduler.request_run()
+    if scanner:
+        scan_progress.watch((message.chat.id, msg.message_id))
+    job.add_done_callback(lambda f: deliver_scan(f, message.chat.id, msg.message_id))
 
-    except Exception as e:
-        logger.error(f"❌ Помилка сканування: {e}")
-        try:
-            bot.reply_to(message, f"❌ Помилка: {str(e)[:100]}", parse_mode='HTML')
-        except:
-            pass
-        scanning = False
+
+def _log_failed_token(idx):
+    def callback(future):
+        if future.exception():
+            logger.error(f"❌ Помилка при відправці токена #{idx}: {future.exception()}")
+    return callback
 
 
 @bot.callback_query_handler(func=lambda call: call.data == "show_all_tokens")
 def show_all_tokens(call):
-    """Виводить кожен токен окремо з паттернами"""
-    global latest_report
-
+    """Виводить токени: одним повідомленням зі сторінками або кожен окремо"""
     logger.info(f"📩 Натиснув кнопку показити токени: {call.from_user.id}")
 
-    if not latest_report or not latest_report.get("tokens"):
+    views = view_cache.current()
+    if not views or not views.token_cards:
         bot.answer_callback_query(call.id, "❌ Даних про токени нема", show_alert=True)
         return
 
-    tokens = latest_report["tokens"]
-    total = len(tokens)
+    total = len(views.token_cards)
+
+    if TOKENS_VIEW == "paged":
+        bot.answer_callback_query(call.id)
+        text, markup = views.page(0)
+        outbound.send_message(call.message.chat.id, text, reply_markup=markup,
+                              parse_mode='HTML', disable_web_page_preview=True)
+        return
 
     bot.answer_callback_query(call.id, f"📤 Відправляю {total} токенів...", show_alert=False)
     logger.info(f"📤 Почало відправку {total} токенів")
 
-    for idx, token in enumerate(tokens, 1):
-        try:
-            token_name = token.get("name", f"Token #{token.get('token_id', '?')}")
-            token_url = token.get("url")
-            patterns = token.get("patterns", [])
+    # Черга сама тримає темп — обробник звільняється одразу
+    for idx, (token_text, markup) in enumerate(views.token_cards, 1):
+        future = outbound.send_message(call.message.chat.id, token_text, reply_markup=markup, parse_mode='HTML')
+        future.add_done_callback(_log_failed_token(idx))
 
-            # 🔧 Формуємо текст про паттерни БЕЗ Markdown конфліктів
-            if not patterns:
-                patterns_text = "❌ Паттернів немає"
-            else:
-                pattern_counts = {}
-                for pattern in patterns:
-                    pattern_counts[pattern] = pattern_counts.get(pattern, 0) + 1
 
-                patterns_text = "<b>Паттерни:</b>\n"
-                for pattern, count in pattern_counts.items():
-                    clean_pattern = str(pattern).strip()
-                    patterns_text += f"{clean_pattern}: <code>{count}</code>\n"
+@bot.callback_query_handler(func=lambda call: call.data.startswith("tokens_page:"))
+def turn_tokens_page(call):
+    """Гортає сторінку списку токенів (редагує те саме повідомлення)"""
+    _, scan_id, page = call.data.split(":")
+    scan_id, page = int(scan_id), int(page)
 
-            token_text = f"<b>#{idx}. {token_name}</b>\n\n{patterns_text}"
+    # Поточний звіт — з кешу; старіші — рендеримо з історії
+    views = view_cache.get(scan_id)
+    if views:
+        text, markup = views.page(page)
+    else:
+        report = history.load_report(scan_id)
+        if not report:
+            bot.answer_callback_query(call.id, "❌ Звіт застарів", show_alert=True)
+            return
+        text, markup = tokens_page(report, page)
 
-            # Додаємо кнопку посилання
-            markup = InlineKeyboardMarkup()
-            markup.add(InlineKeyboardButton("🔗 Перейти до токену", url=token_url))
-
-            bot.send_message(
-                call.message.chat.id,
-                token_text,
-                reply_markup=markup,
-                parse_mode='HTML'
-            )
-
-            time.sleep(0.3)
-
-        except Exception as e:
-            logger.error(f"❌ Помилка при відправці токена #{idx}: {e}")
-            continue
-
-    logger.info(f"✅ Відправлено {total} токенів")
+    bot.answer_callback_query(call.id)
+    outbound.edit_message_text(text, call.message.chat.id, call.message.message_id,
+                               reply_markup=markup, parse_mode='HTML', disable_web_page_preview=True)
 
 
 @bot.message_handler(commands=['report'])
 def show_report(message):
-    global latest_report
-
     logger.info(f"📩 Отримав /report від {message.chat.id}")
+    scheduler.touch()
 
-    if not latest_report:
+    views = view_cache.current()
+    if not views:
         bot.reply_to(message, "❌ Даних немає. Запустіть /scan", parse_mode='HTML')
         return
 
-    text = f"""<b>ЗВІТ</b>
+    bot.reply_to(message, views.report_text, parse_mode='HTML')
 
-Токенів: <code>{latest_report['total_tokens']}</code>
-Паттернів: <code>{latest_report['total_patterns_found']}</code>
 
-<b>ТОП ПАТТЕРНИ (ТОП 10):</b>
-"""
+@bot.message_handler(commands=['top'])
+def show_top(message):
+    logger.info(f"📩 Отримав /top від {message.chat.id}")
+    scheduler.touch()
 
-    for idx, (pattern, count) in enumerate(latest_report['top_patterns'][:10], 1):
-        clean_pattern = str(pattern).strip()
-        text += f"{idx}. {clean_pattern}: <code>{count}</code>\n"
+    views = view_cache.current()
+    if not views:
+        bot.reply_to(message, "❌ Даних немає. Запустіть /scan", parse_mode='HTML')
+        return
 
-    bot.reply_to(message, text, parse_mode='HTML')
+    arg = message.text.partition(' ')[2].strip()
+    limit = min(int(arg), 30) if arg.isdigit() else 10
+    bot.reply_to(message, top_text(scorer.rank(views.report), limit),
+                 parse_mode='HTML', disable_web_page_preview=True)
 
 
 @bot.message_handler(commands=['patterns'])
 def show_patterns(message):
-    global latest_report
-
     logger.info(f"📩 Отримав /patterns від {message.chat.id}")
+    scheduler.touch()
 
-    if not latest_report:
+    views = view_cache.current()
+    if not views:
         bot.reply_to(message, "❌ Даних немає", parse_mode='HTML')
         return
 
-    text = "<b>СТАТИСТИКА ПАТТЕРНІВ</b>\n\n"
+    bot.reply_to(message, views.patterns_text, parse_mode='HTML')
+
+
+SUBSCRIBE_HELP = """<b>ПІДПИСКА</b>
 
-    for pattern, count in latest_report['top_patterns']:
-        clean_pattern = str(pattern).strip()
-        bar = "▪" * min(count, 15)
-        text += f"{clean_pattern}: {bar} ({count})\n"
+/subscribe <i>вираз</i> — сповіщення про нові токени й нові паттерни
+/unsubscribe — вимкнути
 
+Приклади:
+<code>/subscribe MEGA_PUMP and not RUG</code>
+<code>/subscribe HOLDERS >= 500 or (PUMP > 30 and LOCK)</code>
+<code>/subscribe *</code> — усі зміни"""
+
+
+@bot.message_handler(commands=['subscribe'])
+def subscribe(message):
+    logger.info(f"📩 Отримав /subscribe від {message.chat.id}")
+    expression = message.text.partition(' ')[2].strip()
+
+    if not expression:
+        current = subscriptions.get(message.chat.id)
+        status = f"\n\nЗараз: <code>{html.escape(current)}</code>" if current else ""
+        bot.reply_to(message, SUBSCRIBE_HELP + status, parse_mode='HTML')
+        return
+
+    try:
+        subscriptions.subscribe(message.chat.id, expression)
+    except FilterError as e:
+        bot.reply_to(message, f"❌ {html.escape(str(e))}\n\n{SUBSCRIBE_HELP}", parse_mode='HTML')
+        return
+
+    bot.reply_to(message, f"✅ Підписка: <code>{html.escape(expression)}</code>", parse_mode='HTML')
+
+
+@bot.message_handler(commands=['unsubscribe'])
+def unsubscribe(message):
+    logger.info(f"📩 Отримав /unsubscribe від {message.chat.id}")
+    if subscriptions.unsubscribe(message.chat.id):
+        bot.reply_to(message, "🔕 Підписку вимкнено", parse_mode='HTML')
+    else:
+        bot.reply_to(message, "❌ Підписки немає", parse_mode='HTML')
+
+
+@bot.message_handler(commands=['stats'], func=lambda m: m.from_user.id in ADMIN_IDS)
+def show_stats(message):
+    """Адмінська статистика: етапи, сканування, пул браузерів, черга відправки"""
+    logger.info(f"📩 Отримав /stats від {message.chat.id}")
+
+    if not scanner:
+        text = f"{stats_text()}\n\nЧерга відправки: <code>{outbound.pending()}</code>\n\n{workers_text()}"
+        bot.reply_to(message, text, parse_mode='HTML')
+        return
+
+    pool = scanner.driver_pool.stats()
+    plan = scheduler.status()
+    rate = f"{plan['rate']:.1f}/хв" if plan['rate'] is not None else "—"
+    text = (f"{stats_text()}\n\n"
+            f"Браузери: <code>{pool['total']}/{pool['size']}</code> (вільних {pool['idle']})\n"
+            f"Черга відправки: <code>{outbound.pending()}</code>\n"
+            f"Наступний скан: <code>{plan['next_in']:.0f} с</code>, нових токенів {rate}, "
+            f"помилок поспіль {plan['failures']}, пропущено {plan['skipped']}")
     bot.reply_to(message, text, parse_mode='HTML')
 
 
+def workers_text():
+    """Стан scanner_worker з їхніх heartbeat в історії (метрики етапів — на їхніх /metrics)"""
+    workers = history.workers()
+    if not workers:
+        return "⚠️ Жодного scanner_worker не запущено"
+
+    now = time.time()
+    lines = ["<b>Воркери:</b>"]
+    for worker in workers:
+        silent = now - worker['heartbeat']
+        status = worker['status'] if silent < 3 * HEARTBEAT_SECONDS else f"мовчить {silent:.0f} с"
+        line = f"{html.escape(worker['name'])}: <code>{status}</code>"
+        if worker['status'] == 'idle' and worker['next_run']:
+            line += f", наступний скан через {max(0, worker['next_run'] - now):.0f} с"
+        if worker['last_scan_id']:
+            line += f", скан #{worker['last_scan_id']}"
+        if worker['failures']:
+            line += f", помилок поспіль {worker['failures']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
 @bot.message_handler(commands=['help'])
 def help_cmd(message):
     logger.info(f"📩 Отримав /help від {message.chat.id}")
@@ -229,6 +415,9 @@ def help_cmd(message):
 /scan - Сканування
 /report - Звіт
 /patterns - Паттерни
+/top - Рейтинг токенів
+/subscribe - Підписка на зміни
+/unsubscribe - Вимкнути підписку
 /help - Допомога"""
     bot.reply_to(message, text, parse_mode='HTML')
 
@@ -242,17 +431,55 @@ def default(message):
 if __name__ == "__main__":
     logger.info("🚀 Запускаю бота...")
 
-    # Запускаємо фоновий сканер
-    scanner_thread = threading.Thread(target=update_report, daemon=True)
-    scanner_thread.start()
-    logger.info("✅ Фоновий сканер запущений")
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+
+    if scanner:
+        # Запускаємо фоновий сканер
+        scanner_thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+        scanner_thread.start()
+        logger.info("✅ Фоновий сканер запущений")
+    else:
+        report_feed.start()
+        logger.info("✅ Звіти — від scanner_worker через спільну історію")
+
+    if WEBHOOK_PORT:
+        webhook = WebhookServer(
+            bot, os.getenv("WEBHOOK_HOST", "127.0.0.1"), WEBHOOK_PORT,
+            path=os.getenv("WEBHOOK_PATH", "/telegram"), secret=WEBHOOK_SECRET,
+            workers=int(os.getenv("WEBHOOK_WORKERS", "8")),
+            queue_size=int(os.getenv("WEBHOOK_QUEUE_SIZE", "100")),
+        )
+        webhook.start()
+
+        if WEBHOOK_URL:
+            if not WEBHOOK_SECRET:
+                logger.warning("⚠️ WEBHOOK_SECRET не задано — вебхук приймає будь-які запити")
+            bot.remove_webhook()
+            bot.set_webhook(url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET, drop_pending_updates=True)
 
-    logger.info("📱 Бот активний!")
+        logger.info("📱 Бот активний (вебхук)!")
+
+        # SIGTERM/SIGINT → дообробляємо чергу і виходимо
+        stopping = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stopping.set())
+        while not stopping.wait(1):
+            pass
 
-    # Запускаємо бот з обробкою помилок
-    while True:
-        try:
-            bot.infinity_polling(timeout=30, long_polling_timeout=30, skip_pending=True)
-        except Exception as e:
-            logger.error(f"⚠️ Помилка polling: {e}")
-            time.sleep(5)
+        logger.info("🛑 Зупиняю бота...")
+        scheduler.stop()
+        if report_feed:
+            report_feed.stop()
+        webhook.stop()
+        outbound.stop()
+    else:
+        logger.info("📱 Бот активний!")
+
+        # Запускаємо бот з обробкою помилок
+        while True:
+            try:
+                bot.infinity_polling(timeout=30, long_polling_timeout=30, skip_pending=True)
+            except Exception as e:
+                logger.error(f"⚠️ Помилка polling: {e}")
+                time.sleep(5)
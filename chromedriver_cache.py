@@ -0,0 +1,114 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+try:
+    import fcntl
+except ImportError:  # не POSIX — блокуємо лише між потоками, не між процесами
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EXE_PREFIX = "chromedriver-"
+PATCH_MARKER = b"undetected chromedriver"
+
+
+def chrome_major_version():
+    """Мажорна версія встановленого Chrome (None, якщо не знайдено)"""
+    from undetected_chromedriver import find_chrome_executable
+
+    binary = find_chrome_executable()
+    if not binary:
+        return None
+    try:
+        output = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'(\d+)\.\d+\.\d+', output)
+    return int(match.group(1)) if match else None
+
+
+class ChromedriverCache:
+    """Пропатчений chromedriver на диску, закріплений за мажорною версією Chrome
+
+    uc.Chrome(version_main=None) при кожному запуску визначає версію, качає і патчить
+    драйвер. Тут це робиться раз на версію: файл chromedriver-<версія> живе між
+    перезапусками і спільний для процесів. version_main — явно закріплена версія
+    (інакше — версія встановленого Chrome; оновився Chrome — завантажиться новий).
+    """
+
+    def __init__(self, root="chromedriver_cache", version_main=None):
+        self.root = root
+        self.version_main = version_main or None
+        self._resolved = None  # (версія, шлях)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def version(self):
+        """Визначена (або закріплена) версія — щоб процеси-воркери не визначали її знову"""
+        return self._resolved[0] if self._resolved else self.version_main
+
+    def path_for(self, version):
+        return os.path.join(self.root, f"{EXE_PREFIX}{version}" + (".exe" if os.name == 'nt' else ""))
+
+    @staticmethod
+    def is_patched(path):
+        try:
+            with open(path, 'rb') as fh:
+                return PATCH_MARKER in fh.read()
+        except OSError:
+            return False
+
+    def resolve(self):
+        """(version_main, шлях до драйвера) для uc.Chrome; (None, None) — хай uc робить усе сам"""
+        with self._lock:
+            if self._resolved and os.path.exists(self._resolved[1]):
+                return self._resolved
+            try:
+                self._resolved = self._exclusive(self._prepare)
+            except Exception as e:
+                logger.warning(f"⚠️ Кеш chromedriver недоступний, uc завантажить драйвер сам: {e}")
+                return None, None
+            return self._resolved
+
+    def _exclusive(self, action):
+        """Між процесами (шарди, кілька ботів) драйвер качає лише один"""
+        if fcntl is None:
+            return action()
+        with open(os.path.join(self.root, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return action()
+
+    def _prepare(self):
+        version = self.version_main or chrome_major_version()
+        if version and self.is_patched(self.path_for(version)):
+            return version, self.path_for(version)
+        return self._download(version)
+
+    def _download(self, version):
+        from undetected_chromedriver.patcher import Patcher
+
+        logger.info(f"⬇️ Завантажую chromedriver {version or '(остання стабільна)'}...")
+        patcher = Patcher(version_main=version or 0)
+        if not patcher.auto():
+            raise RuntimeError("драйвер не пропатчено")
+
+        version = patcher.version_main
+        path = self.path_for(version)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.copy2(patcher.executable_path, tmp)
+        os.chmod(tmp, 0o755)
+        os.replace(tmp, path)
+
+        # Драйвери старих версій Chrome більше не знадобляться
+        for name in os.listdir(self.root):
+            stale = os.path.join(self.root, name)
+            if name.startswith(EXE_PREFIX) and stale != path and not name.endswith('.tmp'):
+                os.remove(stale)
+
+        logger.info(f"✅ chromedriver {version} закешовано: {path}")
+        return version, path
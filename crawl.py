@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing.util import Finalize
+
+from chromedriver_cache import ChromedriverCache
+from driver_pool import DriverPool
+from metrics import STAGE_SECONDS
+from page_cache import PageCache
+from parse_pool import fork_pool
+from patterns import PatternEngine
+
+logger = logging.getLogger(__name__)
+
+
+def split_shards(tokens, shards):
+    """По колу: кожен шард отримує і свіжі, і старіші токени — шарди закінчують приблизно разом"""
+    return [part for part in (tokens[i::shards] for i in range(shards)) if part]
+
+
+# Пул браузерів процесу-шарду: живе між сканами, як пул головного процесу
+_driver_pool = None
+
+
+def shard_driver_pool(options, driver_cache):
+    """Теплий пул браузерів цього процесу-шарду — створюється при першій партії"""
+    global _driver_pool
+    if _driver_pool is None:
+        from catapult_analyzer import create_driver
+
+        factory = partial(create_driver, options['browser_profile'], options['timeouts']['page_load'], driver_cache)
+        _driver_pool = DriverPool(factory, size=max(1, options['concurrency']), **options['driver_pool'])
+        # Процеси пулу виходять через os._exit: atexit не спрацює, а фіналізатори multiprocessing — так
+        Finalize(None, _driver_pool.close, exitpriority=10)
+    return _driver_pool
+
+
+def analyze_shard(options, tokens):
+    """Точка входу процесу-воркера: власний аналізатор з браузерами з пулу шарду або HTTP-клієнтом
+
+    Повертає (список token_data, знімок гістограми етапів) — метрики воркера
+    зливаються в реєстр головного процесу.
+    """
+    from catapult_analyzer import CatapultAnalyzer  # цикл імпортів: аналізатор імпортує crawl
+
+    STAGE_SECONDS.reset()  # процес живе між сканами (і після fork мав копію батьківських) — лише ця партія
+
+    options = dict(options)
+    rules_path, rules = options.pop('patterns')
+    options['pattern_engine'] = PatternEngine(rules_path, rules)
+    cache = options.pop('page_cache')
+    if cache:
+        options['page_cache'] = PageCache(*cache)
+    driver_cache = options.pop('driver_cache')
+    if driver_cache:
+        options['driver_cache'] = driver_cache = ChromedriverCache(*driver_cache)
+    options['driver_pool'] = shard_driver_pool(options, driver_cache)
+
+    analyzer = CatapultAnalyzer(**options)
+    try:
+        results = asyncio.run(analyzer.analyze_stream(tokens))
+    finally:
+        analyzer.close()  # браузер повертається в пул шарду, а не закривається
+
+    return list(results.values()), STAGE_SECONDS.snapshot()
+
+
+class ShardPool:
+    """Процеси для шардів — створюються раз на старті, до потоків (fork_pool), і живуть між сканами
+
+    Кожен шард у процесі збирає власний аналізатор з shard_options на партію;
+    браузери ж живуть у пулі процесу між сканами (shard_driver_pool).
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = fork_pool(workers)
+
+    def submit(self, options, tokens):
+        """concurrent.futures.Future з (список token_data, знімок гістограми етапів)"""
+        return self._executor.submit(analyze_shard, options, tokens)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def analyze_sharded(analyzer, tokens, on_token=None):
+    """Партія токенів шардами по процесах; результати збираються в analyzer як зі звичайного конвеєра
+
+    Впалий шард не зупиняє решту — його токени просто не потрапляють у звіт (звіт частковий).
+    Зламаний пул (процес шарду вбито) — токени уражених шардів ідуть звичайним конвеєром у цьому процесі.
+    """
+    if analyzer.out_of_time():
+        logger.warning(f"⏱ Бюджет скану вичерпано — {len(tokens)} токенів без аналізу, шарди не запускаю")
+        return {}
+
+    loop = asyncio.get_running_loop()
+    shards = split_shards(tokens, analyzer.shards)
+    options = analyzer.shard_options()
+    results = {}
+
+    try:
+        futures = [asyncio.wrap_future(analyzer.shard_pool.submit(options, shard)) for shard in shards]
+    except BrokenProcessPool as e:
+        logger.error(f"❌ Пул шардів зламано ({e}) — аналізую в цьому процесі")
+        return await analyzer.analyze_stream(tokens, on_token)
+
+    # Браузер зі списком не потрібен, а поки шарди працюють, він лише займав би пам'ять
+    await loop.run_in_executor(None, analyzer.release_driver)
+
+    logger.info(f"🧩 {len(tokens)} токенів → {len(shards)} процесів")
+
+    async def outcome(future, shard):
+        try:
+            return shard, await future, None
+        except Exception as e:
+            return shard, None, e
+
+    orphaned = []  # токени шардів, чий процес загинув разом із пулом
+    try:
+        for done in asyncio.as_completed([outcome(future, shard) for future, shard in zip(futures, shards)]):
+            shard, result, error = await done
+            if isinstance(error, BrokenProcessPool):
+                orphaned += shard
+                continue
+            if error is not None:
+                logger.error(f"❌ Шард впав: {str(error)[:100]}")
+                continue
+
+            shard_results, timings = result
+            STAGE_SECONDS.merge(timings)
+            for token_data in shard_results:
+                await analyzer.collect(results, token_data, on_token)
+    finally:
+        for future in futures:
+            future.cancel()
+
+    if orphaned:
+        logger.error(f"❌ Пул шардів зламався посеред скану — {len(orphaned)} токенів аналізую в цьому процесі")
+        results.update(await analyzer.analyze_stream(orphaned, on_token))
+
+    return results
@@ -4,6 +4,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time
 import logging
+from page_cache import PageCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,6 +36,10 @@ def test_scraper():
             f.write(html)
         
         logger.info(f"💾 HTML збережений у debug_page.html ({len(html)} символів)")
+
+        # Та сама сторінка в кеш сторінок — її можна відтворити PAGE_CACHE_MODE=replay
+        sha = PageCache(mode='record').store(driver.current_url, html)
+        logger.info(f"🗄 У кеші сторінок: {sha[:12]}")
         
         # 🔍 Шукаємо токени
         logger.info("🔍 Шукаю токени на сторінці...")
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import CHROME_RSS, timed
+
+try:
+    import psutil
+except ImportError:  # без psutil стеля пам'яті просто не перевіряється
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    """Браузер з пулу + лічильники для ротації"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """Пул «теплих» браузерів, який живе весь час роботи бота"""
+
+    def __init__(self, factory, size=1, max_uses=20, max_rss_mb=1500, health_timeout=10):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.health_timeout = health_timeout
+
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Видає здоровий браузер (або None, якщо запустити не вдалося)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            with self._cond:
+                entry = None
+                while True:
+                    if self._closed:
+                        return None
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        logger.warning("⚠️ Немає вільного браузера в пулі")
+                        return None
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                return self._spawn()
+
+            if self._is_healthy(entry):
+                return entry
+
+            logger.warning("♻️ Браузер не відповідає, перезапускаю...")
+            self._retire(entry)
+
+    def release(self, entry, broken=False):
+        """Повертає браузер у пул або відправляє на пенсію"""
+        entry.uses += 1
+
+        reason = None
+        if broken:
+            reason = "помилка"
+        elif entry.uses >= self.max_uses:
+            reason = f"{entry.uses} використань"
+        else:
+            rss = self._rss_mb(entry)
+            if rss is not None:
+                CHROME_RSS.set(rss * 1024 * 1024)
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f"{rss:.0f} MB RSS"
+
+        with self._cond:
+            if reason is None and not self._closed:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+
+        logger.info(f"♻️ Браузер на пенсію ({reason or 'пул закрито'})")
+        self._retire(entry)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """with pool.driver() as driver: ... — зламаний браузер не повертається в пул"""
+        entry = self.acquire(timeout)
+        if entry is None:
+            yield None
+            return
+
+        broken = False
+        try:
+            yield entry.driver
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self.release(entry, broken=broken)
+
+    def close(self):
+        """Закриває всі вільні браузери; зайняті закриються при поверненні"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for entry in idle:
+            self._retire(entry)
+
+    def stats(self):
+        with self._cond:
+            return {'total': self._total, 'idle': len(self._idle), 'size': self.size}
+
+    def _spawn(self):
+        try:
+            logger.info("🌐 Запускаю браузер для пулу...")
+            with timed('driver_start'):
+                entry = PooledDriver(self.factory())
+            logger.info("✅ Браузер у пулі")
+            return entry
+        except Exception as e:
+            logger.error(f"❌ Помилка браузера: {e}")
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            return None
+
+    def _retire(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.debug(f"⚠️ quit: {str(e)[:50]}")
+
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, entry):
+        """Перевіряє що сесія жива і не зависла (у окремому потоці з таймаутом)"""
+        result = []
+
+        def probe():
+            try:
+                result.append(entry.driver.execute_script("return document.readyState"))
+            except Exception:
+                pass
+
+        thread = threading.Thread(target=probe, daemon=True)
+        thread.start()
+        thread.join(self.health_timeout)
+        return bool(result)
+
+    def _rss_mb(self, entry):
+        """RSS Chrome разом з дочірніми процесами (рендерери, GPU)"""
+        pid = getattr(entry.driver, 'browser_pid', None)
+        if psutil is None or not pid:
+            return None
+
+        try:
+            proc = psutil.Process(pid)
+            rss = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return rss / (1024 * 1024)
+        except psutil.Error:
+            return None
@@ -0,0 +1,320 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    total_tokens INTEGER NOT NULL,
+    total_patterns INTEGER NOT NULL,
+    top_patterns TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_ts ON scans(ts);
+
+CREATE TABLE IF NOT EXISTS tokens (
+    token_id TEXT PRIMARY KEY,
+    name TEXT,
+    url TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+
+-- Токени звіту в порядку лістингу
+CREATE TABLE IF NOT EXISTS scan_tokens (
+    scan_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    token_id TEXT NOT NULL,
+    name TEXT,
+    url TEXT,
+    PRIMARY KEY (scan_id, position)
+);
+
+-- Часові ряди: які паттерни спрацювали і які числа витягнуті
+CREATE TABLE IF NOT EXISTS token_patterns (
+    scan_id INTEGER NOT NULL,
+    token_id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    pattern TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_token_patterns_token ON token_patterns(token_id, ts);
+CREATE INDEX IF NOT EXISTS idx_token_patterns_ts ON token_patterns(ts);
+
+CREATE TABLE IF NOT EXISTS token_values (
+    scan_id INTEGER NOT NULL,
+    token_id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_token_values_token ON token_values(token_id, ts);
+CREATE INDEX IF NOT EXISTS idx_token_values_ts ON token_values(ts);
+
+-- Підписки чатів: один фільтр на чат
+CREATE TABLE IF NOT EXISTS subscriptions (
+    chat_id INTEGER PRIMARY KEY,
+    filter TEXT NOT NULL,
+    created TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Процеси scanner_worker: хто живий і що робить (heartbeat — unix time)
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    pid INTEGER,
+    status TEXT NOT NULL,
+    heartbeat REAL NOT NULL,
+    next_run REAL,
+    last_scan_id INTEGER,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+
+-- Позачергові скани від бота (/scan): забирає перший вільний воркер
+CREATE TABLE IF NOT EXISTS scan_requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL
+);
+
+-- Скани, що впали у воркера: бот одразу відповідає на /scan помилкою, а не чекає таймауту
+CREATE TABLE IF NOT EXISTS scan_failures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    worker TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+
+-- Хто з воркерів зараз сканує: один на всіх, оренда протухає, якщо воркер упав
+CREATE TABLE IF NOT EXISTS scan_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    holder TEXT,
+    expires REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class HistoryStore:
+    """Історія сканувань у SQLite (WAL: читачі не блокують запис)"""
+
+    def __init__(self, path="catapult_history.db"):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        # Окреме з'єднання на потік — sqlite3 не любить спільних
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def save_report(self, report):
+        """Записує звіт однією транзакцією; повертає scan_id"""
+        ts = report['timestamp']
+        tokens = report['tokens']
+
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO scans (ts, total_tokens, total_patterns, top_patterns) VALUES (?, ?, ?, ?)",
+                    (ts, report['total_tokens'], report['total_patterns_found'],
+                     json.dumps(report['top_patterns'], ensure_ascii=False))
+                )
+                scan_id = cur.lastrowid
+
+                conn.executemany(
+                    "INSERT INTO tokens (token_id, name, url, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(token_id) DO UPDATE SET name = excluded.name, last_seen = excluded.last_seen",
+                    [(t['token_id'], t.get('name'), t.get('url'), ts, ts) for t in tokens]
+                )
+                conn.executemany(
+                    "INSERT INTO scan_tokens (scan_id, position, token_id, name, url) VALUES (?, ?, ?, ?, ?)",
+                    [(scan_id, i, t['token_id'], t.get('name'), t.get('url')) for i, t in enumerate(tokens)]
+                )
+                conn.executemany(
+                    "INSERT INTO token_patterns (scan_id, token_id, ts, pattern) VALUES (?, ?, ?, ?)",
+                    [(scan_id, t['token_id'], ts, p) for t in tokens for p in t['patterns']]
+                )
+                conn.executemany(
+                    "INSERT INTO token_values (scan_id, token_id, ts, name, value) VALUES (?, ?, ?, ?, ?)",
+                    [(scan_id, t['token_id'], ts, k, v) for t in tokens for k, v in t.get('values', {}).items()]
+                )
+
+        report['scan_id'] = scan_id
+        logger.info(f"💾 Скан #{scan_id} збережено ({len(tokens)} токенів)")
+        return scan_id
+
+    def latest_scan_id(self):
+        row = self._conn().execute("SELECT MAX(id) FROM scans").fetchone()
+        return row[0]
+
+    def scans_after(self, scan_id):
+        """id сканів, новіших за scan_id, по порядку"""
+        return [row[0] for row in self._conn().execute(
+            "SELECT id FROM scans WHERE id > ? ORDER BY id", (scan_id,))]
+
+    def load_report(self, scan_id):
+        """Відновлює звіт у форматі scan() (None якщо скану нема)"""
+        conn = self._conn()
+        scan = conn.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        if scan is None:
+            return None
+
+        tokens = {}
+        for row in conn.execute(
+            "SELECT token_id, name, url FROM scan_tokens WHERE scan_id = ? ORDER BY position", (scan_id,)
+        ):
+            tokens[row['token_id']] = {
+                'url': row['url'], 'token_id': row['token_id'], 'name': row['name'] or '',
+                'patterns': [], 'values': {}
+            }
+
+        # rowid зберігає порядок вставки, а отже порядок паттернів
+        for row in conn.execute(
+            "SELECT token_id, pattern FROM token_patterns WHERE scan_id = ? ORDER BY rowid", (scan_id,)
+        ):
+            tokens[row['token_id']]['patterns'].append(row['pattern'])
+        for row in conn.execute("SELECT token_id, name, value FROM token_values WHERE scan_id = ?", (scan_id,)):
+            tokens[row['token_id']]['values'][row['name']] = row['value']
+
+        return {
+            'scan_id': scan['id'],
+            'timestamp': scan['ts'],
+            'total_tokens': scan['total_tokens'],
+            'total_patterns_found': scan['total_patterns'],
+            'top_patterns': [tuple(p) for p in json.loads(scan['top_patterns'])],
+            'tokens': list(tokens.values()),
+        }
+
+    def latest_report(self):
+        scan_id = self.latest_scan_id()
+        return self.load_report(scan_id) if scan_id else None
+
+    def token_history(self, token_id, limit=100):
+        """Часовий ряд одного токена: [(ts, pattern), ...] та [(ts, name, value), ...]"""
+        conn = self._conn()
+        patterns = conn.execute(
+            "SELECT ts, pattern FROM token_patterns WHERE token_id = ? ORDER BY ts DESC LIMIT ?",
+            (token_id, limit)
+        ).fetchall()
+        values = conn.execute(
+            "SELECT ts, name, value FROM token_values WHERE token_id = ? ORDER BY ts DESC LIMIT ?",
+            (token_id, limit)
+        ).fetchall()
+        return [tuple(r) for r in patterns], [tuple(r) for r in values]
+
+    def latest_values(self, since):
+        """Останнє значення кожної ознаки кожного токена з моменту since: [(token_id, name, value)]"""
+        return [tuple(r) for r in self._conn().execute(
+            "SELECT token_id, name, value FROM token_values WHERE rowid IN ("
+            "SELECT MAX(rowid) FROM token_values WHERE ts >= ? GROUP BY token_id, name)",
+            (since,)
+        )]
+
+    def save_subscription(self, chat_id, expression):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT INTO subscriptions (chat_id, filter) VALUES (?, ?) "
+                    "ON CONFLICT(chat_id) DO UPDATE SET filter = excluded.filter",
+                    (chat_id, expression)
+                )
+
+    def delete_subscription(self, chat_id):
+        """True якщо підписка була"""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                return conn.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,)).rowcount > 0
+
+    def subscriptions(self):
+        """{chat_id: вираз фільтра}"""
+        return {row[0]: row[1] for row in self._conn().execute("SELECT chat_id, filter FROM subscriptions")}
+
+    def heartbeat(self, name, status, pid=None, next_run=None, last_scan_id=None, failures=0):
+        """Стан воркера для бота (/stats)"""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT INTO workers (name, pid, status, heartbeat, next_run, last_scan_id, failures) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET pid = excluded.pid, "
+                    "status = excluded.status, heartbeat = excluded.heartbeat, next_run = excluded.next_run, "
+                    "last_scan_id = excluded.last_scan_id, failures = excluded.failures",
+                    (name, pid, status, time.time(), next_run, last_scan_id, failures)
+                )
+
+    def workers(self):
+        """[{name, pid, status, heartbeat, next_run, last_scan_id, failures}]"""
+        return [dict(row) for row in self._conn().execute("SELECT * FROM workers ORDER BY name")]
+
+    def request_scan(self):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                return conn.execute("INSERT INTO scan_requests (ts) VALUES (?)", (time.time(),)).lastrowid
+
+    def claim_scan_requests(self):
+        """Забирає всі запити разом — їх обслуговує один скан; повертає к-сть"""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                return conn.execute("DELETE FROM scan_requests").rowcount
+
+    def record_scan_failure(self, worker, error, keep=100):
+        """Скан не вдався; зберігаються лише останні keep записів. Повертає id"""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                failure_id = conn.execute(
+                    "INSERT INTO scan_failures (ts, worker, error) VALUES (?, ?, ?)",
+                    (time.time(), worker, str(error)[:500])
+                ).lastrowid
+                conn.execute("DELETE FROM scan_failures WHERE id <= ?", (failure_id - keep,))
+        return failure_id
+
+    def latest_failure_id(self):
+        return self._conn().execute("SELECT MAX(id) FROM scan_failures").fetchone()[0]
+
+    def failures_after(self, failure_id):
+        """[{id, ts, worker, error}] новіші за failure_id, по порядку"""
+        return [dict(row) for row in self._conn().execute(
+            "SELECT * FROM scan_failures WHERE id > ? ORDER BY id", (failure_id,))]
+
+    def acquire_lease(self, holder, seconds):
+        """True якщо оренда вільна, протухла або вже наша (атомарно між процесами)"""
+        now = time.time()
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                return conn.execute(
+                    "INSERT INTO scan_lease (id, holder, expires) VALUES (1, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET holder = excluded.holder, expires = excluded.expires "
+                    "WHERE scan_lease.holder IS NULL OR scan_lease.expires < ? OR scan_lease.holder = excluded.holder",
+                    (holder, now + seconds, now)
+                ).rowcount > 0
+
+    def release_lease(self, holder):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("UPDATE scan_lease SET holder = NULL, expires = 0 WHERE holder = ?", (holder,))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
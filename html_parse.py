@@ -0,0 +1,84 @@
+import re
+from itertools import islice
+
+import lxml.etree
+import lxml.html
+
+TOKEN_ID_RE = re.compile(r'/turbo/tokens/(\d+)')
+HREF_RE = re.compile(r'<a\b[^>]*\bhref="([^"]*)"', re.I)
+INVISIBLE_TAGS = ('script', 'style', 'noscript', 'template')
+
+
+def node_text(node):
+    """Як BeautifulSoup get_text(strip=True): кожен фрагмент обрізаний, без роздільників"""
+    return ''.join(part.strip() for part in node.itertext())
+
+
+def parse_listing(html, base_url):
+    """Токени з головної за один прохід по <a>: id, назва, URL (без дублікатів)
+
+    Дублікати — за token_id, а не за href: картка токена часто має кілька
+    посилань (іконка, назва, '?ref=…', '/' в кінці). Береться перше посилання,
+    назва — з першого, в якого є текст.
+    """
+    root = lxml.html.fromstring(html)
+    tokens = []
+    by_id = {}
+
+    for link in root.iter('a'):
+        href = link.get('href')
+        if not href:
+            continue
+
+        match = TOKEN_ID_RE.search(href)
+        if not match:
+            continue
+
+        token_id = match.group(1)
+        name = node_text(link)
+        if token_id in by_id:
+            token = by_id[token_id]
+            if name and token['name'] == f"Token {token_id}":
+                token['name'] = name
+            continue
+
+        token = by_id[token_id] = {
+            'url': href if href.startswith('http') else f"{base_url}{href}",
+            'name': name or f"Token {token_id}",
+            'token_id': token_id,
+        }
+        tokens.append(token)
+
+    return tokens
+
+
+def linked_token_ids(html):
+    """id токенів, на які сторінка має посилання <a href=".../turbo/tokens/<id>">"""
+    return {match.group(1) for href in HREF_RE.findall(html) if (match := TOKEN_ID_RE.search(href))}
+
+
+def first_links(html, limit=10):
+    """Перші href сторінки — для дебагу, коли токенів не знайдено"""
+    return [m.group(1) for m in islice(HREF_RE.finditer(html), limit)]
+
+
+def parse_token_page(html, with_text=False):
+    """Один парсинг сторінки токена: назва (<h1> або <title>) і, за потреби, видимий текст"""
+    root = lxml.html.fromstring(html)
+
+    title = next(root.iter('h1'), None)
+    if title is None:
+        title = next(root.iter('title'), None)
+    name = node_text(title)[:50] if title is not None else ''
+
+    text = None
+    if with_text:
+        lxml.etree.strip_elements(root, *INVISIBLE_TAGS, with_tail=False)
+        text = root.text_content()
+
+    return name, text
+
+
+def visible_text(html):
+    """Лише видимий текст сторінки (без script/style/атрибутів)"""
+    return parse_token_page(html, with_text=True)[1]
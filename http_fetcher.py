@@ -0,0 +1,175 @@
+import json
+import logging
+import re
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from html_parse import linked_token_ids
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+SCRIPT_RE = re.compile(r'<script([^>]*)>(.*?)</script>', re.S | re.I)
+NEXT_F_RE = re.compile(r'self\.__next_f\.push\(\[\d+,\s*("(?:[^"\\]|\\.)*")\]\)', re.S)
+
+ID_KEYS = ('token_id', 'tokenId', 'id')
+NAME_KEYS = ('name', 'symbol', 'ticker')
+TIME_KEYS = ('deployed_at', 'deployedAt', 'created_at', 'createdAt', 'launched_at', 'timestamp')
+
+
+class CloudflareChallenge(Exception):
+    """Сайт віддав сторінку перевірки Cloudflare замість контенту"""
+
+
+def is_challenge(status, html):
+    """Та сама перевірка що в debug_scraper, але без хибних спрацювань на CDN-скриптах"""
+    if "Just a moment" in html or "cf-chl" in html:
+        return True
+    return status in (403, 503) and "Cloudflare" in html
+
+
+def extract_json_blobs(html):
+    """Витягує всі JSON-об'єкти з <script> (Next.js __NEXT_DATA__, RSC-пейлоади, application/json)"""
+    blobs = []
+    decoder = json.JSONDecoder()
+
+    for attrs, body in SCRIPT_RE.findall(html):
+        body = body.strip()
+        if not body:
+            continue
+
+        if 'json' in attrs.lower():
+            try:
+                blobs.append(json.loads(body))
+            except ValueError:
+                pass
+            continue
+
+        # App Router: self.__next_f.push([1, "1a:{...}\n"]) — рядки «ід:JSON»
+        for literal in NEXT_F_RE.findall(body):
+            try:
+                payload = json.loads(literal)
+            except ValueError:
+                continue
+            for line in payload.splitlines():
+                _, _, rest = line.partition(':')
+                if rest[:1] in ('{', '['):
+                    try:
+                        blobs.append(decoder.raw_decode(rest)[0])
+                    except ValueError:
+                        pass
+
+    return blobs
+
+
+def parse_time(value):
+    """Unix-час (сек) з ISO-рядка, секунд або мілісекунд; None якщо не розпізнано"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        if value.isdigit():
+            return parse_time(int(value))
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def token_entry(obj):
+    """{'token_id', 'name', 'data'} якщо словник схожий на токен (числовий id + назва), інакше None"""
+    token_id = next((obj[k] for k in ID_KEYS if k in obj), None)
+    name = next((obj[k] for k in NAME_KEYS if isinstance(obj.get(k), str)), None)
+    if name and str(token_id).isdigit():
+        return {'token_id': str(token_id), 'name': name, 'data': obj}
+    return None
+
+
+def find_tokens(obj, found=None):
+    """Рекурсивно шукає масиви токенів: списки, де кожен словник схожий на токен
+
+    Поодинокі вкладені словники з id і назвою (chain, creator) — не токени,
+    і всередину вже знайденого токена пошук не заходить.
+    """
+    if found is None:
+        found = []
+
+    if isinstance(obj, list):
+        entries = [token_entry(value) for value in obj if isinstance(value, dict)]
+        if entries and all(entries):
+            found.extend(entries)
+            return found
+        for value in obj:
+            find_tokens(value, found)
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            find_tokens(value, found)
+
+    return found
+
+
+def tokens_from_json(html, base_url):
+    """Список токенів з вбудованих JSON-даних сторінки (порядок як у пейлоаді)
+
+    Якщо на сторінці є посилання /turbo/tokens/<id>, лишаються лише токени з ними —
+    інші масиви з id і назвою (топ трейдерів тощо) токенами не вважаються.
+    """
+    tokens = []
+    seen = set()
+    linked = linked_token_ids(html)
+
+    for blob in extract_json_blobs(html):
+        for token in find_tokens(blob):
+            if token['token_id'] in seen or (linked and token['token_id'] not in linked):
+                continue
+            seen.add(token['token_id'])
+            entry = {
+                'url': f"{base_url}/turbo/tokens/{token['token_id']}",
+                'name': token['name'],
+                'token_id': token['token_id'],
+            }
+            # Час запуску — для глибини обходу за часом (CatapultAnalyzer.horizon)
+            deployed_at = next((parse_time(token['data'][k]) for k in TIME_KEYS if k in token['data']), None)
+            if deployed_at is not None:
+                entry['deployed_at'] = deployed_at
+            tokens.append(entry)
+
+    return tokens
+
+
+class HttpFetcher:
+    """Завантаження сторінок без браузера: пул з'єднань + ретраї"""
+
+    def __init__(self, pool_size=10, timeout=15, headers=None):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+        retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 504),
+                      allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url):
+        """Повертає HTML; CloudflareChallenge якщо нас зупинила перевірка"""
+        response = self.session.get(url, timeout=self.timeout)
+        html = response.text
+
+        if is_challenge(response.status_code, html):
+            raise CloudflareChallenge(url)
+
+        response.raise_for_status()
+        return html
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # key -> [лічильники по бакетах..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        """Копія серій — щоб передати з процесу-воркера"""
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def merge(self, snapshot):
+        """Додає серії з іншого процесу (бакети однакові)"""
+        with self._lock:
+            for key, other in snapshot.items():
+                series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+                for i, value in enumerate(other):
+                    series[i] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def summary(self):
+        """{labels: (count, avg, ~p95 за бакетами)} для /stats"""
+        result = {}
+        with self._lock:
+            for key, series in self._series.items():
+                count, total = series[-1], series[-2]
+                p95 = next((b for i, b in enumerate(self.buckets) if series[i] >= 0.95 * count), float('inf'))
+                result[key] = (count, total / count if count else 0.0, p95)
+        return result
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, series in self._series.items():
+                for i, bound in enumerate(self.buckets):
+                    out.append((f"{self.name}_bucket", key + (('le', bound),), series[i]))
+                out.append((f"{self.name}_bucket", key + (('le', '+Inf'),), series[-1]))
+                out.append((f"{self.name}_sum", key, series[-2]))
+                out.append((f"{self.name}_count", key, series[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._add(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def render(self):
+        """Текстовий формат Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "catapult_stage_seconds",
+    "Тривалість етапів сканування (driver_start, listing_load, scroll, parse, token_load, "
+    "token_analysis, telegram_send, scan)"
+)
+SCANS = REGISTRY.counter("catapult_scans_total", "Сканування за результатом (ok, partial, empty, failed, error)")
+CHROME_RSS = REGISTRY.gauge("catapult_chrome_rss_bytes", "RSS Chrome з дочірніми процесами при поверненні в пул")
+TELEGRAM_ERRORS = REGISTRY.counter("catapult_telegram_errors_total", "Помилки відправки в Telegram за кодом")
+HTTP_ERRORS = REGISTRY.counter("catapult_http_errors_total", "Помилки HTTP-бекенду (не Cloudflare) за HTTP-кодом або типом")
+
+
+def timed(stage):
+    """with timed('scroll'): ... — записує тривалість етапу в гістограму"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # скрейпи кожні кілька секунд — не засмічуємо лог
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Локальний /metrics у фоновому потоці; None якщо порт зайнятий — бот працює і без метрик"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"⚠️ Метрики вимкнено: {host}:{port} недоступний ({e})")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    logger.info(f"📊 Метрики: http://{host}:{port}/metrics")
+    return server
+
+
+def stats_text():
+    """Короткий звіт для /stats"""
+    lines = ["<b>СТАТИСТИКА</b>\n", "<b>Етапи</b> (к-сть / сер. / p95):"]
+    for key, (count, avg, p95) in sorted(STAGE_SECONDS.summary().items()):
+        stage = dict(key).get('stage', '?')
+        lines.append(f"{stage}: <code>{count}</code> / <code>{avg:.2f}s</code> / <code>≤{p95}s</code>")
+
+    lines.append("\n<b>Сканування:</b>")
+    for _, key, value in SCANS.samples():
+        lines.append(f"{dict(key).get('result', '?')}: <code>{value}</code>")
+
+    rss = CHROME_RSS.value()
+    if rss:
+        lines.append(f"\nChrome RSS: <code>{rss / (1024 * 1024):.0f} MB</code>")
+
+    return "\n".join(lines)
@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from telebot.apihelper import ApiTelegramException
+
+from metrics import TELEGRAM_ERRORS, timed
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundQueue:
+    """Черга вихідних повідомлень з глобальним і per-chat лімітом
+
+    Один робочий потік надсилає все; 429 повторюється через retry_after.
+    Кожен виклик повертає Future з результатом методу бота.
+    """
+
+    def __init__(self, bot, global_rate=25, per_chat_interval=1.0, max_retries=3):
+        self.bot = bot
+        self.global_interval = 1.0 / global_rate
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+
+        self._heap = []  # (ready_at, seq, job)
+        self._seq = itertools.count()
+        self._chat_next = {}  # chat_id -> найраніший час наступного повідомлення
+        self._global_next = 0.0
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self._worker = threading.Thread(target=self._loop, daemon=True, name="outbound")
+        self._worker.start()
+
+    def call(self, method, chat_id, *args, **kwargs):
+        """Ставить bot.<method>(chat_id, *args, **kwargs) у чергу"""
+        future = Future()
+        job = {'method': method, 'chat_id': chat_id, 'args': args, 'kwargs': kwargs,
+               'future': future, 'attempt': 0}
+        with self._cond:
+            self._push(job, time.monotonic())
+        return future
+
+    def send_message(self, chat_id, text, **kwargs):
+        return self.call('send_message', chat_id, text, **kwargs)
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        # У telebot текст йде першим — переставляємо при виклику
+        return self.call('_edit_message_text', chat_id, text, message_id, **kwargs)
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _push(self, job, not_before):
+        # Порядок у межах чату зберігається: кожне наступне — після попереднього
+        chat_id = job['chat_id']
+        ready_at = max(not_before, self._chat_next.get(chat_id, 0.0))
+        self._chat_next[chat_id] = ready_at + self.per_chat_interval
+        heapq.heappush(self._heap, (ready_at, next(self._seq), job))
+        self._cond.notify()
+
+    def _throttle_chat(self, job, resume_at):
+        """Після 429: повторюємо job першим, решту повідомлень чату — слідом за ним"""
+        chat_id = job['chat_id']
+        pending = sorted((e for e in self._heap if e[2]['chat_id'] == chat_id), key=lambda e: e[1])
+        if pending:
+            self._heap = [e for e in self._heap if e[2]['chat_id'] != chat_id]
+            heapq.heapify(self._heap)
+
+        self._chat_next[chat_id] = 0.0
+        self._push(job, resume_at)
+        for _, _, queued in pending:
+            self._push(queued, resume_at)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.monotonic()
+                    if self._heap:
+                        ready_at = max(self._heap[0][0], self._global_next)
+                        if ready_at <= now:
+                            break
+                        self._cond.wait(ready_at - now)
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+
+                _, _, job = heapq.heappop(self._heap)
+                self._global_next = time.monotonic() + self.global_interval
+
+            self._execute(job)
+
+    def _execute(self, job):
+        future = job['future']
+        try:
+            with timed('telegram_send'):
+                if job['method'] == '_edit_message_text':
+                    text, message_id = job['args'][:2]
+                    result = self.bot.edit_message_text(text, job['chat_id'], message_id, **job['kwargs'])
+                else:
+                    result = getattr(self.bot, job['method'])(job['chat_id'], *job['args'], **job['kwargs'])
+        except ApiTelegramException as e:
+            TELEGRAM_ERRORS.inc(code=e.error_code)
+            if e.error_code == 429 and job['attempt'] < self.max_retries:
+                retry_after = (e.result_json or {}).get('parameters', {}).get('retry_after', 1)
+                job['attempt'] += 1
+                logger.warning(f"⏳ 429 для {job['chat_id']}, повтор через {retry_after} с")
+                with self._cond:
+                    self._throttle_chat(job, time.monotonic() + retry_after)
+                return
+            future.set_exception(e)
+            return
+        except Exception as e:
+            TELEGRAM_ERRORS.inc(code='network')
+            future.set_exception(e)
+            return
+
+        future.set_result(result)
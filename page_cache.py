@@ -0,0 +1,233 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # не POSIX — блокуємо лише між потоками, не між процесами
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# off     — кеш вимкнено
+# record  — завжди живе завантаження, кожна сторінка записується
+# replay  — лише з кешу, сайт не чіпаємо (промах = None)
+# cache   — з кешу якщо запис молодший за ttl, інакше живе + запис
+MODES = ('off', 'record', 'replay', 'cache')
+
+# Індекс стискається, коли з останнього стискання дописано більше рядків, ніж живих адрес (і не менше за стільки)
+COMPACT_MIN_LINES = 200
+
+# Блоб без запису в індексі видаляється лише якщо старший за це: інший процес міг ще не дописати рядок
+ORPHAN_GRACE_SECONDS = 300
+
+
+def page_key(url):
+    """Ключ без домену: записане з проду відтворюється з будь-яким base_url"""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+class PageCache:
+    """Стиснений content-addressed кеш сторінок з часовими мітками
+
+    page_cache/blobs/ab/<sha256>.html.gz — вміст (однакові сторінки зберігаються раз)
+    page_cache/index.jsonl              — {"key", "url", "sha", "ts"} на кожне завантаження
+
+    Індекс лише дописується, тож періодично стискається (compact): лишається остання
+    версія кожної адреси, у режимі cache — ще й лише молодші за ttl; блоби, на які
+    більше ніхто не посилається, видаляються. Кеш спільний для процесів-шардів —
+    дописування і стискання йдуть під файловим локом.
+    """
+
+    def __init__(self, root="page_cache", mode="record", ttl=60):
+        if mode not in MODES:
+            raise ValueError(f"Невідомий режим кешу сторінок: {mode}")
+
+        self.root = root
+        self.mode = mode
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._latest = {}  # key -> (ts, sha)
+        self._appended = 0  # рядків дописано з останнього стискання
+
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._index_path = os.path.join(root, "index.jsonl")
+        self._lock_path = os.path.join(root, ".lock")
+        self._load_index()
+
+    def _read_index(self):
+        """{key: запис індексу} — остання версія кожної адреси з файлу; і скільки в ньому рядків"""
+        latest = {}
+        lines = 0
+        if not os.path.exists(self._index_path):
+            return latest, lines
+
+        with open(self._index_path, encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # обірваний рядок після падіння
+                if entry['ts'] >= latest.get(entry['key'], {'ts': 0})['ts']:
+                    latest[entry['key']] = entry
+        return latest, lines
+
+    def _load_index(self):
+        latest, lines = self._read_index()
+        self._adopt(latest)
+        self._appended = lines - len(latest)
+        logger.info(f"🗄 Кеш сторінок: {len(self._latest)} адрес ({self.mode})")
+        if self._needs_compaction():
+            self.compact()
+
+    def _adopt(self, latest):
+        self._latest = {key: (entry['ts'], entry['sha']) for key, entry in latest.items()}
+
+    @contextmanager
+    def _file_lock(self):
+        """Між процесами, що пишуть у той самий кеш (шарди), — на час дописування і стискання"""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _needs_compaction(self):
+        return self.mode != 'replay' and self._appended >= max(COMPACT_MIN_LINES, len(self._latest))
+
+    def compact(self):
+        """Переписує індекс лише з живими записами і видаляє блоби, на які ніхто не посилається
+
+        Повертає (записів лишилось, блобів видалено). Записаний корпус (replay) не чіпається.
+        """
+        if self.mode == 'replay':
+            return len(self._latest), 0
+
+        with self._lock, self._file_lock():
+            latest, _ = self._read_index()  # разом із рядками інших процесів
+            if self.mode == 'cache':
+                cutoff = time.time() - self.ttl
+                latest = {key: entry for key, entry in latest.items() if entry['ts'] >= cutoff}
+
+            tmp = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for key, entry in latest.items():
+                    f.write(json.dumps({'key': key, 'url': entry.get('url', key), 'sha': entry['sha'],
+                                        'ts': entry['ts']}, ensure_ascii=False) + "\n")
+            os.replace(tmp, self._index_path)
+
+            removed = self._remove_orphans({entry['sha'] for entry in latest.values()})
+            self._adopt(latest)
+            self._appended = 0
+
+        logger.info(f"🗜 Кеш сторінок стиснуто: {len(latest)} адрес, видалено блобів: {removed}")
+        return len(latest), removed
+
+    def _remove_orphans(self, live):
+        removed = 0
+        stale_before = time.time() - ORPHAN_GRACE_SECONDS
+        blobs = os.path.join(self.root, "blobs")
+        for folder in os.listdir(blobs):
+            for name in os.listdir(os.path.join(blobs, folder)):
+                path = os.path.join(blobs, folder, name)
+                if not name.endswith('.html.gz') or name[:-len('.html.gz')] in live:
+                    continue
+                try:
+                    if os.path.getmtime(path) < stale_before:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _blob_path(self, sha):
+        return os.path.join(self.root, "blobs", sha[:2], f"{sha}.html.gz")
+
+    def read_blob(self, sha):
+        with gzip.open(self._blob_path(sha), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def get(self, url, max_age=None):
+        """Остання записана версія сторінки (None якщо нема або старша за max_age)"""
+        with self._lock:
+            entry = self._latest.get(page_key(url))
+        if entry is None:
+            return None
+
+        ts, sha = entry
+        if max_age is not None and time.time() - ts > max_age:
+            return None
+
+        try:
+            return self.read_blob(sha)
+        except OSError as e:
+            logger.warning(f"⚠️ Блоб {sha[:12]} не читається: {e}")
+            return None
+
+    def lookup(self, url):
+        """Що віддати без мережі в поточному режимі"""
+        if self.mode == 'replay':
+            return self.get(url)
+        if self.mode == 'cache':
+            return self.get(url, max_age=self.ttl)
+        return None
+
+    def store(self, url, html):
+        """Записує сторінку; повертає sha256 вмісту"""
+        data = html.encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+
+        try:
+            os.utime(path)  # вже є — свіжий mtime, щоб стискання не прибрало його до запису в індексі
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+        key = page_key(url)
+        ts = time.time()
+        line = json.dumps({'key': key, 'url': url, 'sha': sha, 'ts': ts}, ensure_ascii=False)
+        with self._lock:
+            with self._file_lock(), open(self._index_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+            self._appended += 1
+            self._latest[key] = (ts, sha)
+            compact = self._needs_compaction()
+
+        if compact:
+            self.compact()
+        return sha
+
+    def fetch(self, url, live):
+        """Сторінка через кеш: live() викликається лише коли режим дозволяє мережу"""
+        if self.mode == 'off':
+            return live()
+
+        html = self.lookup(url)
+        if html is not None or self.mode == 'replay':
+            return html
+
+        html = live()
+        if html:
+            try:
+                self.store(url, html)
+            except OSError as e:
+                logger.warning(f"⚠️ Кеш сторінок: {e}")
+        return html
+
+    def entries(self, prefix=""):
+        """[(key, ts, sha)] — остання версія кожної адреси з префіксом"""
+        with self._lock:
+            return sorted((k, ts, sha) for k, (ts, sha) in self._latest.items() if k.startswith(prefix))
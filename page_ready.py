@@ -0,0 +1,181 @@
+import logging
+import time
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchWindowException, TimeoutException, WebDriverException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from urllib3.exceptions import HTTPError as TransportError
+
+logger = logging.getLogger(__name__)
+
+# Бюджет часу (сек) на кожен етап завантаження
+STAGE_TIMEOUTS = {
+    'listing': 15,   # поява першого токена на головній
+    'scroll': 25,    # весь нескінченний скрол
+    'token': 10,     # сторінка токена до «тиші» DOM
+    'page_load': 30,  # сам driver.get — далі зупиняємо завантаження і беремо що є
+    'challenge': 15,  # Cloudflare «Just a moment» зазвичай проходить сам за кілька секунд
+}
+
+# Повідомлення WebDriver, після яких сесія вже не оживе
+DEAD_SESSION_MARKERS = (
+    'invalid session id', 'chrome not reachable', 'disconnected', 'session deleted',
+    'no such window', 'target window already closed', 'tab crashed', 'connection refused',
+)
+
+TOKEN_LINK_XPATH = "//a[contains(@href, '/turbo/tokens/')]"
+TOKEN_LINK_CSS = "a[href*='/turbo/tokens/']"
+
+POLL_INTERVAL = 0.1
+
+_OBSERVER_JS = """
+if (!window.__catapultObserver) {
+    window.__lastMutation = Date.now();
+    window.__catapultObserver = new MutationObserver(function () {
+        window.__lastMutation = Date.now();
+    });
+    window.__catapultObserver.observe(document, {
+        subtree: true, childList: true, characterData: true, attributes: true
+    });
+}
+return Date.now() - window.__lastMutation;
+"""
+
+_RESOURCE_COUNT_JS = "return performance.getEntriesByType('resource').length;"
+
+_CHALLENGE_JS = """
+return document.title.indexOf('Just a moment') !== -1
+    || !!document.querySelector('#challenge-form, #challenge-running, [id^="cf-chl"]');
+"""
+
+
+class Deadline:
+    """Спільний таймер для кількох очікувань в межах одного етапу"""
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def is_dead_session(error):
+    """Браузер впав або сесія втрачена — допоможе лише перезапуск"""
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    if isinstance(error, WebDriverException) and not isinstance(error, TimeoutException):
+        message = (error.msg or str(error)).lower()
+        return any(marker in message for marker in DEAD_SESSION_MARKERS)
+    # urllib3/сокет: процес chromedriver вже мертвий
+    return isinstance(error, (OSError, TransportError))
+
+
+def open_page(driver, url):
+    """driver.get з page-load таймаутом драйвера: завислу сторінку зупиняємо і працюємо з тим, що є"""
+    try:
+        driver.get(url)
+    except TimeoutException:
+        logger.warning(f"⏱ Сторінка вантажиться задовго, зупиняю: {url[-40:]}")
+        driver.execute_script("window.stop();")
+
+
+def passed_challenge(driver, timeout):
+    """False якщо сторінка Cloudflare не зникла за timeout"""
+    deadline = Deadline(timeout)
+    while driver.execute_script(_CHALLENGE_JS):
+        if deadline.expired():
+            return False
+        time.sleep(0.5)
+    return True
+
+
+def wait_for_elements(driver, xpath, timeout):
+    """Чекає поки з'явиться хоча б один елемент; False якщо не дочекались"""
+    if timeout <= 0:
+        return False
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            EC.presence_of_element_located((By.XPATH, xpath))
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_dom_quiet(driver, quiet_ms=500, timeout=5):
+    """Чекає поки DOM не змінюється quiet_ms мілісекунд (MutationObserver)"""
+    deadline = Deadline(timeout)
+    while True:
+        idle_ms = driver.execute_script(_OBSERVER_JS)
+        if idle_ms is not None and idle_ms >= quiet_ms:
+            return True
+        if deadline.expired():
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def wait_network_idle(driver, idle_ms=500, timeout=5):
+    """Чекає поки кількість завантажених ресурсів не росте idle_ms мілісекунд"""
+    deadline = Deadline(timeout)
+    last_count = driver.execute_script(_RESOURCE_COUNT_JS)
+    stable_since = time.monotonic()
+
+    while not deadline.expired():
+        time.sleep(POLL_INTERVAL)
+        count = driver.execute_script(_RESOURCE_COUNT_JS)
+        if count != last_count:
+            last_count = count
+            stable_since = time.monotonic()
+        elif (time.monotonic() - stable_since) * 1000 >= idle_ms:
+            return True
+
+    return False
+
+
+def count_token_links(driver):
+    """Кількість різних токенів на сторінці: картка має кілька посилань на той самий токен"""
+    return driver.execute_script(
+        f'return new Set(Array.from(document.querySelectorAll("{TOKEN_LINK_CSS}"), a => a.pathname)).size;'
+    )
+
+
+def scroll_until_stable(driver, timeout=25, settle_timeout=2.0, patience=2, target=None):
+    """Скролить вниз поки кількість посилань на токени росте
+
+    Зупиняється коли patience скролів поспіль нічого не додали,
+    набрано target посилань або вичерпано бюджет timeout.
+    Повертає фінальну кількість.
+    """
+    deadline = Deadline(timeout)
+    count = count_token_links(driver)
+    idle_rounds = 0
+
+    while idle_rounds < patience and not deadline.expired():
+        if target is not None and count >= target:
+            break
+
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
+
+        # Чекаємо підвантаження, але не довше settle_timeout
+        settle = Deadline(min(settle_timeout, deadline.remaining()))
+        new_count = count
+        while not settle.expired():
+            time.sleep(POLL_INTERVAL)
+            new_count = count_token_links(driver)
+            if new_count > count:
+                break
+
+        if new_count > count:
+            logger.debug(f"📜 {count} → {new_count} токенів")
+            count = new_count
+            idle_rounds = 0
+        else:
+            idle_rounds += 1
+
+    return count
@@ -0,0 +1,95 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from html_parse import parse_token_page
+from patterns import PatternEngine
+
+logger = logging.getLogger(__name__)
+
+_engine = None
+_visible = False
+
+
+def analyze_html(html, engine, visible=False):
+    """Назва + паттерни сторінки токена в компактному вигляді: (name, labels, values)
+
+    labels — кортеж міток, values — {правило: число}; саме це повертається
+    з процесу-воркера замість цілого token_data.
+    """
+    # Один парсинг: назва токена + видимий текст (якщо паттерни йдуть по ньому)
+    name, text = parse_token_page(html, with_text=visible)
+
+    # Усі паттерни за один прохід по документу
+    if not visible:
+        text = html
+
+    labels = []
+    values = {}
+    for hit in engine.match(text):
+        if hit['label']:
+            labels.append(hit['label'])
+        if hit['value'] is not None:
+            values[hit['rule']] = hit['value']
+
+    return name, tuple(labels), values
+
+
+def _init_worker(rules_path, rules, visible):
+    global _engine, _visible
+    # Файл правил перечитується і тут — за mtime, як у головному процесі
+    _engine = PatternEngine(rules_path, rules)
+    _visible = visible
+
+
+def _analyze(html):
+    return analyze_html(html, _engine, _visible)
+
+
+def fork_pool(workers, initializer=None, initargs=()):
+    """ProcessPoolExecutor на fork, усі процеси якого запущені одразу
+
+    Дочірній процес після fork успадковує захоплені іншими потоками локи (logging,
+    sqlite, urllib3) і може зависнути назавжди — тож пули створюються на старті,
+    до потоків бота/воркера, а процеси більше не форкаються. spawn/forkserver не
+    годяться: вони заново імпортують модуль бота, а той має побічні ефекти при імпорті.
+    """
+    if threading.active_count() > 1:
+        logger.warning(f"⚠️ Пул процесів створюється при {threading.active_count()} потоках — fork може зависнути")
+
+    executor = ProcessPoolExecutor(
+        workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=initializer,
+        initargs=initargs,
+    )
+    # Перший submit форкає всі процеси пулу — зараз, поки потік у процесі один
+    executor.submit(int).result()
+    return executor
+
+
+class ParsePool:
+    """Процеси для CPU-частини аналізу токена (lxml + regex) — поза GIL процесу бота
+
+    Туди йде лише HTML, назад — (name, labels, values).
+    Живе весь час роботи бота, як і пул браузерів; створюється до старту потоків (fork_pool).
+    """
+
+    def __init__(self, workers=2, pattern_engine=None, pattern_scope='html'):
+        engine = pattern_engine or PatternEngine()
+        self.workers = workers
+        self.pattern_scope = pattern_scope
+
+        self._executor = fork_pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(engine.rules_path, engine.rules, pattern_scope == 'visible'),
+        )
+
+    def submit(self, html):
+        """concurrent.futures.Future з (name, labels, values)"""
+        return self._executor.submit(_analyze, html)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
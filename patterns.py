@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Правила як дані. Кожне правило — або keywords (слова), або regex.
+# Якщо в regex є група 1 — це числове значення, яке порівнюється з bands:
+# перший band, для якого виконується min (>=) / above (>), дає мітку.
+# Іменовані групи в regex не використовуйте — вони зарезервовані рушієм.
+# value — окремий regex для значення після спрацювання (група 1): він лише
+# читає текст після ключового слова і не «з'їдає» його в інших правил.
+DEFAULT_RULES = [
+    {'name': 'NEW', 'label': '⏰NEW', 'keywords': ['new', 'recent', 'launch'], 'word': True},
+    {'name': 'PUMP', 'regex': r'\+(\d+(?:\.\d+)?)\s*%', 'bands': [
+        {'label': '🚀MEGA_PUMP', 'min': 50},
+        {'label': '🚀PUMP', 'min': 20},
+        {'label': '⬆️UP'},
+    ]},
+    {'name': 'VOLUME', 'label': '📈VOLUME', 'keywords': ['24h', 'volume', 'trading']},
+    {'name': 'LOCK', 'label': '🔒LOCK', 'keywords': ['lock', 'locked', 'freeze', 'frozen']},
+    {'name': 'SOCIAL', 'label': '📱SOCIAL', 'keywords': ['telegram', 'twitter', 'discord', 'instagram']},
+    {'name': 'HOLDERS', 'label': '👥HOLDERS', 'regex': r'(\d+(?:,\d+)*)\s+holders?'},
+    {'name': 'RUG', 'label': '🚨RUG', 'keywords': ['rug', 'scam', 'honeypot', 'danger', 'risk'], 'word': True},
+    {'name': 'DIP', 'label': '📉DIP', 'regex': r'\bdown\b|\bdip\b|\bcrash\b|\b-\d+%'},
+    {'name': 'MCAP', 'label': '💰MCAP', 'regex': r'market\s+cap|mcap',
+     'value': r'[^\d$+%-]{0,40}?\$?(\d+(?:,\d+)*(?:\.\d+)?(?![\d.,])(?:\s?[kmb]\b)?)(?!\s*(?:%|holders?\b))'},
+    {'name': 'PRICE', 'regex': r'\$(\d+(?:,\d+)+(?:\.\d+)?|\d+\.\d+)', 'bands': [
+        {'label': '💎HIGH_PRICE', 'above': 1},
+    ]},
+]
+
+
+def rule_regex(rule):
+    if 'regex' in rule:
+        return rule['regex']
+
+    words = '|'.join(re.escape(w) for w in sorted(rule['keywords'], key=len, reverse=True))
+    return rf'\b(?:{words})\b' if rule.get('word') else f'(?:{words})'
+
+
+NUMBER_SUFFIXES = {'k': 1e3, 'm': 1e6, 'b': 1e9}
+
+
+def parse_number(text):
+    """'1,234' → 1234.0; '2.5M' → 2500000.0"""
+    try:
+        text = text.replace(',', '').strip().lower()
+        multiplier = NUMBER_SUFFIXES.get(text[-1:], 1)
+        if multiplier != 1:
+            text = text[:-1]
+        return float(text) * multiplier
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def band_label(rule, value):
+    """Мітка для числового значення (None — поріг не пройдено)"""
+    bands = rule.get('bands')
+    if not bands:
+        return rule.get('label', rule['name'])
+
+    if value is None:
+        return None
+
+    for band in bands:
+        if 'min' in band and value < band['min']:
+            continue
+        if 'above' in band and value <= band['above']:
+            continue
+        return band['label']
+
+    return None
+
+
+class CompiledRules:
+    """Усі правила в одному regex-і: документ проходиться один раз"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.singles = [re.compile(rule_regex(rule), re.I) for rule in rules]
+        self.values = [re.compile(rule['value'], re.I) if rule.get('value') else None for rule in rules]
+        # Кожна альтернатива — lookahead: regex нічого не «з'їдає», тож фрагмент
+        # одного правила не ховає від інших те, що з ним перетинається
+        self.combined = re.compile(
+            '|'.join(f'(?=(?P<r{i}>{rule_regex(rule)}))' for i, rule in enumerate(rules)),
+            re.I
+        )
+
+    def value(self, index, text, fragment, end):
+        """Числове значення правила: value-regex після фрагмента або група 1 самого правила"""
+        if self.values[index] is not None:
+            after = self.values[index].match(text, end)
+            return parse_number(after.group(1)) if after else None
+
+        if self.singles[index].groups:
+            single = self.singles[index].match(fragment)
+            if single and single.group(1) is not None:
+                return parse_number(single.group(1))
+
+        return None
+
+    def scan(self, text):
+        """Повертає {індекс правила: значення} для першого входження кожного правила
+
+        Результат той самий, що й окремий re.search кожного правила: збіги
+        нульової довжини, тож правила можуть перетинатися ("$1,234 holders" —
+        і PRICE, і HOLDERS). В одній позиції альтернатива бере лише перше правило,
+        тому наступні за ним правила там же перевіряються окремо.
+        """
+        hits = {}
+        for match in self.combined.finditer(text):
+            first = int(match.lastgroup[1:])
+            if first not in hits:
+                hits[first] = self.value(first, text, match.group(match.lastgroup), match.end(match.lastgroup))
+
+            for index in range(first + 1, len(self.rules)):
+                if index in hits:
+                    continue
+                single = self.singles[index].match(text, match.start())
+                if single:
+                    hits[index] = self.value(index, text, single.group(), single.end())
+
+            if len(hits) == len(self.rules):
+                break
+
+        return hits
+
+
+class PatternEngine:
+    """Рушій паттернів з гарячим перезавантаженням правил з JSON-файлу"""
+
+    def __init__(self, rules_path=None, rules=None):
+        self.rules_path = rules_path
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._compiled = CompiledRules(rules or DEFAULT_RULES)
+        self.reload()
+
+    def reload(self, force=False):
+        """Перечитує файл правил якщо він змінився; при помилці лишає старі правила"""
+        if not self.rules_path:
+            return False
+
+        try:
+            mtime = os.stat(self.rules_path).st_mtime
+        except OSError:
+            return False
+
+        if not force and mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if not force and mtime == self._mtime:
+                return False
+            try:
+                with open(self.rules_path, encoding='utf-8') as f:
+                    compiled = CompiledRules(json.load(f))
+            except (OSError, ValueError, KeyError, re.error) as e:
+                logger.error(f"❌ Правила паттернів не завантажено: {e}")
+                self._mtime = mtime
+                return False
+
+            self._compiled = compiled
+            self._mtime = mtime
+
+        logger.info(f"🔁 Правила паттернів: {len(compiled.rules)} ({self.rules_path})")
+        return True
+
+    @property
+    def rules(self):
+        """Поточні (вже перевірені) правила — напр. для передачі в інший процес"""
+        return self._compiled.rules
+
+    def match(self, text):
+        """Список спрацювань [{'rule', 'label', 'value'}] у порядку правил
+
+        label = None якщо значення знайдено, але поріг не пройдено.
+        """
+        self.reload()
+        compiled = self._compiled
+
+        hits = compiled.scan(text)
+        results = []
+        for index in sorted(hits):
+            rule = compiled.rules[index]
+            results.append({'rule': rule['name'], 'label': band_label(rule, hits[index]), 'value': hits[index]})
+
+        return results
+
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ScanFailed(Exception):
+    """Воркер записав в історію помилку скану замість звіту"""
+
+
+class ReportFeed:
+    """Звіти від scanner_worker через спільну історію (SQLite WAL) — бот сам не сканує
+
+    Фоновий потік раз на poll секунд перевіряє нові скани і віддає кожен звіт
+    on_report (з історії читаються лише компактні результати, не сторінки).
+    request_scan() — позачерговий скан: запит у сховище, відповідь — перший
+    звіт, що з'явиться після нього, або перша помилка скану (ScanFailed).
+    """
+
+    def __init__(self, history, on_report, poll=1.0, timeout=600):
+        self.history = history
+        self.on_report = on_report
+        self.poll = poll
+        self.timeout = timeout
+
+        self.last_id = history.latest_scan_id() or 0  # те, що вже є, бот підхопив при старті
+        self.latest = None
+        self.last_failure_id = history.latest_failure_id() or 0
+        self.failure = None
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._follow, daemon=True, name="report-feed").start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _follow(self):
+        while not self._stopped.wait(self.poll):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Стрічка звітів: {e}")
+
+    def check(self):
+        """Нові скани → on_report по порядку, нові помилки — тим, хто чекає; повертає к-сть сканів"""
+        for failure in self.history.failures_after(self.last_failure_id):
+            logger.warning(f"⚠️ Скан у воркера {failure['worker']} не вдався: {failure['error'][:100]}")
+            with self._cond:
+                self.last_failure_id, self.failure = failure['id'], failure
+                self._cond.notify_all()
+
+        scan_ids = self.history.scans_after(self.last_id)
+        for scan_id in scan_ids:
+            report = self.history.load_report(scan_id)
+            try:
+                self.on_report(report)
+            except Exception as e:
+                logger.error(f"❌ Обробка звіту #{scan_id}: {e}")
+
+            with self._cond:
+                self.last_id, self.latest = scan_id, report
+                self._cond.notify_all()
+        return len(scan_ids)
+
+    def request_scan(self):
+        """Блокує до першого звіту після запиту (scan_func для ScanCoordinator)"""
+        with self._cond:
+            since, failed_since = self.last_id, self.last_failure_id
+        self.history.request_scan()
+        logger.info("📨 Запит на скан передано воркерам")
+
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while self.last_id == since:
+                if self.last_failure_id != failed_since:
+                    raise ScanFailed(f"воркер {self.failure['worker']}: {self.failure['error'][:100]}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("сканер не відповідає — чи запущено scanner_worker?")
+                self._cond.wait(remaining)
+            return self.latest
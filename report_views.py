@@ -0,0 +1,197 @@
+import html
+import logging
+import threading
+
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+logger = logging.getLogger(__name__)
+
+TOKENS_PAGE_SIZE = 5
+DELTA_BATCH_SIZE = 10
+
+
+def scan_reply(report):
+    """Текст і кнопка для відповіді на /scan"""
+    # 🔧 Формуємо звіт БЕЗ емодзи в Markdown
+    if report['total_tokens'] == 0:
+        return "<b>СКАНУВАННЯ</b>\n\n❌ Токенів не знайдено", None
+
+    lines = [
+        "<b>СКАНУВАННЯ</b>\n",
+        f"Токенів: <code>{report['total_tokens']}</code>",
+        f"Паттернів: <code>{report['total_patterns_found']}</code>\n",
+        "<b>ТОП ПАТТЕРНИ:</b>",
+    ]
+    for pattern, count in report['top_patterns'][:5]:
+        # 🔧 Очищуємо емодзи з назви паттерну для безпеки
+        lines.append(f"{str(pattern).strip()}: <code>{count}</code>")
+    if report.get('partial'):
+        lines.append(f"\n⚠️ Частковий звіт: не встигли {report['skipped']} токенів")
+
+    # Додаємо кнопку для показу всіх токенів
+    markup = InlineKeyboardMarkup()
+    markup.add(InlineKeyboardButton(
+        f"📋 Показати {report['total_tokens']} токенів",
+        callback_data="show_all_tokens"
+    ))
+    return "\n".join(lines) + "\n", markup
+
+
+def report_text(report):
+    """/report — загальні цифри і ТОП 10"""
+    lines = [
+        "<b>ЗВІТ</b>\n",
+        f"Токенів: <code>{report['total_tokens']}</code>",
+        f"Паттернів: <code>{report['total_patterns_found']}</code>\n",
+        "<b>ТОП ПАТТЕРНИ (ТОП 10):</b>",
+    ]
+    for idx, (pattern, count) in enumerate(report['top_patterns'][:10], 1):
+        lines.append(f"{idx}. {str(pattern).strip()}: <code>{count}</code>")
+    return "\n".join(lines) + "\n"
+
+
+def patterns_text(report):
+    """/patterns — гістограма всіх паттернів"""
+    lines = ["<b>СТАТИСТИКА ПАТТЕРНІВ</b>\n"]
+    for pattern, count in report['top_patterns']:
+        bar = "▪" * min(count, 15)
+        lines.append(f"{str(pattern).strip()}: {bar} ({count})")
+    return "\n".join(lines) + "\n"
+
+
+def token_card(idx, token):
+    """Текст і кнопка-посилання для одного токена"""
+    token_name = token.get("name", f"Token #{token.get('token_id', '?')}")
+    patterns = token.get("patterns", [])
+
+    # 🔧 Формуємо текст про паттерни БЕЗ Markdown конфліктів
+    if not patterns:
+        body = "❌ Паттернів немає"
+    else:
+        pattern_counts = {}
+        for pattern in patterns:
+            pattern_counts[pattern] = pattern_counts.get(pattern, 0) + 1
+
+        body = "<b>Паттерни:</b>\n" + "".join(
+            f"{str(pattern).strip()}: <code>{count}</code>\n" for pattern, count in pattern_counts.items()
+        )
+
+    # Додаємо кнопку посилання
+    markup = InlineKeyboardMarkup()
+    markup.add(InlineKeyboardButton("🔗 Перейти до токену", url=token.get("url")))
+    return f"<b>#{idx}. {token_name}</b>\n\n{body}", markup
+
+
+def tokens_page(report, page):
+    """Одна сторінка списку токенів з кнопками ◀️ ▶️"""
+    tokens = report["tokens"]
+    pages = page_count(report)
+    page = min(max(page, 0), pages - 1)
+    start = page * TOKENS_PAGE_SIZE
+
+    parts = [f"<b>ТОКЕНИ</b> ({page + 1}/{pages})\n\n"]
+    for idx, token in enumerate(tokens[start:start + TOKENS_PAGE_SIZE], start + 1):
+        token_name = html.escape(token.get("name") or f"Token #{token.get('token_id', '?')}")
+        patterns = ", ".join(token.get("patterns", [])) or "❌ Паттернів немає"
+        parts.append(f'<b>#{idx}. <a href="{token.get("url")}">{token_name}</a></b>\n{patterns}\n\n')
+
+    scan_id = report.get("scan_id", 0)
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("◀️", callback_data=f"tokens_page:{scan_id}:{page - 1}"))
+    if page < pages - 1:
+        buttons.append(InlineKeyboardButton("▶️", callback_data=f"tokens_page:{scan_id}:{page + 1}"))
+
+    markup = InlineKeyboardMarkup()
+    if buttons:
+        markup.row(*buttons)
+    return "".join(parts), markup
+
+
+def page_count(report):
+    return max(1, (len(report["tokens"]) + TOKENS_PAGE_SIZE - 1) // TOKENS_PAGE_SIZE)
+
+
+def delta_messages(hits, expression):
+    """Повідомлення підписнику: [(token_data, новий?, нові паттерни)] пачками по DELTA_BATCH_SIZE"""
+    messages = []
+    for start in range(0, len(hits), DELTA_BATCH_SIZE):
+        parts = [f"<b>🔔 ОНОВЛЕННЯ</b> <code>{html.escape(expression)}</code>\n\n"]
+        for token, is_new, fresh in hits[start:start + DELTA_BATCH_SIZE]:
+            token_name = html.escape(token.get("name") or f"Token #{token.get('token_id', '?')}")
+            mark = "🆕 " if is_new else ""
+            patterns = ", ".join(
+                f"<b>{p}</b>" if p in fresh and not is_new else p for p in token.get("patterns", [])
+            )
+            parts.append(f'{mark}<a href="{token.get("url")}">{token_name}</a>\n{patterns}\n\n')
+        messages.append("".join(parts))
+    return messages
+
+
+def top_text(ranking, limit=10):
+    """/top — токени за композитним балом"""
+    if not ranking:
+        return "❌ Даних немає. Запустіть /scan"
+
+    parts = [f"<b>ТОП {min(limit, len(ranking))} ЗА БАЛОМ</b>\n<i>перцентиль у скані / в історії</i>\n\n"]
+    for idx, entry in enumerate(ranking[:limit], 1):
+        token = entry['token']
+        token_name = html.escape(token.get("name") or f"Token #{token.get('token_id', '?')}")
+        values = token.get("values", {})
+        facts = []
+        if values.get("PUMP") is not None:
+            facts.append(f"+{values['PUMP']:g}%")
+        if values.get("HOLDERS") is not None:
+            facts.append(f"{values['HOLDERS']:,.0f} holders")
+        if values.get("MCAP") is not None:
+            facts.append(f"mcap ${values['MCAP']:,.0f}")
+        if values.get("AGE") is not None:
+            facts.append(f"{values['AGE'] / 60:.0f} хв")
+        parts.append(
+            f'<b>#{idx}. <a href="{token.get("url")}">{token_name}</a></b> '
+            f'<code>{entry["score"]:+.2f}</code>\n'
+            f'p{entry["scan_pct"]:.0f} / p{entry["history_pct"]:.0f}'
+            + (f" · {' · '.join(facts)}" if facts else "") + "\n\n"
+        )
+    return "".join(parts)
+
+
+class ReportViews:
+    """Усі відрендерені представлення одного звіту"""
+
+    def __init__(self, report):
+        self.report = report
+        self.scan_id = report.get("scan_id", 0)
+        self.timestamp = report['timestamp']
+        self.scan = scan_reply(report)
+        self.report_text = report_text(report)
+        self.patterns_text = patterns_text(report)
+        self.token_cards = [token_card(idx, token) for idx, token in enumerate(report['tokens'], 1)]
+        self.pages = [tokens_page(report, page) for page in range(page_count(report))]
+
+    def page(self, page):
+        return self.pages[min(max(page, 0), len(self.pages) - 1)]
+
+
+class ViewCache:
+    """Кеш представлень останнього звіту; новий звіт замінює їх атомарно"""
+
+    def __init__(self):
+        self._current = None
+        self._lock = threading.Lock()
+
+    def publish(self, report):
+        """Рендерить усе один раз (поза локом) і підміняє поточний набір"""
+        views = ReportViews(report)
+        with self._lock:
+            self._current = views
+        logger.info(f"🖼 Представлення скану #{views.scan_id} готові")
+        return views
+
+    def current(self):
+        return self._current
+
+    def get(self, scan_id):
+        """Представлення конкретного скану (None якщо вже замінене)"""
+        views = self._current
+        return views if views and views.scan_id == scan_id else None
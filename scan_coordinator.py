@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class ScanCoordinator:
+    """Одне сканування в польоті: всі хто просить скан отримують той самий Future"""
+
+    def __init__(self, scan_func, last_result=None, last_finished=None):
+        self.scan_func = scan_func
+        self._lock = threading.Lock()
+        self._job = None
+        self._last_result = last_result
+        self._last_finished = last_finished  # time.time() завершення
+
+    def submit(self):
+        """Повертає (future, started): started=False якщо приєднались до вже запущеного"""
+        with self._lock:
+            started = self._job is None
+            if started:
+                self._job = Future()
+                self._job.set_running_or_notify_cancel()
+            job = self._job
+
+        if started:
+            threading.Thread(target=self._run, args=(job,), daemon=True, name="scan-job").start()
+        else:
+            logger.info("🔗 Приєднуюсь до сканування, що вже йде")
+
+        return job, started
+
+    def run(self, timeout=None):
+        """Блокуючий варіант submit() — для фонового сканера"""
+        job, _ = self.submit()
+        return job.result(timeout)
+
+    def _run(self, job):
+        try:
+            result = self.scan_func()
+        except BaseException as e:
+            with self._lock:
+                self._job = None
+            job.set_exception(e)
+            return
+
+        with self._lock:
+            self._last_result = result
+            self._last_finished = time.time()
+            self._job = None
+
+        # Колбеки підписників виконуються тут, вже після зняття job
+        job.set_result(result)
+
+    def record(self, result, finished=None):
+        """Результат, отриманий повз submit() (звіт від scanner_worker) — теж вважається останнім"""
+        with self._lock:
+            self._last_result = result
+            self._last_finished = finished or time.time()
+
+    @property
+    def busy(self):
+        with self._lock:
+            return self._job is not None
+
+    def last_result_age(self):
+        """Скільки секунд тому завершився останній успішний скан (None — ще не було)"""
+        with self._lock:
+            if self._last_finished is None:
+                return None
+            return time.time() - self._last_finished
+
+    def fresh_result(self, max_age):
+        """Останній результат, якщо він не старший за max_age секунд"""
+        with self._lock:
+            if self._last_finished is None or time.time() - self._last_finished > max_age:
+                return None
+            return self._last_result
+
+
+class ScanProgress:
+    """Хід сканування в польоті для тих, хто на нього чекає
+
+    on_token — колбек конвеєра (готовий токен); не частіше interval секунд
+    кожен, хто чекає (watch), отримує notify(watcher, готово токенів).
+    """
+
+    def __init__(self, notify, interval=3.0):
+        self.notify = notify
+        self.interval = interval
+        self.analyzed = 0
+        self._watchers = []
+        self._notified_at = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Новий скан: лічильник з нуля, перше оновлення — через interval"""
+        with self._lock:
+            self.analyzed = 0
+            self._notified_at = time.monotonic()
+
+    def watch(self, watcher):
+        with self._lock:
+            self._watchers.append(watcher)
+
+    def unwatch(self, watcher):
+        with self._lock:
+            if watcher in self._watchers:
+                self._watchers.remove(watcher)
+
+    def on_token(self, token_data):
+        with self._lock:
+            self.analyzed += 1
+            now = time.monotonic()
+            if not self._watchers or now - self._notified_at < self.interval:
+                return
+            self._notified_at = now
+            watchers, analyzed = list(self._watchers), self.analyzed
+
+        for watcher in watchers:
+            try:
+                self.notify(watcher, analyzed)
+            except Exception as e:
+                logger.error(f"❌ Прогрес скану: {e}")
@@ -0,0 +1,291 @@
+"""Сканер окремим процесом: Chrome і парсинг не ділять процес (і GIL) з ботом
+
+Воркер сканує за власним SchedulePolicy і пише звіти в спільну історію (SQLite WAL);
+бот з SCANNER_MODE=worker лише читає готові звіти (ReportFeed). Воркерів може бути
+кілька, кожен під своїм супервізором (systemd тощо): одночасно сканує лише той,
+хто тримає оренду в історії, а звіти інших зсувають розклад решти.
+Налаштування — ті самі змінні оточення, що й у бота.
+
+Запуск:
+    python scanner_worker.py --name w1 [--once] [--metrics-port 9109]
+"""
+import argparse
+import asyncio
+import atexit
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from chromedriver_cache import ChromedriverCache
+from crawl import ShardPool
+from driver_pool import DriverPool
+from history_store import HistoryStore
+from http_fetcher import HttpFetcher
+from metrics import start_http_server
+from page_cache import PageCache
+from parse_pool import ParsePool
+from patterns import PatternEngine
+from scheduler import SchedulePolicy
+from token_cache import TokenCache
+
+logger = logging.getLogger(__name__)
+
+# Як часто воркер пише heartbeat; бот вважає воркер мертвим, якщо той мовчить утричі довше
+HEARTBEAT_SECONDS = 10
+
+
+def schedule_policy():
+    """Інтервал фонового сканування підлаштовується під темп нових токенів"""
+    return SchedulePolicy(
+        min_interval=int(os.getenv("SCAN_MIN_INTERVAL", "60")),
+        max_interval=int(os.getenv("SCAN_MAX_INTERVAL", "1800")),
+        base_interval=int(os.getenv("SCAN_BASE_INTERVAL", "600")),
+        target_new=int(os.getenv("SCAN_TARGET_NEW", "5")),
+    )
+
+
+class Scanner:
+    """Усе для сканування, зібране зі змінних оточення; живе між сканами
+
+    Однаково працює в потоці бота (SCANNER_MODE=thread) і в ScannerWorker.
+    """
+
+    def __init__(self):
+        # Правила паттернів; файл PATTERN_RULES_FILE перечитується при зміні.
+        # 'html' — паттерни по всьому HTML сторінки токена, 'visible' — лише по видимому тексту
+        self.pattern_engine = PatternEngine(os.getenv("PATTERN_RULES_FILE"))
+        self.pattern_scope = os.getenv("PATTERN_SCOPE", "html")
+
+        # Пул процесів — першим і лише один: fork безпечний, поки в процесі нема інших потоків,
+        # а ProcessPoolExecutor сам заводить потік (див. parse_pool.fork_pool).
+        # 🧩 CRAWL_WORKERS > 1 — процеси-шарди, що живуть між сканами (парсинг іде в них);
+        # ⚙️ інакше — процеси для парсингу сторінок токенів, CPU-робота не тримає GIL (PARSE_PROCESSES=0 — потоки)
+        shards = int(os.getenv("CRAWL_WORKERS", "1"))
+        processes = int(os.getenv("PARSE_PROCESSES", "2"))
+        self.shard_pool = ShardPool(shards) if shards > 1 else None
+        self.parse_pool = None
+        if self.shard_pool is None and processes > 0:
+            self.parse_pool = ParsePool(processes, self.pattern_engine, self.pattern_scope)
+
+        # Скільки сторінок токенів вантажимо одночасно
+        self.concurrency = int(os.getenv("SCAN_CONCURRENCY", "1"))
+
+        # 'full' — звичайний Chrome; 'lean' — headless без картинок/шрифтів/трекерів (більше браузерів на машину)
+        self.browser_profile = os.getenv("BROWSER_PROFILE", "full")
+
+        # ⏱ Дедлайн одного driver.get і бюджет усього скану (0 — без бюджету): після нього — частковий звіт
+        self.page_load_timeout = int(os.getenv("PAGE_LOAD_TIMEOUT", "30"))
+        self.scan_budget = int(os.getenv("SCAN_BUDGET_SECONDS", "300")) or None
+
+        # 🚗 Пропатчений chromedriver кешується на диску під версію Chrome (CHROME_VERSION_MAIN — закріпити явно)
+        cache_dir = os.getenv("CHROMEDRIVER_CACHE_DIR", "chromedriver_cache")
+        self.driver_cache = None
+        if cache_dir:
+            self.driver_cache = ChromedriverCache(cache_dir, int(os.getenv("CHROME_VERSION_MAIN", "0")))
+
+        # 🌐 Пул браузерів живе весь час роботи — холодний старт Chrome лише при ротації
+        self.driver_pool = DriverPool(
+            self.new_driver,
+            size=max(int(os.getenv("DRIVER_POOL_SIZE", "1")), self.concurrency),
+            max_uses=int(os.getenv("DRIVER_MAX_USES", "20")),
+            max_rss_mb=int(os.getenv("DRIVER_MAX_RSS_MB", "1500")),
+        )
+
+        # 'browser' — лише Selenium; 'http' — без браузера, Selenium тільки після Cloudflare
+        self.fetch_backend = os.getenv("FETCH_BACKEND", "browser")
+        self.http_fetcher = None
+        if self.fetch_backend == "http":
+            self.http_fetcher = HttpFetcher(pool_size=max(10, self.concurrency))
+
+        # Результати токенів між скануваннями — повторно аналізуємо лише нові/прострочені
+        self.token_cache = TokenCache()
+
+        # 🧭 Глибина обходу: токенів з лістингу / на аналіз, горизонт у хвилинах (0 — без), процесів-воркерів
+        self.crawl = {
+            'listing_limit': int(os.getenv("CRAWL_LISTING_LIMIT", "30")),
+            'analyze_limit': int(os.getenv("CRAWL_ANALYZE_LIMIT", "15")),
+            'horizon': int(os.getenv("CRAWL_HORIZON_MINUTES", "0")) * 60 or None,
+            'shards': shards,
+            'timeouts': {'scroll': int(os.getenv("CRAWL_SCROLL_SECONDS", "25")),
+                         'page_load': self.page_load_timeout},
+        }
+
+        # 🗄 Кеш сторінок: record — писати все, replay — сканувати лише з диска, cache — короткий TTL
+        mode = os.getenv("PAGE_CACHE_MODE", "off")
+        self.page_cache = None
+        if mode != "off":
+            self.page_cache = PageCache(os.getenv("PAGE_CACHE_DIR", "page_cache"), mode,
+                                        ttl=int(os.getenv("PAGE_CACHE_TTL", "60")))
+
+    def new_driver(self):
+        """Фабрика пулу: selenium/uc імпортуються при першому запуску браузера, а не на старті"""
+        from catapult_analyzer import create_driver
+        return create_driver(self.browser_profile, self.page_load_timeout, self.driver_cache)
+
+    def scan(self, on_token=None):
+        """Одне сканування; повертає звіт. on_token(token_data) — на кожен готовий токен"""
+        from catapult_analyzer import scan_catapult  # важкі імпорти — лише коли скан справді йде
+
+        return asyncio.run(scan_catapult(
+            self.driver_pool, self.concurrency, self.fetch_backend, self.http_fetcher, self.pattern_engine,
+            self.token_cache, on_token=on_token, page_cache=self.page_cache, browser_profile=self.browser_profile,
+            parse_pool=self.parse_pool, scan_budget=self.scan_budget, driver_cache=self.driver_cache,
+            shard_pool=self.shard_pool, pattern_scope=self.pattern_scope, **self.crawl))
+
+    def close(self):
+        self.driver_pool.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+        if self.shard_pool:
+            self.shard_pool.close()
+        if self.http_fetcher:
+            self.http_fetcher.close()
+
+
+class ScannerWorker:
+    """Цикл воркера: плановий скан, запити бота з історії, оренда, heartbeat"""
+
+    def __init__(self, name, scanner, history, policy, poll=2.0, lease_seconds=900):
+        self.name = name
+        self.scanner = scanner
+        self.history = history
+        self.policy = policy
+        self.poll = poll
+        self.lease_seconds = lease_seconds
+
+        self.status = 'idle'
+        self.last_scan_id = None
+        self.analyzed = 0  # токенів у поточному скані
+        self.next_run = time.time()  # перший скан — одразу, якщо в історії нема свіжого
+        # Початковий розклад задає лише останній звіт, а не вся історія
+        self.last_seen = max(0, (history.latest_scan_id() or 0) - 1)
+        self._stopped = threading.Event()
+
+    def follow(self):
+        """Звіти з історії (свої й чужі) рахуються в темпі нових токенів і зсувають розклад"""
+        for scan_id in self.history.scans_after(self.last_seen):
+            self.last_seen = scan_id
+            report = self.history.load_report(scan_id)
+            if report is None or scan_id == self.last_scan_id:
+                continue
+            finished = datetime.fromisoformat(report['timestamp']).timestamp()
+            self.policy.record(report, at=finished)
+            self.next_run = finished + self.policy.interval()
+
+    def scan_once(self):
+        """Скан під орендою; False якщо зараз сканує інший воркер"""
+        if not self.history.acquire_lease(self.name, self.lease_seconds):
+            return False
+
+        self.status = 'scanning'
+        self.analyzed = 0
+        self.beat()
+        try:
+            logger.info(f"🔄 [{self.name}] Сканую...")
+            report = self.scanner.scan(on_token=self.progress)
+            self.last_scan_id = self.history.save_report(report)
+            self.policy.record(report)
+            logger.info(f"✅ [{self.name}] Скан #{self.last_scan_id} у спільній історії")
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Помилка сканування: {e}")
+            self.policy.record_failure()
+            # Забрані запити бота чекають на відповідь — помилка в історії відповідає їм одразу
+            try:
+                self.history.record_scan_failure(self.name, e)
+            except Exception as store_error:
+                logger.error(f"❌ [{self.name}] Помилку скану не записано: {store_error}")
+        finally:
+            self.history.release_lease(self.name)
+            self.status = 'idle'
+
+        self.next_run = time.time() + self.policy.interval()
+        self.beat()
+        return True
+
+    def progress(self, token_data):
+        """Готовий токен — одразу в heartbeat: /stats бачить хід скану, а не лише старт і кінець"""
+        self.analyzed += 1
+        self.status = f"scanning (готово {self.analyzed})"
+        try:
+            self.beat()
+        except Exception as e:
+            logger.error(f"❌ Heartbeat: {e}")
+
+    def beat(self):
+        self.history.heartbeat(self.name, self.status, os.getpid(), self.next_run,
+                               self.last_scan_id, self.policy.failures)
+
+    def _beat_forever(self):
+        while not self._stopped.wait(HEARTBEAT_SECONDS):
+            try:
+                self.beat()
+            except Exception as e:
+                logger.error(f"❌ Heartbeat: {e}")
+
+    def run_forever(self):
+        logger.info(f"🛰 Воркер {self.name} запущений (pid {os.getpid()})")
+        self.beat()
+        threading.Thread(target=self._beat_forever, daemon=True, name="heartbeat").start()
+
+        while not self._stopped.is_set():
+            self.follow()
+            # Запити бота забираємо разом: один скан відповідає всім.
+            # Оренду тримає інший воркер — його звіт і буде відповіддю, розклад зсуне follow()
+            requested = self.history.claim_scan_requests()
+            if requested or time.time() >= self.next_run:
+                self.scan_once()
+            self._stopped.wait(self.poll)
+
+        self.status = 'stopped'
+        self.beat()
+        logger.info(f"🛑 Воркер {self.name} зупинено")
+
+    def stop(self):
+        """Поточний скан дороблюється (його обмежує SCAN_BUDGET_SECONDS), нових не буде"""
+        self._stopped.set()
+
+
+def main(argv=None):
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Фоновий сканер catapult.trade окремим процесом")
+    parser.add_argument('--name', default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="ім'я воркера в /stats (стабільне між перезапусками)")
+    parser.add_argument('--history', default=os.getenv("HISTORY_DB", "catapult_history.db"))
+    parser.add_argument('--once', action='store_true', help="один скан і вихід")
+    parser.add_argument('--poll', type=float, default=2.0, help="як часто перевіряти запити бота, с")
+    parser.add_argument('--lease', type=int, default=0,
+                        help="оренда скану, с (0 — подвійний SCAN_BUDGET_SECONDS або 900)")
+    parser.add_argument('--metrics-port', type=int, default=0, help="/metrics цього воркера (0 — вимкнено)")
+    args = parser.parse_args(argv)
+
+    # Сканер (з пулами процесів) — до будь-яких потоків, зокрема сервера /metrics
+    scanner = Scanner()
+    atexit.register(scanner.close)
+    history = HistoryStore(args.history)
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+
+    lease = args.lease or (scanner.scan_budget or 450) * 2
+    worker = ScannerWorker(args.name, scanner, history, schedule_policy(), poll=args.poll, lease_seconds=lease)
+
+    if args.once:
+        return 0 if worker.scan_once() else 1
+
+    # SIGTERM/SIGINT від супервізора → дороблюємо скан і виходимо
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: worker.stop())
+    worker.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulePolicy:
+    """Коли сканувати наступного разу
+
+    Інтервал підлаштовується під темп появи нових token_id (EWMA, токенів/хв):
+    чекаємо приблизно стільки, щоб між сканами з'являлось target_new нових токенів.
+    Тихо (нових токенів нема чи лістинг порожній) — інтервал росте в 1.5 раза
+    до max_interval. Помилки (сторінку не завантажено) — експоненційний backoff
+    з джитером, не частіше за min_interval.
+    """
+
+    def __init__(self, min_interval=60, max_interval=1800, base_interval=600, target_new=5,
+                 backoff_base=30, backoff_max=1800, smoothing=0.5, seen_ttl=86400):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.base_interval = base_interval
+        self.target_new = target_new
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.smoothing = smoothing
+        self.seen_ttl = seen_ttl
+
+        self.rate = None  # нових токенів за хвилину
+        self.failures = 0
+        self.last_new = 0
+        self._interval = base_interval
+        self._seen = {}  # token_id -> коли бачили востаннє
+        self._last_at = None
+        self._lock = threading.Lock()
+
+    def record(self, report, at=None):
+        """Скан завершився: скільки нових token_id і за який час
+
+        Рахуються всі token_id лістингу (report['listed']); tokens — лише токени
+        з паттернами, тож порожній tokens означає тихий скан, а не помилку.
+        """
+        at = at or time.time()
+        if report.get('failed'):
+            return self.record_failure()
+
+        with self._lock:
+            ids = report.get('listed')
+            if ids is None:  # звіт без listed (старіший формат) — хоча б токени з паттернами
+                ids = [token['token_id'] for token in report['tokens']]
+            first = not self._seen
+            new = [token_id for token_id in ids if token_id not in self._seen]
+            for token_id in ids:
+                self._seen[token_id] = at
+            self._seen = {k: ts for k, ts in self._seen.items() if at - ts < self.seen_ttl}
+
+            if not first and self._last_at is not None:
+                minutes = max(at - self._last_at, 1) / 60
+                rate = len(new) / minutes
+                self.rate = rate if self.rate is None else self.smoothing * rate + (1 - self.smoothing) * self.rate
+
+            self._last_at = at
+            self.failures = 0
+            self.last_new = 0 if first else len(new)
+            self._interval = self._adapt()
+
+        return self._interval
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            return self.interval()
+
+    def _adapt(self):
+        if self.rate is None:
+            return self.base_interval
+        if self.last_new == 0:
+            return min(self.max_interval, self._interval * 1.5)
+        wanted = self.target_new / self.rate * 60
+        return min(self.max_interval, max(self.min_interval, wanted))
+
+    def interval(self):
+        """Секунд до наступного скану"""
+        if self.failures:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+            return max(self.min_interval, random.uniform(delay / 2, delay))
+        return self._interval
+
+
+class ScanScheduler:
+    """Фоновий сканер на SchedulePolicy замість фіксованих 10 хвилин
+
+    Пропускає скани, коли нікому показувати (нема підписників і давно не було
+    користувачів). request_run() — позачерговий скан (напр. /scan): повертає
+    Future координатора і переносить наступний плановий скан від його завершення.
+    """
+
+    def __init__(self, coordinator, policy, has_subscribers=None, idle_after=3600):
+        self.coordinator = coordinator
+        self.policy = policy
+        self.has_subscribers = has_subscribers or (lambda: False)
+        self.idle_after = idle_after
+
+        self.last_activity = time.time()  # старт бота — теж активність: перший скан не пропускається
+        self.next_run = time.time()  # перший скан — одразу
+        self.skipped = 0
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def touch(self):
+        """Користувач щось запитав — вважаємо бот активним"""
+        self.last_activity = time.time()
+
+    def active(self):
+        return self.has_subscribers() or time.time() - self.last_activity < self.idle_after
+
+    def request_run(self):
+        """Скан зараз (або підписка на той, що вже йде); повертає (Future, started)"""
+        self.touch()
+        job, started = self.coordinator.submit()
+        job.add_done_callback(lambda _: self._reschedule())
+        return job, started
+
+    def _reschedule(self):
+        self.next_run = time.time() + self.policy.interval()
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def run_forever(self):
+        while not self._stopped:
+            delay = self.next_run - time.time()
+            if delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+
+            if not self.active():
+                self.skipped += 1
+                logger.info("💤 Нема підписників і користувачів — скан пропущено")
+                self.next_run = time.time() + self.policy.base_interval
+                continue
+
+            try:
+                logger.info("🔄 Запускаю сканування...")
+                self.coordinator.run()
+                logger.info("✅ Сканування завершено")
+            except Exception as e:
+                logger.error(f"❌ Помилка сканування: {e}")
+
+            self.next_run = time.time() + self.policy.interval()
+            logger.info(f"⏱ Наступний скан через {self.next_run - time.time():.0f} с")
+
+    def status(self):
+        rate = self.policy.rate
+        return {
+            'next_in': max(0, self.next_run - time.time()),
+            'rate': rate,
+            'failures': self.policy.failures,
+            'skipped': self.skipped,
+            'active': self.active(),
+        }
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ознака → ключ у token_data['values'] (числа, які витягують правила паттернів, + вік)
+FEATURES = {'pump': 'PUMP', 'price': 'PRICE', 'holders': 'HOLDERS', 'mcap': 'MCAP', 'age': 'AGE'}
+
+# Важкі хвости рахуємо в лог-шкалі, інакше один кит задає весь z-score
+LOG_FEATURES = ('price', 'holders', 'mcap', 'age')
+
+# Композитний бал = Σ вага · z (відсутнє значення = 0, тобто «як у середньому»)
+WEIGHTS = {'pump': 1.0, 'holders': 0.8, 'mcap': 0.5, 'price': 0.2, 'age': -0.6}
+Z_CLIP = 3.0
+RUG_PENALTY = 2.0
+
+
+class FeatureTable:
+    """Колонки ознак: token_ids + {ознака: float64[n]} (NaN — значення нема)"""
+
+    def __init__(self, token_ids, columns, rug):
+        self.token_ids = token_ids
+        self.columns = columns
+        self.rug = rug
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        n = len(tokens)
+        columns = {name: np.full(n, np.nan) for name in FEATURES}
+        rug = np.zeros(n, dtype=bool)
+
+        for i, token in enumerate(tokens):
+            values = token.get('values', {})
+            for name, key in FEATURES.items():
+                value = values.get(key)
+                if value is not None:
+                    columns[name][i] = value
+            rug[i] = any('RUG' in pattern for pattern in token.get('patterns', []))
+
+        return cls([token['token_id'] for token in tokens], columns, rug)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """З історії: [(token_id, ключ значення, value)]"""
+        index = {}
+        for token_id, _, _ in rows:
+            index.setdefault(token_id, len(index))
+
+        columns = {name: np.full(len(index), np.nan) for name in FEATURES}
+        by_key = {key: name for name, key in FEATURES.items()}
+        for token_id, key, value in rows:
+            name = by_key.get(key)
+            if name is not None:
+                columns[name][index[token_id]] = value
+
+        return cls(list(index), columns, np.zeros(len(index), dtype=bool))
+
+    def __len__(self):
+        return len(self.token_ids)
+
+    def concat(self, other):
+        return FeatureTable(
+            self.token_ids + other.token_ids,
+            {name: np.concatenate([self.columns[name], other.columns[name]]) for name in FEATURES},
+            np.concatenate([self.rug, other.rug]),
+        )
+
+    def transformed(self, name):
+        column = self.columns[name]
+        return np.log1p(np.clip(column, 0, None)) if name in LOG_FEATURES else column
+
+
+def zscores(values, reference):
+    """z відносно розподілу reference (NaN лишається NaN)"""
+    valid = reference[~np.isnan(reference)]
+    # Однакові значення: std з похибкою округлення (~1e-16) дав би z = ±1 замість 0
+    if valid.size < 2 or valid.min() == valid.max():
+        return np.where(np.isnan(values), np.nan, 0.0)
+    return (values - valid.mean()) / valid.std()
+
+
+def percentiles(values, reference):
+    """Частка reference ≤ значення, 0–100 (NaN для відсутніх)"""
+    ordered = np.sort(reference[~np.isnan(reference)])
+    if not ordered.size:
+        return np.full(values.shape, np.nan)
+    result = np.searchsorted(ordered, values, side='right') / ordered.size * 100
+    return np.where(np.isnan(values), np.nan, result)
+
+
+def score(table):
+    """Композитний бал кожного рядка + z-score кожної ознаки відносно всієї таблиці"""
+    total = np.zeros(len(table))
+    z = {}
+    for name in FEATURES:
+        column = table.transformed(name)
+        z[name] = zscores(column, column)
+        total += WEIGHTS[name] * np.nan_to_num(np.clip(z[name], -Z_CLIP, Z_CLIP))
+    total -= RUG_PENALTY * table.rug
+    return total, z
+
+
+def top_indices(scores, limit):
+    """Індекси limit найкращих за спаданням (argpartition — без повного сортування)"""
+    limit = min(limit, scores.size)
+    if limit <= 0:
+        return np.array([], dtype=int)
+    part = np.argpartition(-scores, limit - 1)[:limit]
+    return part[np.argsort(-scores[part], kind='stable')]
+
+
+class TokenScorer:
+    """Рейтинг токенів скану відносно самого скану й історії за history_days
+
+    Поточний скан і історія зливаються в одну таблицю й рахуються одним
+    проходом: z-score ознак і бал — відносно всіх разом, перцентилі балу —
+    окремо серед скану і серед історії. Результат кешується по scan_id.
+    """
+
+    def __init__(self, history, history_days=7, refresh=300):
+        self.history = history
+        self.history_days = history_days
+        self.refresh = refresh
+
+        self._reference = None
+        self._reference_at = 0.0
+        self._ranked = (None, None)  # (scan_id, рейтинг)
+        self._lock = threading.Lock()
+
+    def reference(self):
+        """Історичні ознаки (останнє значення на токен), оновлюються не частіше refresh"""
+        if self._reference is None or time.time() - self._reference_at > self.refresh:
+            since = (datetime.now() - timedelta(days=self.history_days)).isoformat()
+            self._reference = FeatureTable.from_rows(self.history.latest_values(since))
+            self._reference_at = time.time()
+        return self._reference
+
+    def rank(self, report):
+        """[{'token', 'score', 'scan_pct', 'history_pct', 'z'}] від найкращого"""
+        scan_id = report.get('scan_id')
+        with self._lock:
+            if scan_id is not None and self._ranked[0] == scan_id:
+                return self._ranked[1]
+
+            started = time.perf_counter()
+            tokens = report['tokens']
+            current = FeatureTable.from_tokens(tokens)
+
+            # Токени поточного скану вже є в історії — не рахуємо їх двічі
+            reference = self.reference()
+            ids = set(current.token_ids)
+            keep = np.array([token_id not in ids for token_id in reference.token_ids], dtype=bool)
+            history = FeatureTable(
+                [t for t, k in zip(reference.token_ids, keep) if k],
+                {name: column[keep] for name, column in reference.columns.items()},
+                reference.rug[keep],
+            )
+
+            scores, z = score(current.concat(history))
+            n = len(current)
+            scan_scores, history_scores = scores[:n], scores[n:]
+            scan_pct = percentiles(scan_scores, scan_scores)
+            history_pct = percentiles(scan_scores, history_scores) if history_scores.size else scan_pct
+
+            ranking = [{
+                'token': tokens[i],
+                'score': float(scan_scores[i]),
+                'scan_pct': float(scan_pct[i]),
+                'history_pct': float(history_pct[i]),
+                'z': {name: float(z[name][i]) for name in FEATURES},
+            } for i in top_indices(scan_scores, n)]
+
+            self._ranked = (scan_id, ranking)
+            logger.info(f"🏆 Рейтинг: {n} токенів проти {len(history)} з історії "
+                        f"за {(time.perf_counter() - started) * 1000:.1f} мс")
+            return ranking
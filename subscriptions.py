@@ -0,0 +1,255 @@
+import logging
+import operator
+import re
+import threading
+
+from patterns import DEFAULT_RULES, rule_regex
+from report_views import delta_messages
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(>=|<=|==|!=|>|<)|(\d+(?:\.\d+)?)|([A-Za-z_][A-Za-z0-9_]*))')
+COMPARE = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+           '==': operator.eq, '!=': operator.ne}
+KEYWORDS = ('AND', 'OR', 'NOT')
+EXTRA_VALUES = ('AGE',)  # числа, які аналізатор додає поза правилами
+
+
+class FilterError(ValueError):
+    """Вираз підписки не розібрано"""
+
+
+def label_name(label):
+    """'🚀MEGA_PUMP' → 'MEGA_PUMP' — у виразах емодзі не пишемо"""
+    return re.sub(r'^\W+', '', str(label)).upper()
+
+
+def filter_names(rules):
+    """Що розуміє фільтр: (мітки без емодзі, правила з числовим значенням)"""
+    labels = set()
+    values = set(EXTRA_VALUES)
+    for rule in rules:
+        for band in rule.get('bands') or [rule]:
+            labels.add(label_name(band.get('label', rule['name'])))
+        if rule.get('value') or re.compile(rule_regex(rule)).groups:
+            values.add(rule['name'].upper())
+    return labels, values
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise FilterError(f"Незрозуміло: «{text[pos:pos + 10]}»")
+        lparen, rparen, op, number, name = match.groups()
+        if lparen:
+            tokens.append(('(', None))
+        elif rparen:
+            tokens.append((')', None))
+        elif op:
+            tokens.append(('op', op))
+        elif number:
+            tokens.append(('num', float(number)))
+        elif name.upper() in KEYWORDS:
+            tokens.append((name.upper(), None))
+        else:
+            tokens.append(('name', name.upper()))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """expr := and (OR and)* ; and := not (AND not)* ; not := NOT not | atom
+    atom := ( expr ) | NAME [op NUMBER]
+
+    names — (мітки, правила зі значенням) з filter_names: інші імена — FilterError.
+    """
+
+    def __init__(self, tokens, names=None):
+        self.tokens = tokens
+        self.pos = 0
+        self.names = names
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self, kind):
+        if self.peek() != kind:
+            raise FilterError(f"Очікувалось {kind}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token[1]
+
+    def parse(self):
+        node = self.expr()
+        if self.peek() is not None:
+            raise FilterError("Зайве в кінці виразу")
+        return node
+
+    def expr(self):
+        parts = [self.conj()]
+        while self.peek() == 'OR':
+            self.take('OR')
+            parts.append(self.conj())
+        return parts[0] if len(parts) == 1 else (lambda t, parts=parts: any(p(t) for p in parts))
+
+    def conj(self):
+        parts = [self.neg()]
+        while self.peek() == 'AND':
+            self.take('AND')
+            parts.append(self.neg())
+        return parts[0] if len(parts) == 1 else (lambda t, parts=parts: all(p(t) for p in parts))
+
+    def neg(self):
+        if self.peek() == 'NOT':
+            self.take('NOT')
+            inner = self.neg()
+            return lambda t: not inner(t)
+        return self.atom()
+
+    def atom(self):
+        if self.peek() == '(':
+            self.take('(')
+            node = self.expr()
+            self.take(')')
+            return node
+
+        name = self.take('name')
+        if self.peek() == 'op':
+            if self.names and name not in self.names[1]:
+                raise FilterError(f"«{name}» не має числового значення")
+            compare = COMPARE[self.take('op')]
+            number = self.take('num')
+
+            def check(token):
+                value = token['values'].get(name)
+                return value is not None and compare(value, number)
+            return check
+
+        if self.names and name not in self.names[0]:
+            raise FilterError(f"Невідомий паттерн «{name}»")
+        return lambda token: name in token['labels']
+
+
+def compile_filter(expression, rules=None):
+    """'MEGA_PUMP and not RUG', 'HOLDERS >= 500 or PUMP > 30', '*' — усе
+
+    rules — правила паттернів: імена, яких у них нема, дають FilterError
+    (None — імена не перевіряються).
+    """
+    expression = expression.strip()
+    if expression in ('*', 'ALL', 'all'):
+        return lambda token: True
+    if not expression:
+        raise FilterError("Порожній вираз")
+    names = filter_names(rules) if rules is not None else None
+    return _Parser(_tokenize(expression), names).parse()
+
+
+def _facts(token_data):
+    """Те, по чому працюють фільтри: імена паттернів без емодзі + числа правил"""
+    return {
+        'labels': {label_name(p) for p in token_data.get('patterns', [])},
+        'values': {str(k).upper(): v for k, v in token_data.get('values', {}).items()},
+    }
+
+
+def diff_reports(previous, current):
+    """Зміни між двома сканами: [(token_data, попередній token_data або None, нові паттерни)]
+
+    Нові токени і токени з паттернами, яких не було в попередньому скані.
+    """
+    before = {t['token_id']: t for t in previous['tokens']}
+    changes = []
+
+    for token in current['tokens']:
+        old = before.get(token['token_id'])
+        if old is None:
+            changes.append((token, None, list(token['patterns'])))
+            continue
+        fresh = [p for p in token['patterns'] if p not in old['patterns']]
+        if fresh:
+            changes.append((token, old, fresh))
+
+    return changes
+
+
+class Subscriptions:
+    """Підписки чатів з фільтрами; після кожного скану розсилає лише зміни, що підходять
+
+    Диф рахується один раз на скан, фільтр — один раз на однаковий вираз,
+    відправка — через OutboundQueue пачками по кілька токенів.
+    """
+
+    def __init__(self, history, outbound, rules=None):
+        self.history = history
+        self.outbound = outbound
+        self.rules = rules or DEFAULT_RULES  # для перевірки імен у виразах
+        self._filters = {}  # вираз -> скомпільований фільтр
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    def _compiled(self, expression):
+        if expression not in self._filters:
+            self._filters[expression] = compile_filter(expression, self.rules)
+        return self._filters[expression]
+
+    def subscribe(self, chat_id, expression):
+        """FilterError якщо вираз невалідний"""
+        expression = ' '.join(expression.split())
+        self._compiled(expression)
+        self.history.save_subscription(chat_id, expression)
+        logger.info(f"🔔 Підписка {chat_id}: {expression}")
+
+    def unsubscribe(self, chat_id):
+        return self.history.delete_subscription(chat_id)
+
+    def get(self, chat_id):
+        return self.history.subscriptions().get(chat_id)
+
+    def seed(self, report):
+        """Базовий звіт для першого дифу (напр. останній з історії)"""
+        with self._lock:
+            self._baseline = report if report and report['tokens'] else self._baseline
+
+    def publish(self, report):
+        """Диф з попереднім непорожнім звітом → повідомлення підписникам; повертає к-сть"""
+        with self._lock:
+            # Порожній (невдалий) скан не стає базою — інакше наступний «знайде» все заново
+            if not report['tokens']:
+                return 0
+            previous, self._baseline = self._baseline, report
+        if previous is None:
+            return 0
+
+        changes = diff_reports(previous, report)
+        if not changes:
+            return 0
+
+        by_expression = {}
+        for chat_id, expression in self.history.subscriptions().items():
+            by_expression.setdefault(expression, []).append(chat_id)
+
+        sent = 0
+        for expression, chats in by_expression.items():
+            try:
+                matches = self._compiled(expression)
+            except FilterError:
+                continue
+
+            # Кожна зміна (новий токен або нові паттерни) токена, який зараз підходить
+            hits = [(token, old is None, fresh) for token, old, fresh in changes if matches(_facts(token))]
+            if not hits:
+                continue
+
+            messages = delta_messages(hits, expression)
+            for chat_id in chats:
+                for text in messages:
+                    self.outbound.send_message(chat_id, text, parse_mode='HTML', disable_web_page_preview=True)
+                    sent += 1
+
+        logger.info(f"🔔 Змін: {len(changes)}, повідомлень підписникам: {sent}")
+        return sent
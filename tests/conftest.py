@@ -0,0 +1,48 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tests.helpers import fixture_html
+
+# Стенд замість catapult.trade: адреса → (записана сторінка, HTTP-код)
+ROUTES = {
+    '/turbo/home': ('listing_next_data.html', 200),
+    '/app/home': ('listing_next_f.html', 200),
+    '/turbo/tokens/48213': ('token_48213.html', 200),
+    '/turbo/tokens/77777': ('challenge.html', 503),
+}
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    hits = None
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        self.hits.append(path)
+        if path not in ROUTES:
+            self.send_error(404)
+            return
+        name, status = ROUTES[path]
+        body = fixture_html(name).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    """Локальний HTTP-сервер із записаними сторінками; .hits — запитані шляхи"""
+    handler = type('Handler', (_SiteHandler,), {'hits': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.hits = handler.hits
+    yield server
+    server.shutdown()
+    server.server_close()
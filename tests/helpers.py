@@ -0,0 +1,8 @@
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+def fixture_html(name):
+    """Записана сторінка з tests/fixtures"""
+    return (FIXTURES / name).read_text(encoding='utf-8')
@@ -0,0 +1,61 @@
+import importlib
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+from catapult_analyzer import empty_report
+
+
+@pytest.fixture
+def bot_module(tmp_path, monkeypatch):
+    """Модуль бота в режимі worker (без сканера і мережі) з власною історією"""
+    monkeypatch.setenv('SCANNER_MODE', 'worker')
+    monkeypatch.setenv('HISTORY_DB', str(tmp_path / 'history.db'))
+    monkeypatch.setenv('TELEGRAM_TOKEN', '1:test')
+    monkeypatch.delitem(sys.modules, 'catapult_public_bot', raising=False)
+    module = importlib.import_module('catapult_public_bot')
+    yield module
+    module.bot.worker_pool.close()
+    sys.modules.pop('catapult_public_bot', None)
+
+
+class FakeOutbound:
+    def __init__(self):
+        self.edits = []
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.edits.append((chat_id, message_id, text))
+
+
+def scan_report(scan_id, names):
+    report = empty_report()
+    report.update(scan_id=scan_id, total_tokens=len(names), total_patterns_found=len(names),
+                  top_patterns=[('🚀PUMP', len(names))],
+                  tokens=[{'token_id': str(i), 'name': name, 'url': f'/turbo/tokens/{i}', 'patterns': ['🚀PUMP']}
+                          for i, name in enumerate(names)])
+    return report
+
+
+def test_deliver_scan_renders_the_jobs_own_report(bot_module, monkeypatch):
+    outbound = FakeOutbound()
+    monkeypatch.setattr(bot_module, 'outbound', outbound)
+    bot_module.view_cache.publish(scan_report(8, ['A', 'B', 'C']))  # новіший звіт іншого скану
+
+    job = Future()
+    job.set_result(scan_report(7, ['A']))
+    bot_module.deliver_scan(job, 42, 100)
+
+    assert outbound.edits[0][:2] == (42, 100)
+    assert 'Токенів: <code>1</code>' in outbound.edits[0][2]
+
+
+def test_deliver_scan_without_views(bot_module, monkeypatch):
+    outbound = FakeOutbound()
+    monkeypatch.setattr(bot_module, 'outbound', outbound)
+    assert bot_module.view_cache.current() is None
+
+    job = Future()
+    job.set_result(scan_report(None, ['A', 'B']))
+    bot_module.deliver_scan(job, 42, 100)
+    assert 'Токенів: <code>2</code>' in outbound.edits[0][2]
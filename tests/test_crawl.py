@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import crawl
+from catapult_analyzer import CatapultAnalyzer
+from page_ready import Deadline
+
+
+def test_expired_budget_still_bounds_shards():
+    analyzer = CatapultAnalyzer(scan_budget=60)
+    analyzer.deadline = Deadline(0)
+    budget = analyzer.shard_options()['scan_budget']
+    assert 0 < budget < 0.01
+
+    child = CatapultAnalyzer(scan_budget=budget)
+    asyncio.run(child.analyze_stream([]))
+    assert child.deadline is not None
+    time.sleep(0.01)
+    assert child.out_of_time()
+
+
+class RefusingPool:
+    workers = 2
+
+    def submit(self, options, tokens):
+        raise AssertionError("шард запущено після бюджету")
+
+
+def test_expired_budget_skips_shards():
+    analyzer = CatapultAnalyzer(shards=2, scan_budget=60, shard_pool=RefusingPool())
+    analyzer.deadline = Deadline(0)
+    tokens = [{'token_id': str(i), 'url': f'/turbo/tokens/{i}'} for i in range(6)]
+    assert asyncio.run(crawl.analyze_sharded(analyzer, tokens)) == {}
+
+
+def test_zero_budget_means_unbounded():
+    assert CatapultAnalyzer(scan_budget=0).scan_budget is None
+
+
+def test_shard_pool_analyzes_over_http(site):
+    pool = crawl.ShardPool(2)
+    analyzer = CatapultAnalyzer(fetch_backend='http', base_url=site.base_url, shards=2, shard_pool=pool)
+    tokens = [{'token_id': i, 'url': f"{site.base_url}/turbo/tokens/{i}"} for i in ('48213', '404', '405')]
+    try:
+        results = asyncio.run(analyzer.analyze(tokens))
+    finally:
+        analyzer.close()
+        pool.close()
+    assert results['48213']['name'] == 'PEPEX'
+    assert '/turbo/tokens/48213' in site.hits
+
+
+def test_shard_keeps_its_driver_pool_between_batches(monkeypatch, site):
+    monkeypatch.setattr(crawl, '_driver_pool', None)
+    analyzer = CatapultAnalyzer(fetch_backend='http', base_url=site.base_url)
+    options = analyzer.shard_options()
+    analyzer.close()
+    tokens = [{'token_id': '48213', 'url': f"{site.base_url}/turbo/tokens/48213"}]
+
+    first, _ = crawl.analyze_shard(options, tokens)
+    pool = crawl._driver_pool
+    second, _ = crawl.analyze_shard(options, tokens)
+
+    assert pool is not None and crawl._driver_pool is pool
+    assert not pool._closed
+    assert [t['name'] for t in first + second] == ['PEPEX', 'PEPEX']
+    pool.close()
+
+
+class BreakingPool:
+    """Перший шард — готовий результат, решта — процес загинув разом із пулом"""
+    workers = 2
+
+    def __init__(self):
+        self.calls = 0
+
+    def submit(self, options, tokens):
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+
+        self.calls += 1
+        future = Future()
+        if self.calls == 1:
+            future.set_result(([], {}))
+        else:
+            future.set_exception(BrokenProcessPool("процес шарду вбито"))
+        return future
+
+
+def test_broken_pool_mid_scan_reanalyzes_lost_shard(site):
+    analyzer = CatapultAnalyzer(fetch_backend='http', base_url=site.base_url, shards=2, shard_pool=BreakingPool())
+    tokens = [{'token_id': i, 'url': f"{site.base_url}/turbo/tokens/{i}"} for i in ('404', '48213', '405')]
+    try:
+        results = asyncio.run(crawl.analyze_sharded(analyzer, tokens))
+    finally:
+        analyzer.close()
+    # Шард 2 (48213) загинув — його токен проаналізовано в цьому процесі
+    assert results['48213']['name'] == 'PEPEX'
+    assert '404' not in results
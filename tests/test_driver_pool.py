@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from driver_pool import DriverPool
+
+
+class StubDriver:
+    """Замість Chrome: dead — сесія впала, hang — зависла на execute_script"""
+
+    def __init__(self, number):
+        self.number = number
+        self.dead = False
+        self.hang = None
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.hang is not None:
+            self.hang.wait(5)
+        if self.dead:
+            raise RuntimeError('invalid session id')
+        return 'complete'
+
+    def quit(self):
+        self.quit_called = True
+
+
+class StubFactory:
+    def __init__(self, fail=0):
+        self.drivers = []
+        self.fail = fail
+
+    def __call__(self):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError('chrome not reachable')
+        driver = StubDriver(len(self.drivers) + 1)
+        self.drivers.append(driver)
+        return driver
+
+
+@pytest.fixture
+def factory():
+    return StubFactory()
+
+
+def test_warm_driver_is_reused(factory):
+    pool = DriverPool(factory, size=1, max_uses=10)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+
+    assert first is second
+    assert len(factory.drivers) == 1
+    assert pool.stats() == {'total': 1, 'idle': 1, 'size': 1}
+
+
+def test_recycled_after_max_uses(factory):
+    pool = DriverPool(factory, size=1, max_uses=2)
+    used = []
+    for _ in range(5):
+        with pool.driver() as driver:
+            used.append(driver.number)
+
+    assert used == [1, 1, 2, 2, 3]
+    assert factory.drivers[0].quit_called and factory.drivers[1].quit_called
+    assert not factory.drivers[2].quit_called
+
+
+def test_dead_session_is_replaced(factory):
+    pool = DriverPool(factory, size=1)
+    with pool.driver():
+        pass
+    factory.drivers[0].dead = True
+
+    with pool.driver() as driver:
+        assert driver.number == 2
+    assert factory.drivers[0].quit_called
+    assert pool.stats()['total'] == 1
+
+
+def test_hung_session_fails_health_probe(factory):
+    pool = DriverPool(factory, size=1, health_timeout=0.1)
+    with pool.driver():
+        pass
+    hang = factory.drivers[0].hang = threading.Event()
+
+    try:
+        with pool.driver() as driver:
+            assert driver.number == 2
+    finally:
+        hang.set()
+    assert factory.drivers[0].quit_called
+
+
+def test_broken_driver_is_not_returned(factory):
+    pool = DriverPool(factory, size=1)
+    with pytest.raises(ValueError):
+        with pool.driver():
+            raise ValueError('page crashed')
+
+    with pool.driver() as driver:
+        assert driver.number == 2
+    assert factory.drivers[0].quit_called
+
+
+def test_failed_start_frees_the_slot():
+    factory = StubFactory(fail=1)
+    pool = DriverPool(factory, size=1)
+
+    with pool.driver() as driver:
+        assert driver is None
+    assert pool.stats()['total'] == 0
+    with pool.driver() as driver:
+        assert driver.number == 1
+
+
+def test_acquire_times_out_when_pool_is_busy(factory):
+    pool = DriverPool(factory, size=1)
+    entry = pool.acquire()
+    assert pool.acquire(timeout=0.05) is None
+    pool.release(entry)
+    assert pool.acquire(timeout=0.05) is entry
+
+
+def test_close_quits_idle_and_returned_drivers(factory):
+    pool = DriverPool(factory, size=2)
+    busy = pool.acquire()
+    with pool.driver():
+        pass
+
+    pool.close()
+    assert factory.drivers[1].quit_called
+    assert not factory.drivers[0].quit_called
+    pool.release(busy)
+    assert factory.drivers[0].quit_called
+    assert pool.acquire() is None
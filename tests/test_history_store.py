@@ -0,0 +1,109 @@
+import pytest
+
+from history_store import HistoryStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'history.db')
+
+
+@pytest.fixture
+def history(path):
+    store = HistoryStore(path)
+    yield store
+    store.close()
+
+
+def make_report(timestamp='2026-10-18T10:00:00'):
+    return {
+        'timestamp': timestamp,
+        'total_tokens': 2,
+        'total_patterns_found': 3,
+        'top_patterns': [('🚀PUMP', 2), ('🔒LOCK', 1)],
+        'tokens': [
+            {'url': 'https://catapult.trade/turbo/tokens/2', 'token_id': '2', 'name': 'BETA',
+             'patterns': ['🚀PUMP', '🔒LOCK'], 'values': {'PUMP': 35.0, 'AGE': 120.0}},
+            {'url': 'https://catapult.trade/turbo/tokens/1', 'token_id': '1', 'name': 'ALPHA',
+             'patterns': ['🚀PUMP'], 'values': {}},
+        ],
+    }
+
+
+def test_report_round_trip(history):
+    report = make_report()
+    scan_id = history.save_report(report)
+
+    assert report['scan_id'] == scan_id
+    assert history.load_report(scan_id) == report
+    assert history.latest_report() == report
+    assert history.load_report(scan_id + 1) is None
+
+
+def test_scans_after_and_latest_values(history):
+    first = history.save_report(make_report('2026-10-18T10:00:00'))
+    later = make_report('2026-10-18T11:00:00')
+    later['tokens'][0]['values']['PUMP'] = 60.0
+    second = history.save_report(later)
+
+    assert history.latest_scan_id() == second
+    assert history.scans_after(first) == [second]
+    assert sorted(history.latest_values('2026-10-18T00:00:00')) == [('2', 'AGE', 120.0), ('2', 'PUMP', 60.0)]
+    assert history.latest_values('2026-10-19T00:00:00') == []
+
+
+def test_lease_is_exclusive_across_connections(path, history):
+    other = HistoryStore(path)  # як інший процес: своє з'єднання до того ж файлу
+    try:
+        assert history.acquire_lease('w1', 60)
+        assert not other.acquire_lease('w2', 60)
+        assert history.acquire_lease('w1', 60)  # продовження своєї оренди
+
+        other.release_lease('w2')  # чужу оренду не знімає
+        assert not other.acquire_lease('w2', 60)
+
+        history.release_lease('w1')
+        assert other.acquire_lease('w2', 60)
+    finally:
+        other.close()
+
+
+def test_expired_lease_can_be_taken(history):
+    assert history.acquire_lease('w1', -1)
+    assert history.acquire_lease('w2', 60)
+    assert not history.acquire_lease('w1', 60)
+
+
+def test_heartbeat_upserts_worker(history):
+    history.heartbeat('w2', 'idle', pid=2)
+    history.heartbeat('w1', 'scanning', pid=1, next_run=100.0, last_scan_id=None, failures=0)
+    history.heartbeat('w1', 'idle', pid=1, next_run=200.0, last_scan_id=5, failures=2)
+
+    workers = history.workers()
+    assert [w['name'] for w in workers] == ['w1', 'w2']
+    assert {k: workers[0][k] for k in ('pid', 'status', 'next_run', 'last_scan_id', 'failures')} == {
+        'pid': 1, 'status': 'idle', 'next_run': 200.0, 'last_scan_id': 5, 'failures': 2,
+    }
+    assert workers[0]['heartbeat'] > 0
+
+
+def test_claim_scan_requests_takes_all_at_once(path, history):
+    bot = HistoryStore(path)
+    try:
+        bot.request_scan()
+        bot.request_scan()
+        assert history.claim_scan_requests() == 2
+        assert history.claim_scan_requests() == 0
+        bot.request_scan()
+        assert history.claim_scan_requests() == 1
+    finally:
+        bot.close()
+
+
+def test_scan_failures_keep_only_recent(history):
+    assert history.latest_failure_id() is None
+    ids = [history.record_scan_failure('w1', RuntimeError(f"boom {i}"), keep=2) for i in range(3)]
+
+    assert history.latest_failure_id() == ids[-1]
+    assert [f['error'] for f in history.failures_after(0)] == ['boom 1', 'boom 2']
+    assert history.failures_after(ids[-1]) == []
@@ -0,0 +1,26 @@
+from html_parse import parse_listing
+
+BASE = 'https://catapult.trade'
+
+
+def test_listing_deduplicates_by_token_id():
+    html = """<main>
+        <a href="/turbo/tokens/48213"><img src="icon.png"></a>
+        <a href="/turbo/tokens/48213?ref=home">PEPEX</a>
+        <a href="/turbo/tokens/48213/">PEPEX again</a>
+        <a href="https://catapult.trade/turbo/tokens/48212">MOONCAT</a>
+        <a href="/turbo/tokens/48212?tab=trades">MOONCAT trades</a>
+        <a href="/turbo/home">Home</a>
+    </main>"""
+
+    tokens = parse_listing(html, BASE)
+
+    assert tokens == [
+        {'url': f'{BASE}/turbo/tokens/48213', 'name': 'PEPEX', 'token_id': '48213'},
+        {'url': f'{BASE}/turbo/tokens/48212', 'name': 'MOONCAT', 'token_id': '48212'},
+    ]
+
+
+def test_listing_name_falls_back_to_id():
+    tokens = parse_listing('<a href="/turbo/tokens/7"></a><a href="/turbo/tokens/7/"> </a>', BASE)
+    assert tokens == [{'url': f'{BASE}/turbo/tokens/7', 'name': 'Token 7', 'token_id': '7'}]
@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from catapult_analyzer import CatapultAnalyzer
+from http_fetcher import CloudflareChallenge, HttpFetcher, is_challenge, parse_time, tokens_from_json
+from tests.helpers import fixture_html
+
+
+def test_fetcher_returns_recorded_page(site):
+    fetcher = HttpFetcher()
+    try:
+        html = fetcher.get(f"{site.base_url}/turbo/tokens/48213")
+    finally:
+        fetcher.close()
+    assert '<h1>PEPEX</h1>' in html
+
+
+def test_fetcher_raises_on_challenge_and_http_errors(site):
+    fetcher = HttpFetcher()
+    try:
+        with pytest.raises(CloudflareChallenge):
+            fetcher.get(f"{site.base_url}/turbo/tokens/77777")
+        with pytest.raises(requests.HTTPError):
+            fetcher.get(f"{site.base_url}/turbo/tokens/404")
+    finally:
+        fetcher.close()
+
+
+@pytest.mark.parametrize('status, html, expected', [
+    (503, fixture_html('challenge.html'), True),
+    (200, '<title>Just a moment...</title>', True),
+    (200, fixture_html('token_48213.html'), False),
+    (403, '<p>Forbidden</p>', False),
+    (200, '<script src="https://cdnjs.cloudflare.com/x.js"></script>', False),
+])
+def test_is_challenge(status, html, expected):
+    assert is_challenge(status, html) is expected
+
+
+def test_tokens_from_next_data():
+    tokens = tokens_from_json(fixture_html('listing_next_data.html'), 'https://catapult.trade')
+    assert [t['token_id'] for t in tokens] == ['48213', '48212', '48211']
+    assert tokens[0]['name'] == 'PEPEX'
+    assert tokens[0]['url'] == 'https://catapult.trade/turbo/tokens/48213'
+    assert tokens[0]['deployed_at'] == datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc).timestamp()
+    assert tokens[1]['deployed_at'] == 1792310000.0
+    assert tokens[2]['deployed_at'] == 1792309000.0
+
+
+def test_tokens_from_next_f():
+    tokens = tokens_from_json(fixture_html('listing_next_f.html'), 'https://catapult.trade')
+    assert [(t['token_id'], t['name']) for t in tokens] == [('48310', 'RSC1'), ('48309', 'RSC2')]
+    assert 'deployed_at' in tokens[0]
+    assert 'deployed_at' not in tokens[1]
+
+
+def test_nested_non_token_objects_are_ignored():
+    tokens = tokens_from_json(fixture_html('listing_nested.html'), 'https://catapult.trade')
+    assert [(t['token_id'], t['name']) for t in tokens] == [('48213', 'PEPEX'), ('48212', 'MOONCAT')]
+
+
+def test_without_anchors_only_token_arrays_count():
+    html = fixture_html('listing_nested.html').split('<body>')[0]
+    ids = [t['token_id'] for t in tokens_from_json(html, 'https://catapult.trade')]
+    assert '56' not in ids and '901' not in ids and '902' not in ids
+    assert ids[:2] == ['48213', '48212']
+
+
+@pytest.mark.parametrize('value, expected', [
+    (1792310000, 1792310000.0),
+    (1792310000000, 1792310000.0),
+    ('1792310000', 1792310000.0),
+    ('2026-10-18T09:30:00Z', datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc).timestamp()),
+    ('yesterday', None),
+    (True, None),
+    (None, None),
+])
+def test_parse_time(value, expected):
+    assert parse_time(value) == expected
+
+
+@pytest.fixture
+def analyzer(site):
+    analyzer = CatapultAnalyzer(fetch_backend='http', base_url=site.base_url)
+    analyzer.browser_calls = []
+    analyzer.with_browser = lambda action, pool=None: analyzer.browser_calls.append(action)
+    yield analyzer
+    analyzer.close()
+
+
+def test_http_error_does_not_start_browser(analyzer, site):
+    assert analyzer.fetch_token_live(f"{site.base_url}/turbo/tokens/404") is None
+    assert analyzer.browser_calls == []
+    assert not analyzer.http_blocked
+
+
+def test_challenge_falls_back_to_browser(analyzer, site):
+    analyzer.fetch_token_live(f"{site.base_url}/turbo/tokens/77777")
+    assert analyzer.http_blocked
+    assert len(analyzer.browser_calls) == 1
+
+
+def test_listing_over_http(analyzer):
+    tokens = analyzer.extract_tokens(analyzer.load_listing_page(analyzer.listing_url))
+    assert [t['token_id'] for t in tokens] == ['48213', '48212', '48211']
+    assert analyzer.browser_calls == []
@@ -0,0 +1,19 @@
+import urllib.request
+
+from metrics import REGISTRY, start_http_server
+
+
+def test_metrics_served_and_busy_port_is_not_fatal():
+    counter = REGISTRY.counter("catapult_test_total", "Тестовий лічильник")
+    counter.inc(kind='x')
+
+    server = start_http_server(0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert 'catapult_test_total{kind="x"} 1' in response.read().decode('utf-8')
+
+        assert start_http_server(port) is None
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+from outbound import OutboundQueue
+
+
+def too_many_requests(retry_after):
+    return ApiTelegramException('sendMessage', None, {
+        'error_code': 429, 'description': 'Too Many Requests', 'parameters': {'retry_after': retry_after},
+    })
+
+
+class FakeBot:
+    """Записує (час, метод, chat_id, текст); failures[текст] — винятки для перших спроб"""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = failures or {}
+        self._lock = threading.Lock()
+
+    def _record(self, method, chat_id, text):
+        with self._lock:
+            self.calls.append((time.monotonic(), method, chat_id, text))
+            errors = self.failures.get(text)
+            if errors:
+                raise errors.pop(0)
+        return text
+
+    def send_message(self, chat_id, text, **kwargs):
+        return self._record('send_message', chat_id, text)
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        return self._record('edit_message_text', chat_id, f"{text}@{message_id}")
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(bot, **kwargs):
+        queue = OutboundQueue(bot, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+
+def sent(bot, chat_id=None):
+    return [text for _, _, chat, text in bot.calls if chat_id is None or chat == chat_id]
+
+
+def test_messages_of_a_chat_keep_order(make_queue):
+    bot = FakeBot()
+    queue = make_queue(bot, global_rate=1000, per_chat_interval=0.01)
+
+    futures = [queue.send_message(1, f"m{i}") for i in range(5)]
+    futures.append(queue.edit_message_text("final", 1, 42))
+
+    assert [f.result(5) for f in futures] == ['m0', 'm1', 'm2', 'm3', 'm4', 'final@42']
+    assert sent(bot) == ['m0', 'm1', 'm2', 'm3', 'm4', 'final@42']
+
+
+def test_per_chat_limit_does_not_hold_other_chats(make_queue):
+    bot = FakeBot()
+    queue = make_queue(bot, global_rate=1000, per_chat_interval=0.3)
+
+    futures = [queue.send_message(1, 'a1'), queue.send_message(1, 'a2'),
+               queue.send_message(2, 'b1'), queue.send_message(3, 'c1')]
+    for future in futures:
+        future.result(5)
+
+    assert sent(bot) == ['a1', 'b1', 'c1', 'a2']
+    times = {text: at for at, _, _, text in bot.calls}
+    assert times['a2'] - times['a1'] >= 0.29
+    assert times['c1'] - times['a1'] < 0.2
+
+
+def test_global_rate_spaces_all_chats(make_queue):
+    bot = FakeBot()
+    queue = make_queue(bot, global_rate=10, per_chat_interval=0)
+
+    for future in [queue.send_message(chat_id, f"m{chat_id}") for chat_id in range(4)]:
+        future.result(5)
+
+    times = [at for at, _, _, _ in bot.calls]
+    assert all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:]))
+
+
+def test_429_retries_after_retry_after_and_keeps_chat_order(make_queue):
+    bot = FakeBot({'a1': [too_many_requests(0.3)]})
+    queue = make_queue(bot, global_rate=1000, per_chat_interval=0.01)
+
+    first, second, other = queue.send_message(1, 'a1'), queue.send_message(1, 'a2'), queue.send_message(2, 'b1')
+
+    assert first.result(5) == 'a1'
+    assert second.result(5) == 'a2'
+    assert other.result(5) == 'b1'
+
+    # Інший чат не чекає; в чаті 1 повтор іде першим, а a2 — лише після нього
+    assert sent(bot) == ['a1', 'b1', 'a1', 'a2']
+    attempts = [at for at, _, _, text in bot.calls if text == 'a1']
+    assert attempts[1] - attempts[0] >= 0.29
+
+
+def test_429_gives_up_after_max_retries(make_queue):
+    bot = FakeBot({'a1': [too_many_requests(0.01) for _ in range(3)]})
+    queue = make_queue(bot, global_rate=1000, per_chat_interval=0.01, max_retries=2)
+
+    with pytest.raises(ApiTelegramException):
+        queue.send_message(1, 'a1').result(5)
+    assert sent(bot) == ['a1', 'a1', 'a1']
+
+
+def test_other_errors_are_not_retried(make_queue):
+    error = ApiTelegramException('sendMessage', None, {'error_code': 403, 'description': 'Forbidden'})
+    bot = FakeBot({'a1': [error]})
+    queue = make_queue(bot, global_rate=1000, per_chat_interval=0.01)
+
+    with pytest.raises(ApiTelegramException):
+        queue.send_message(1, 'a1').result(5)
+    assert queue.send_message(1, 'a2').result(5) == 'a2'
+    assert sent(bot) == ['a1', 'a2']
@@ -0,0 +1,135 @@
+import gzip
+import json
+import os
+import socket
+import time
+
+import pytest
+
+import page_cache
+from page_cache import PageCache
+from parse_pool import analyze_html
+from patterns import PatternEngine
+from tests.helpers import fixture_html
+
+PAGES = {
+    'https://catapult.trade/turbo/home': fixture_html('listing_next_data.html'),
+    'https://catapult.trade/turbo/tokens/48213': fixture_html('token_48213.html'),
+    # Та сама сторінка під іншою адресою — блоб має бути один
+    'https://catapult.trade/turbo/tokens/48213?ref=feed': fixture_html('token_48213.html'),
+}
+
+
+class FakeFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(url)
+        return self.pages[url]
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("мережа в replay")
+    monkeypatch.setattr(socket.socket, 'connect', refuse)
+
+
+def test_record_then_replay_offline(tmp_path, no_network):
+    engine = PatternEngine()
+    fetcher = FakeFetcher(PAGES)
+
+    recorder = PageCache(str(tmp_path), mode='record')
+    recorded = {url: recorder.fetch(url, lambda url=url: fetcher.get(url)) for url in PAGES}
+    assert fetcher.calls == list(PAGES)
+
+    # content-addressed: три адреси, два різні вмісти
+    blobs = [os.path.join(d, f) for d, _, files in os.walk(tmp_path / 'blobs') for f in files]
+    assert len(blobs) == 2
+    with open(tmp_path / 'index.jsonl', encoding='utf-8') as f:
+        index = [json.loads(line) for line in f]
+    assert len(index) == 3
+    assert index[1]['sha'] == index[2]['sha']
+
+    # gzip на диску, той самий текст після розпакування
+    with gzip.open(recorder._blob_path(index[1]['sha']), 'rt', encoding='utf-8') as f:
+        assert f.read() == PAGES['https://catapult.trade/turbo/tokens/48213']
+
+    def offline():
+        raise AssertionError("live() у режимі replay")
+
+    replay = PageCache(str(tmp_path), mode='replay')
+    for url, html in recorded.items():
+        replayed = replay.fetch(url, offline)
+        assert replayed == html
+        assert analyze_html(replayed, engine) == analyze_html(html, engine)
+        assert analyze_html(replayed, engine, visible=True) == analyze_html(html, engine, visible=True)
+
+    # Записане з проду відтворюється з будь-яким base_url; промах — None без мережі
+    assert replay.fetch('http://127.0.0.1:8000/turbo/tokens/48213', offline) == recorded[
+        'https://catapult.trade/turbo/tokens/48213']
+    assert replay.fetch('https://catapult.trade/turbo/tokens/1', offline) is None
+
+
+def index_lines(root):
+    with open(root / 'index.jsonl', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def blob_count(root):
+    return sum(len(files) for _, _, files in os.walk(root / 'blobs'))
+
+
+@pytest.fixture
+def no_grace(monkeypatch):
+    monkeypatch.setattr(page_cache, 'ORPHAN_GRACE_SECONDS', -1)
+
+
+def test_compact_keeps_latest_version_and_drops_superseded_blobs(tmp_path, no_grace):
+    cache = PageCache(str(tmp_path), mode='record')
+    for version in range(3):
+        cache.store('https://catapult.trade/turbo/tokens/1', f'<h1>v{version}</h1>')
+    cache.store('https://catapult.trade/turbo/tokens/2', '<h1>v0</h1>')  # той самий вміст — блоб спільний
+    assert blob_count(tmp_path) == 3
+
+    assert cache.compact() == (2, 1)  # v1; v0 ще потрібен адресі 2
+    assert [entry['key'] for entry in index_lines(tmp_path)] == ['/turbo/tokens/1', '/turbo/tokens/2']
+    assert blob_count(tmp_path) == 2
+    assert cache.get('https://catapult.trade/turbo/tokens/1') == '<h1>v2</h1>'
+    assert cache.get('https://catapult.trade/turbo/tokens/2') == '<h1>v0</h1>'
+
+
+def test_cache_mode_prunes_entries_older_than_ttl(tmp_path, no_grace, monkeypatch):
+    cache = PageCache(str(tmp_path), mode='cache', ttl=60)
+    now = time.time()
+    monkeypatch.setattr(page_cache.time, 'time', lambda: now - 120)
+    cache.store('https://catapult.trade/turbo/tokens/old', '<h1>old</h1>')
+    monkeypatch.setattr(page_cache.time, 'time', lambda: now)
+    cache.store('https://catapult.trade/turbo/tokens/new', '<h1>new</h1>')
+
+    assert cache.compact() == (1, 1)
+    assert cache.entries() == [('/turbo/tokens/new', now, cache.entries()[0][2])]
+    assert PageCache(str(tmp_path), mode='cache', ttl=60).get('https://catapult.trade/turbo/tokens/old') is None
+
+
+def test_index_is_compacted_automatically(tmp_path, no_grace, monkeypatch):
+    monkeypatch.setattr(page_cache, 'COMPACT_MIN_LINES', 5)
+    cache = PageCache(str(tmp_path), mode='cache', ttl=60)
+    for version in range(50):
+        cache.store('https://catapult.trade/turbo/home', f'<p>{version}</p>')
+
+    assert len(index_lines(tmp_path)) <= 5
+    assert blob_count(tmp_path) <= 5
+    assert cache.get('https://catapult.trade/turbo/home') == '<p>49</p>'
+
+
+def test_replay_never_rewrites_the_corpus(tmp_path, no_grace):
+    recorder = PageCache(str(tmp_path), mode='record')
+    recorder.store('https://catapult.trade/turbo/home', '<p>1</p>')
+    recorder.store('https://catapult.trade/turbo/home', '<p>2</p>')
+
+    PageCache(str(tmp_path), mode='replay').compact()
+    assert len(index_lines(tmp_path)) == 2
+    assert blob_count(tmp_path) == 2
@@ -0,0 +1,16 @@
+import pytest
+
+from parse_pool import ParsePool, analyze_html
+from patterns import PatternEngine
+from tests.helpers import fixture_html
+
+
+@pytest.mark.parametrize('scope', ['html', 'visible'])
+def test_pool_matches_in_process_parse(scope):
+    engine = PatternEngine()
+    html = fixture_html('token_48213.html')
+    pool = ParsePool(1, engine, scope)
+    try:
+        assert pool.submit(html).result(timeout=30) == analyze_html(html, engine, scope == 'visible')
+    finally:
+        pool.close()
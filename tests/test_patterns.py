@@ -0,0 +1,114 @@
+import re
+
+import pytest
+
+from patterns import PatternEngine
+
+
+def hits(text):
+    return {hit['rule']: hit for hit in PatternEngine().match(text)}
+
+
+@pytest.mark.parametrize('text, rule', [
+    ("market cap risk", 'RUG'),
+    ("Market Cap / Volume", 'VOLUME'),
+    ("mcap: new", 'NEW'),
+    ("market cap 500 holders", 'HOLDERS'),
+    ("market cap $1.50", 'PRICE'),
+])
+def test_mcap_does_not_swallow_other_rules(text, rule):
+    found = hits(text)
+    assert 'MCAP' in found
+    assert rule in found
+    assert found[rule]['label'] is not None
+
+
+def test_mcap_value_is_not_holders_count():
+    found = hits("market cap 500 holders")
+    assert found['MCAP']['value'] is None
+    assert found['HOLDERS']['value'] == 500
+
+
+def test_mcap_value_across_html_tags():
+    found = hits("<span>MCap</span><span>$12.3K</span>")
+    assert found['MCAP']['value'] == pytest.approx(12300)
+
+
+@pytest.mark.parametrize('text, value', [
+    ("Market Cap: $2.5M", 2.5e6),
+    ("mcap 1,234", 1234),
+    ("market cap +40% today", None),
+])
+def test_mcap_value(text, value):
+    assert hits(text)['MCAP']['value'] == (pytest.approx(value) if value else None)
+
+
+def baseline_labels(text):
+    """Мітки початкового аналізатора: окремий re.search на кожен паттерн"""
+    labels = []
+    if re.search(r'\bnew\b|\brecent\b|\blaunch\b', text, re.I):
+        labels.append('⏰NEW')
+    pump = re.search(r'\+(\d+(?:\.\d+)?)\s*%', text)
+    if pump:
+        change = float(pump.group(1))
+        labels.append('🚀MEGA_PUMP' if change >= 50 else '🚀PUMP' if change >= 20 else '⬆️UP')
+    if re.search(r'24h|volume|trading', text, re.I):
+        labels.append('📈VOLUME')
+    if re.search(r'lock|locked|freeze|frozen', text, re.I):
+        labels.append('🔒LOCK')
+    if re.search(r'telegram|twitter|discord|instagram', text, re.I):
+        labels.append('📱SOCIAL')
+    if re.search(r'(\d+(?:,\d+)*)\s+holders?', text, re.I):
+        labels.append('👥HOLDERS')
+    if re.search(r'\brug\b|\bscam\b|\bhoneypot\b|\bdanger\b|\brisk\b', text, re.I):
+        labels.append('🚨RUG')
+    if re.search(r'\bdown\b|\bdip\b|\bcrash\b|\b-\d+%', text, re.I):
+        labels.append('📉DIP')
+    if re.search(r'market\s+cap|mcap|market cap', text, re.I):
+        labels.append('💰MCAP')
+    if re.search(r'\$\d+\.\d+|\$\d+,\d+', text):
+        price = re.search(r'\$(\d+(?:,\d+)*(?:\.\d+)?)', text)
+        if price and float(price.group(1).replace(',', '')) > 1:
+            labels.append('💎HIGH_PRICE')
+    return labels
+
+
+BATTERY = [
+    "$1,234 holders",
+    "$2.50 · 1,500 holders · +75% · 24h volume",
+    "New launch! +12.5% today",
+    "+35 % pump, liquidity locked, frozen",
+    "Join our Telegram and Twitter",
+    "honeypot risk: rug scam danger",
+    "price down -12% after the crash",
+    "renewal unlocked",
+    "marketcap 24hvolume",
+    "Market  Cap $12.3K, 1 holder",
+    "$0.50 and $0.20",
+    "token-5% dip",
+    "<div>NEW</div><div>+50%</div><div>mcap</div>",
+    "nothing to see here",
+]
+
+
+@pytest.mark.parametrize('text', BATTERY)
+def test_engine_matches_baseline_regexes(text):
+    labels = [hit['label'] for hit in PatternEngine().match(text) if hit['label']]
+    assert labels == baseline_labels(text)
+
+
+def test_overlapping_rules_are_both_reported():
+    found = hits("$1,234 holders")
+    assert found['PRICE']['label'] == '💎HIGH_PRICE'
+    assert found['PRICE']['value'] == 1234
+    assert found['HOLDERS']['value'] == 1234
+
+
+def test_rules_matching_at_the_same_position():
+    rules = [
+        {'name': 'SHORT', 'label': 'SHORT', 'keywords': ['lock']},
+        {'name': 'LONG', 'label': 'LONG', 'regex': r'locked (\d+)%'},
+    ]
+    found = {hit['rule']: hit for hit in PatternEngine(rules=rules).match("locked 90%")}
+    assert set(found) == {'SHORT', 'LONG'}
+    assert found['LONG']['value'] == 90
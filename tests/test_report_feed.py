@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from catapult_analyzer import empty_report
+from history_store import HistoryStore
+from report_feed import ReportFeed, ScanFailed
+from scanner_worker import ScannerWorker
+from scheduler import SchedulePolicy
+
+
+class FakeScanner:
+    def __init__(self, error=None):
+        self.error = error
+
+    def scan(self, on_token=None):
+        if self.error:
+            raise self.error
+        report = empty_report()
+        report['tokens'] = [{'token_id': '1', 'name': 'A', 'url': '/turbo/tokens/1', 'patterns': []}]
+        report['total_tokens'] = 1
+        return report
+
+
+@pytest.fixture
+def run_worker(tmp_path):
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    workers = []
+
+    def start(scanner):
+        worker = ScannerWorker('w1', scanner, history, SchedulePolicy(), poll=0.02)
+        worker.next_run = time.time() + 3600  # лише запити бота
+        threading.Thread(target=worker.run_forever, daemon=True).start()
+        workers.append(worker)
+        return history
+
+    yield start
+    for worker in workers:
+        worker.stop()
+
+
+def test_failed_scan_answers_request_at_once(run_worker):
+    history = run_worker(FakeScanner(RuntimeError("Chrome не стартував")))
+    feed = ReportFeed(history, lambda report: None, poll=0.02, timeout=30)
+    feed.start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(ScanFailed, match="Chrome не стартував"):
+            feed.request_scan()
+        assert time.monotonic() - started < 5
+        assert history.claim_scan_requests() == 0  # запит забрано, а не загублено без відповіді
+    finally:
+        feed.stop()
+
+
+def test_successful_scan_answers_request(run_worker):
+    history = run_worker(FakeScanner())
+    feed = ReportFeed(history, lambda report: None, poll=0.02, timeout=30)
+    feed.start()
+    try:
+        report = feed.request_scan()
+    finally:
+        feed.stop()
+    assert report['tokens'][0]['token_id'] == '1'
+
+
+def test_old_failures_do_not_fail_new_requests(tmp_path):
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    history.record_scan_failure('w1', 'вчорашня помилка')
+    feed = ReportFeed(history, lambda report: None, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        feed.request_scan()
@@ -0,0 +1,40 @@
+from scan_coordinator import ScanProgress
+
+
+def test_progress_reaches_watchers_throttled(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('scan_coordinator.time.monotonic', lambda: clock[0])
+    notified = []
+    progress = ScanProgress(lambda watcher, analyzed: notified.append((watcher, analyzed)), interval=3)
+
+    progress.start()
+    progress.watch((1, 10))
+    progress.on_token({'token_id': '1'})  # ще не минуло interval
+    clock[0] += 3
+    progress.on_token({'token_id': '2'})
+    progress.watch((2, 20))
+    clock[0] += 1
+    progress.on_token({'token_id': '3'})
+    clock[0] += 3
+    progress.on_token({'token_id': '4'})
+
+    assert notified == [((1, 10), 2), ((1, 10), 4), ((2, 20), 4)]
+
+
+def test_unwatched_and_new_scan(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('scan_coordinator.time.monotonic', lambda: clock[0])
+    notified = []
+    progress = ScanProgress(lambda watcher, analyzed: notified.append((watcher, analyzed)), interval=0)
+
+    progress.watch((1, 10))
+    progress.on_token({'token_id': '1'})
+    progress.unwatch((1, 10))
+    progress.unwatch((1, 10))
+    progress.on_token({'token_id': '2'})
+
+    progress.start()
+    progress.watch((2, 20))
+    progress.on_token({'token_id': '3'})
+
+    assert notified == [((1, 10), 1), ((2, 20), 1)]
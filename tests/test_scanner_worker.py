@@ -0,0 +1,28 @@
+from catapult_analyzer import empty_report
+from history_store import HistoryStore
+from scanner_worker import ScannerWorker
+from scheduler import SchedulePolicy
+
+
+class FakeScanner:
+    """Викликає on_token воркера, як конвеєр, і після кожного токена читає heartbeat з історії"""
+
+    def __init__(self, history):
+        self.history = history
+        self.seen = []
+
+    def scan(self, on_token=None):
+        for token_id in ('1', '2', '3'):
+            on_token({'token_id': token_id})
+            self.seen.append(self.history.workers()[0]['status'])
+        return empty_report()
+
+
+def test_scan_progress_reaches_heartbeat(tmp_path):
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    scanner = FakeScanner(history)
+    worker = ScannerWorker('w1', scanner, history, SchedulePolicy())
+
+    assert worker.scan_once()
+    assert scanner.seen == ['scanning (готово 1)', 'scanning (готово 2)', 'scanning (готово 3)']
+    assert history.workers()[0]['status'] == 'idle'
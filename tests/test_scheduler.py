@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+import pytest
+
+from scheduler import SchedulePolicy, ScanScheduler
+
+
+class FakeCoordinator:
+    def __init__(self):
+        self.runs = threading.Event()
+
+    def run(self, timeout=None):
+        self.runs.set()
+
+
+def test_first_cycle_scans_without_subscribers():
+    coordinator = FakeCoordinator()
+    scheduler = ScanScheduler(coordinator, SchedulePolicy(), idle_after=3600)
+    thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+    thread.start()
+    try:
+        assert coordinator.runs.wait(5)
+        assert scheduler.skipped == 0
+    finally:
+        scheduler.stop()
+        thread.join(5)
+
+
+def test_idle_after_startup_skips():
+    scheduler = ScanScheduler(FakeCoordinator(), SchedulePolicy(), idle_after=60)
+    assert scheduler.active()
+    scheduler.last_activity = time.time() - 61
+    assert not scheduler.active()
+    scheduler.has_subscribers = lambda: True
+    assert scheduler.active()
+
+
+def listing(ids, tokens=()):
+    return {'listed': list(ids), 'tokens': [{'token_id': token_id} for token_id in tokens]}
+
+
+def test_interval_follows_ewma_of_new_tokens():
+    policy = SchedulePolicy(min_interval=60, max_interval=1800, base_interval=600, target_new=5, smoothing=0.5)
+
+    assert policy.record(listing(range(3)), at=1000) == 600  # перший скан — темпу ще нема
+    assert policy.record(listing(range(13)), at=1600) == 300  # 10 нових за 10 хв → 1/хв
+    assert policy.rate == pytest.approx(1)
+    assert policy.record(listing(range(43)), at=2200) == 150  # 3/хв → EWMA 2/хв
+    assert policy.rate == pytest.approx(2)
+    assert policy.record(listing(range(43)), at=2800) == 225  # тихо: ×1.5
+    assert policy.rate == pytest.approx(1)
+
+
+def test_interval_is_clamped():
+    policy = SchedulePolicy(min_interval=60, max_interval=1800, target_new=5)
+    policy.record(listing(range(1)), at=1000)
+    assert policy.record(listing(range(1000)), at=1060) == 60
+
+    for step in range(10):
+        interval = policy.record(listing(range(1000)), at=2000 + step * 60)
+    assert interval == 1800
+
+
+def test_quiet_scan_is_not_a_failure():
+    policy = SchedulePolicy()
+    policy.record(listing([1, 2], tokens=[1]), at=1000)
+    interval = policy.record(listing([1, 2]), at=1600)  # жодного токена з паттернами
+
+    assert policy.failures == 0
+    assert interval == 900
+    assert policy.record({'listed': [], 'tokens': []}, at=2200) == 1350  # порожній лістинг — теж тихо
+    assert policy.failures == 0
+
+
+def test_failed_scan_backs_off_and_success_resets():
+    policy = SchedulePolicy(min_interval=60)
+    policy.record({'tokens': [], 'failed': True})
+    policy.record({'tokens': [], 'failed': True})
+    assert policy.failures == 2
+
+    policy.record(listing([1]), at=1000)
+    assert policy.failures == 0
+    assert policy.interval() == policy.base_interval
+
+
+@pytest.mark.parametrize('failures, low, high', [
+    (1, 60, 60),  # 15..30 с — менше за min_interval
+    (2, 60, 60),
+    (3, 60, 120),
+    (4, 120, 240),
+    (7, 900, 1800),
+    (12, 900, 1800),  # стеля backoff_max
+])
+def test_backoff_range(monkeypatch, failures, low, high):
+    policy = SchedulePolicy(min_interval=60, backoff_base=30, backoff_max=1800)
+    policy.failures = failures
+
+    monkeypatch.setattr(random, 'uniform', lambda a, b: a)
+    assert policy.interval() == low
+    monkeypatch.setattr(random, 'uniform', lambda a, b: b)
+    assert policy.interval() == high
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from scoring import RUG_PENALTY, FeatureTable, TokenScorer, percentiles, score, top_indices, zscores
+
+nan = np.nan
+
+
+def test_zscores():
+    z = zscores(np.array([1.0, 2.0, 3.0, nan]), np.array([1.0, 2.0, 3.0, nan]))
+    assert z[:3] == pytest.approx([-1.2247449, 0.0, 1.2247449])
+    assert np.isnan(z[3])
+
+
+@pytest.mark.parametrize('reference', [np.array([5.0, nan]), np.array([4.0, 4.0, 4.0])])
+def test_zscores_degenerate_reference(reference):
+    z = zscores(np.array([1.0, nan]), reference)
+    assert z[0] == 0.0
+    assert np.isnan(z[1])
+
+
+def test_percentiles():
+    result = percentiles(np.array([5.0, 20.0, 45.0, nan]), np.array([10.0, 20.0, 30.0, 40.0, nan]))
+    assert result[:3] == pytest.approx([0.0, 50.0, 100.0])
+    assert np.isnan(result[3])
+    assert np.isnan(percentiles(np.array([1.0]), np.array([nan]))).all()
+
+
+def token(token_id, patterns=(), **values):
+    return {'token_id': token_id, 'patterns': list(patterns), 'values': values}
+
+
+def test_score_rewards_features_and_penalises_rug():
+    table = FeatureTable.from_tokens([
+        token(1, PUMP=80, HOLDERS=900),
+        token(2, PUMP=10, HOLDERS=900),
+        token(3, ['🚨RUG'], PUMP=10, HOLDERS=900),
+        token(4),  # без значень — «як у середньому»
+    ])
+    total, z = score(table)
+
+    assert total[0] > total[1]
+    assert total[1] - total[2] == pytest.approx(RUG_PENALTY)
+    assert np.isnan(z['pump'][3])
+    assert z['holders'][:3] == pytest.approx([0, 0, 0])  # однакові — z нуль
+
+
+def test_top_indices():
+    scores = np.array([1.0, 5.0, 3.0, 4.0, 2.0])
+    assert top_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_indices(scores, 10).tolist() == [1, 3, 2, 4, 0]
+    assert top_indices(scores, 0).tolist() == []
+
+
+class FakeHistory:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def latest_values(self, since):
+        self.calls += 1
+        return self.rows
+
+
+def test_rank_excludes_current_tokens_from_history():
+    # Старе значення токена 1 з історії (1000) не має тягнути перцентилі скану вниз
+    history = FakeHistory([(1, 'PUMP', 1000.0), (8, 'PUMP', 5.0), (9, 'PUMP', 6.0)])
+    report = {'scan_id': 1, 'tokens': [token(1, PUMP=20), token(2, PUMP=10)]}
+
+    ranking = TokenScorer(history).rank(report)
+
+    assert [entry['token']['token_id'] for entry in ranking] == [1, 2]
+    assert ranking[0]['history_pct'] == 100.0
+    assert ranking[1]['history_pct'] == 100.0
+    assert ranking[0]['scan_pct'] == 100.0
+    assert ranking[1]['scan_pct'] == 50.0
+
+
+def test_rank_is_cached_by_scan_id():
+    history = FakeHistory([(8, 'PUMP', 5.0)])
+    scorer = TokenScorer(history)
+    report = {'scan_id': 7, 'tokens': [token(1, PUMP=20), token(2, PUMP=10)]}
+
+    first = scorer.rank(report)
+    assert scorer.rank(dict(report, tokens=[token(3)])) is first
+
+    other = scorer.rank({'scan_id': 8, 'tokens': [token(3, PUMP=1)]})
+    assert other is not first
+    assert [entry['token']['token_id'] for entry in other] == [3]
+    assert history.calls == 1  # історичні ознаки — не частіше refresh
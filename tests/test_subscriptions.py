@@ -0,0 +1,84 @@
+import pytest
+
+from patterns import DEFAULT_RULES
+from subscriptions import FilterError, _tokenize, compile_filter, diff_reports, filter_names
+
+
+def facts(*labels, **values):
+    return {'labels': set(labels), 'values': values}
+
+
+def test_tokenize():
+    assert _tokenize("(pump >= 30.5) and not Rug") == [
+        ('(', None), ('name', 'PUMP'), ('op', '>='), ('num', 30.5), (')', None),
+        ('AND', None), ('NOT', None), ('name', 'RUG'),
+    ]
+
+
+def test_tokenize_rejects_garbage():
+    with pytest.raises(FilterError):
+        _tokenize("PUMP & RUG")
+
+
+def test_filter_names_from_rules():
+    labels, values = filter_names(DEFAULT_RULES)
+    assert {'MEGA_PUMP', 'PUMP', 'UP', 'HOLDERS', 'HIGH_PRICE', 'RUG'} <= labels
+    assert 'PRICE' not in labels
+    assert {'PUMP', 'HOLDERS', 'MCAP', 'PRICE', 'AGE'} <= values
+    assert 'RUG' not in values
+
+
+@pytest.mark.parametrize('expression, token, expected', [
+    ("MEGA_PUMP or LOCK and RUG", facts('MEGA_PUMP'), True),  # AND сильніше за OR
+    ("MEGA_PUMP or LOCK and RUG", facts('LOCK'), False),
+    ("(MEGA_PUMP or LOCK) and RUG", facts('MEGA_PUMP'), False),
+    ("not RUG and LOCK", facts('LOCK'), True),  # NOT сильніше за AND
+    ("not (RUG and LOCK)", facts('LOCK', 'RUG'), False),
+    ("not not RUG", facts('RUG'), True),
+    ("HOLDERS >= 500", facts(HOLDERS=500), True),
+    ("HOLDERS > 500", facts(HOLDERS=500), False),
+    ("PUMP > 30", facts('PUMP'), False),  # значення нема — порівняння хибне
+    ("*", facts(), True),
+])
+def test_precedence_and_comparisons(expression, token, expected):
+    assert compile_filter(expression, DEFAULT_RULES)(token) is expected
+
+
+@pytest.mark.parametrize('expression', [
+    "",
+    "MEGAPUMP",
+    "MEGA_PUMP and MEGAPUMP",
+    "RUG > 1",
+    "(PUMP and LOCK",
+    "PUMP LOCK",
+    "PUMP and",
+    "HOLDERS >=",
+])
+def test_errors(expression):
+    with pytest.raises(FilterError):
+        compile_filter(expression, DEFAULT_RULES)
+
+
+def test_names_are_not_checked_without_rules():
+    assert compile_filter("MEGAPUMP")(facts('MEGAPUMP'))
+
+
+def token(token_id, *patterns):
+    return {'token_id': token_id, 'patterns': list(patterns)}
+
+
+def test_diff_reports():
+    previous = {'tokens': [token(1, '🚀PUMP'), token(2, '🔒LOCK'), token(3, '🚨RUG')]}
+    current = {'tokens': [token(1, '🚀PUMP'), token(2, '🔒LOCK', '📱SOCIAL'), token(4, '⏰NEW')]}
+
+    changes = diff_reports(previous, current)
+
+    assert [(t['token_id'], old and old['token_id'], fresh) for t, old, fresh in changes] == [
+        (2, 2, ['📱SOCIAL']),
+        (4, None, ['⏰NEW']),
+    ]
+
+
+def test_diff_reports_ignores_lost_patterns():
+    previous = {'tokens': [token(1, '🚀PUMP', '🔒LOCK')]}
+    assert diff_reports(previous, {'tokens': [token(1, '🔒LOCK')]}) == []
@@ -0,0 +1,70 @@
+from token_cache import DEFAULT_TTL, TokenCache
+
+
+def result(token_id, *patterns):
+    return {'token_id': token_id, 'patterns': list(patterns), 'analyzed_at': 1.0}
+
+
+def test_ttl_is_the_shortest_pattern_ttl():
+    cache = TokenCache()
+    assert cache.ttl_for(result('1', '📱SOCIAL')) == 6 * 3600
+    assert cache.ttl_for(result('1', '📱SOCIAL', '🚀PUMP')) == 300
+    assert cache.ttl_for(result('1')) == DEFAULT_TTL
+    assert cache.ttl_for(result('1', '🦄UNKNOWN')) == DEFAULT_TTL
+
+
+def test_entries_expire_per_pattern():
+    cache = TokenCache(pattern_ttl={'📱SOCIAL': 100, '🚀PUMP': 10})
+    cache.put(result('1', '📱SOCIAL'), now=1000)
+    cache.put(result('2', '📱SOCIAL', '🚀PUMP'), now=1000)
+
+    assert cache.get('2', now=1009)['token_id'] == '2'
+    assert cache.get('2', now=1010) is None  # памп застарів — весь результат
+    assert cache.get('1', now=1099)['token_id'] == '1'
+    assert cache.get('1', now=1100) is None
+
+
+def test_failed_loads_are_not_cached():
+    cache = TokenCache()
+    cache.put({'token_id': '1', 'patterns': []}, now=1000)
+    assert cache.get('1', now=1000) is None
+    assert cache.high_water_mark == 0
+
+
+def test_high_water_mark():
+    cache = TokenCache()
+    for token_id in ('15', '42', '7', 'abc'):
+        cache.put(result(token_id), now=1000)
+    assert cache.high_water_mark == 42
+
+
+def test_split_puts_new_tokens_first():
+    cache = TokenCache(pattern_ttl={'🚀PUMP': 10})
+    cache.put(result('10', '📱SOCIAL'), now=1000)
+    cache.put(result('20', '🚀PUMP'), now=1000)
+
+    listing = [{'token_id': token_id} for token_id in ('20', '5', '30', '10', '25')]
+    to_analyze, cached = cache.split(listing, now=1050)
+
+    # 30 і 25 новіші за HWM (20) — першими, далі прострочений 20 і старий 5 в порядку лістингу
+    assert [token['token_id'] for token in to_analyze] == ['30', '25', '20', '5']
+    assert list(cached) == ['10']
+
+
+def test_split_returns_copies():
+    cache = TokenCache()
+    cache.put(result('1', '📱SOCIAL'), now=1000)
+    _, cached = cache.split([{'token_id': '1'}], now=1001)
+    cached['1']['name'] = 'changed'  # аналізатор дописує в token_data — кеш не має змінитись
+    assert 'name' not in cache.get('1', now=1001)
+
+
+def test_eviction_drops_expired_then_soonest():
+    cache = TokenCache(pattern_ttl={'🚀PUMP': 10, '📱SOCIAL': 100}, max_entries=2)
+    cache.put(result('1', '🚀PUMP'), now=1000)
+    cache.put(result('2', '📱SOCIAL'), now=1000)
+    cache.put(result('3', '🚀PUMP'), now=1001)  # переповнення: спливає найраніше — 1
+
+    assert cache.get('1', now=1002) is None
+    assert cache.get('2', now=1002) is not None
+    assert cache.get('3', now=1002) is not None
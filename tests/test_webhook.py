@@ -0,0 +1,79 @@
+import http.client
+import time
+
+import pytest
+
+from tests.helpers import FIXTURES
+from webhook import MAX_BODY_BYTES, WebhookServer
+
+SECRET = 'ключ-42'
+UPDATE = (FIXTURES / 'telegram_update.json').read_bytes()
+
+
+class FakeBot:
+    threaded = True
+
+    def __init__(self):
+        self.updates = []
+
+    def process_new_updates(self, updates):
+        self.updates.extend(updates)
+
+
+@pytest.fixture
+def webhook():
+    server = WebhookServer(FakeBot(), port=0, secret=SECRET, workers=1)
+    server.start()
+    yield server
+    server.stop(timeout=5)
+
+
+def post(server, body=UPDATE, secret=SECRET.encode(), length=None, path='/telegram'):
+    conn = http.client.HTTPConnection(*server._server.server_address, timeout=5)
+    try:
+        conn.putrequest('POST', path)
+        if secret is not None:
+            conn.putheader('X-Telegram-Bot-Api-Secret-Token', secret)
+        conn.putheader('Content-Length', str(len(body)) if length is None else length)
+        conn.endheaders(body)
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+
+def test_accepts_recorded_update(webhook):
+    assert post(webhook) == 200
+    deadline = time.monotonic() + 5
+    while not webhook.bot.updates and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [u.update_id for u in webhook.bot.updates] == [815200431]
+    assert webhook.bot.updates[0].message.text == '/scan'
+
+
+@pytest.mark.parametrize('secret', [None, b'wrong', 'ключ-43'.encode()])
+def test_wrong_secret_forbidden(webhook, secret):
+    assert post(webhook, secret=secret) == 403
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'length': 'abc'},
+    {'length': '-5'},
+    {'body': b'{"update_id": '},
+    {'body': b'not json'},
+])
+def test_bad_request(webhook, kwargs):
+    assert post(webhook, **kwargs) == 400
+
+
+def test_too_large(webhook):
+    assert post(webhook, body=b'{}', length=str(MAX_BODY_BYTES + 1)) == 413
+
+
+def test_wrong_path(webhook):
+    assert post(webhook, path='/other') == 404
+
+
+def test_non_latin1_header_is_forbidden_not_error():
+    server = WebhookServer(FakeBot(), secret=SECRET)
+    headers = {'X-Telegram-Bot-Api-Secret-Token': SECRET, 'Content-Length': '2'}
+    assert server.accept('/telegram', headers, None) == 403
@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Скільки живе результат з цим паттерном (сек). Статичні ознаки (соцмережі,
+# лок ліквідності) майже не змінюються, ціна/памп — застарівають за хвилини.
+PATTERN_TTL = {
+    '📱SOCIAL': 6 * 3600,
+    '🔒LOCK': 6 * 3600,
+    '💰MCAP': 3600,
+    '👥HOLDERS': 1800,
+    '⏰NEW': 1800,
+    '📈VOLUME': 900,
+    '🚨RUG': 900,
+    '💎HIGH_PRICE': 600,
+    '🚀MEGA_PUMP': 300,
+    '🚀PUMP': 300,
+    '⬆️UP': 300,
+    '📉DIP': 300,
+}
+DEFAULT_TTL = 900  # токен без паттернів або з невідомим паттерном
+
+
+class TokenCache:
+    """Кеш результатів analyze_token за token_id з TTL по паттернах"""
+
+    def __init__(self, pattern_ttl=None, default_ttl=DEFAULT_TTL, max_entries=5000):
+        self.pattern_ttl = {**PATTERN_TTL, **(pattern_ttl or {})}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.high_water_mark = 0  # найбільший token_id, який ми вже аналізували
+
+        self._entries = {}  # token_id -> (expires_at, token_data)
+        self._lock = threading.Lock()
+
+    def ttl_for(self, token_data):
+        """TTL результату = TTL найменш стабільного з його паттернів"""
+        ttls = [self.pattern_ttl.get(p, self.default_ttl) for p in token_data['patterns']]
+        return min(ttls) if ttls else self.default_ttl
+
+    def get(self, token_id, now=None):
+        now = now or time.time()
+        with self._lock:
+            entry = self._entries.get(token_id)
+            if entry and entry[0] > now:
+                return entry[1]
+        return None
+
+    def put(self, token_data, now=None):
+        """Зберігає лише успішно завантажені результати (з analyzed_at)"""
+        if not token_data.get('analyzed_at'):
+            return
+
+        now = now or time.time()
+        token_id = token_data['token_id']
+        with self._lock:
+            self._entries[token_id] = (now + self.ttl_for(token_data), token_data)
+            if str(token_id).isdigit():
+                self.high_water_mark = max(self.high_water_mark, int(token_id))
+            if len(self._entries) > self.max_entries:
+                self._evict(now)
+
+    def split(self, tokens, now=None):
+        """Ділить список на (потрібно аналізувати, {token_id: кешований результат})
+
+        Токени новіші за high-water mark йдуть першими — вони точно не в кеші.
+        """
+        now = now or time.time()
+        stale, cached = [], {}
+
+        for token in tokens:
+            token_data = self.get(token['token_id'], now)
+            if token_data:
+                cached[token['token_id']] = dict(token_data)
+            else:
+                stale.append(token)
+
+        hwm = self.high_water_mark
+        new, expired = [], []
+        for token in stale:
+            is_new = token['token_id'].isdigit() and int(token['token_id']) > hwm
+            (new if is_new else expired).append(token)
+
+        logger.info(f"♻️ Кеш: {len(cached)}, нових: {len(new)}, застарілих: {len(expired)} (HWM #{hwm})")
+        return new + expired, cached
+
+    def _evict(self, now):
+        # Спершу прострочені, потім ті що спливають найраніше
+        for token_id in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+            del self._entries[token_id]
+
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(self._entries.items(), key=lambda item: item[1][0])[:overflow]
+            for token_id, _ in oldest:
+                del self._entries[token_id]
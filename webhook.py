@@ -0,0 +1,157 @@
+import hmac
+import json
+import logging
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot.types import Update
+
+from metrics import REGISTRY, timed
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+
+WEBHOOK_UPDATES = REGISTRY.counter(
+    "catapult_webhook_updates_total",
+    "Оновлення вебхука за результатом (accepted, forbidden, bad_request, too_large, overloaded)"
+)
+WEBHOOK_QUEUE = REGISTRY.gauge("catapult_webhook_queue", "Оновлень у черзі до обробників")
+WEBHOOK_WAIT = REGISTRY.histogram(
+    "catapult_webhook_wait_seconds", "Скільки оновлення чекало в черзі",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    receiver = None  # WebhookServer, підставляється в start()
+
+    def do_POST(self):
+        status = self.receiver.accept(self.path, self.headers, self.rfile)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookServer:
+    """Приймач оновлень Telegram: HTTP-сервер + обмежена черга + пул обробників
+
+    Відповідь Telegram — одразу після постановки в чергу. Повна черга → 503:
+    Telegram повторить доставку пізніше (backpressure замість росту пам'яті).
+    Обробники викликають bot.process_new_updates синхронно, тож власний пул
+    telebot не використовується (bot.threaded = False).
+    """
+
+    def __init__(self, bot, host="127.0.0.1", port=8443, path="/telegram", secret=None,
+                 workers=8, queue_size=100):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.workers = workers
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._server = None
+
+    def accept(self, path, headers, body):
+        """HTTP-статус для одного запиту"""
+        if path.split('?')[0] != self.path:
+            return 404
+
+        if self.secret and not self.secret_ok(headers.get('X-Telegram-Bot-Api-Secret-Token', '')):
+            WEBHOOK_UPDATES.inc(result='forbidden')
+            return 403
+
+        try:
+            length = int(headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            WEBHOOK_UPDATES.inc(result='bad_request')
+            return 400
+        if length > MAX_BODY_BYTES:
+            WEBHOOK_UPDATES.inc(result='too_large')
+            return 413
+
+        try:
+            update = Update.de_json(json.loads(body.read(length)))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Вебхук: невалідне оновлення: {str(e)[:80]}")
+            WEBHOOK_UPDATES.inc(result='bad_request')
+            return 400
+
+        try:
+            self._queue.put_nowait((time.monotonic(), update))
+        except queue.Full:
+            WEBHOOK_UPDATES.inc(result='overloaded')
+            return 503
+
+        WEBHOOK_UPDATES.inc(result='accepted')
+        WEBHOOK_QUEUE.set(self._queue.qsize())
+        return 200
+
+    def secret_ok(self, token):
+        """Порівняння в байтах: http.server декодує заголовки як latin-1, тож і кодуємо назад так"""
+        try:
+            token = token.encode('latin-1')
+        except UnicodeEncodeError:
+            return False
+        return hmac.compare_digest(token, self.secret.encode())
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            queued_at, update = item
+            WEBHOOK_WAIT.observe(time.monotonic() - queued_at)
+            WEBHOOK_QUEUE.set(self._queue.qsize())
+            try:
+                with timed('webhook_update'):
+                    self.bot.process_new_updates([update])
+            except Exception as e:
+                logger.error(f"❌ Обробка оновлення {update.update_id}: {e}")
+
+    def start(self):
+        """Запускає обробників і HTTP-сервер у фонових потоках"""
+        self.bot.threaded = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True, name=f"webhook-{i}")
+            thread.start()
+            self._threads.append(thread)
+
+        handler = type('Handler', (_WebhookHandler,), {'receiver': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="webhook-http").start()
+        logger.info(f"🪝 Вебхук: http://{self.host}:{self.port}{self.path}")
+
+    def stop(self, timeout=30):
+        """Перестає приймати, дообробляє чергу (не довше timeout) і зупиняє обробників"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            # Стоп-сигнали йдуть після всього, що вже в черзі
+            try:
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        left = self._queue.qsize()
+        logger.info("🛑 Вебхук зупинено" + (f" (не оброблено {left})" if left else ""))
+
+    def pending(self):
+        return self._queue.qsize()